@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""Fixtures for the pywol benchmark suite.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import socket
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def receiver():
+    """Fixture to supply the address of a loopback UDP socket.
+
+    The socket is never read from, so the kernel discards packets once
+    its receive buffer is full and sends never block.
+
+    """
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        yield sock.getsockname()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""Compare per-packet sendto with batched sendmmsg transmission.
+
+Sends prebuilt magic packets to a loopback socket that is never read
+from, so the kernel discards them after the send completes, and prints
+the best packets-per-second rate of both send paths over several runs.
+
+Usage: python benchmarks/sendmmsg.py [PACKETS] [RUNS]
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import socket
+import sys
+import time
+
+from pywol.transmit import BatchSender
+from pywol.wol import _generate_magic_packet
+
+
+def _rate(sender, packets):
+    start = time.perf_counter()
+    failures = sender.send(packets)
+    elapsed = time.perf_counter() - start
+    return (len(packets) - len(failures)) / elapsed
+
+
+def main(count=200000, runs=5):
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sink, socket.socket(
+        socket.AF_INET, socket.SOCK_DGRAM
+    ) as sock:
+        sink.bind(("127.0.0.1", 0))
+        address = sink.getsockname()
+        payloads = [_generate_magic_packet(f"{i:012X}") for i in range(1024)]
+        packets = [(payloads[i % 1024], address) for i in range(count)]
+
+        unbatched = BatchSender(sock, batched=False)
+        batched = BatchSender(sock)
+        if not batched.batched:
+            print("sendmmsg is not available on this platform.")
+            return
+        sendto_rate = sendmmsg_rate = 0
+        for _ in range(runs):
+            sendto_rate = max(sendto_rate, _rate(unbatched, packets))
+            sendmmsg_rate = max(sendmmsg_rate, _rate(batched, packets))
+
+    print(f"sendto:   {sendto_rate:12,.0f} packets/s")
+    print(f"sendmmsg: {sendmmsg_rate:12,.0f} packets/s")
+    print(f"speedup:  {sendmmsg_rate / sendto_rate:12.2f}x")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
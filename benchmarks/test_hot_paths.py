@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks for the packet, validation and send hot paths.
+
+Run with pytest-benchmark and save the results, numbered per run, under
+.benchmarks/:
+
+    pytest benchmarks --benchmark-autosave
+
+Compare against the latest saved run and fail on a regression:
+
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:10%
+
+Single-call benchmarks report per-call latency. Bulk benchmarks send to
+1k, 100k and 1M distinct targets per round; deselect the largest with
+-k "not 1000000".
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import socket
+
+import pytest
+
+from pywol.mac import MacAddress
+from pywol.metrics import MetricsCollector, add_observer, remove_observer
+from pywol.wol import (
+    _clean_mac_address,
+    _evaluate_ip_address,
+    _generate_magic_packet,
+    _open_broadcast_socket,
+    _send_udp_broadcast,
+    packet_cache,
+    wake,
+    wake_many,
+)
+
+BULK_SIZES = [1000, 100000, 1000000]
+
+
+def _targets(count, address):
+    """Return `count` distinct (mac_address, ip_address, port) targets."""
+
+    ip_address, port = address
+    return [(f"{i:012X}", ip_address, port) for i in range(count)]
+
+
+@pytest.mark.parametrize(
+    "mac_address",
+    ["1A:2B:3C:4D:5E:6F", "1A2B.3C4D.5E6F", "1A2B3C4D5E6F", MacAddress("1A2B3C4D5E6F")],
+    ids=["colon", "dot", "plain", "MacAddress"],
+)
+def test_clean_mac_address(benchmark, mac_address):
+    benchmark.group = "clean_mac_address"
+    assert benchmark(_clean_mac_address, mac_address) == "1A2B3C4D5E6F"
+
+
+@pytest.mark.parametrize(
+    "ip_address", ["192.168.1.255", "192.168.1.5/24"], ids=["plain", "netmask"]
+)
+def test_evaluate_ip_address_uncached(benchmark, ip_address):
+    benchmark.group = "evaluate_ip_address"
+    evaluate = _evaluate_ip_address.__wrapped__
+    assert benchmark(evaluate, ip_address) == "192.168.1.255"
+
+
+def test_evaluate_ip_address_cached(benchmark):
+    benchmark.group = "evaluate_ip_address"
+    assert benchmark(_evaluate_ip_address, "192.168.1.5/24") == "192.168.1.255"
+
+
+def test_generate_magic_packet(benchmark):
+    benchmark.group = "magic_packet"
+    assert len(benchmark(_generate_magic_packet, "1A2B3C4D5E6F")) == 102
+
+
+def test_generate_magic_packet_password(benchmark):
+    benchmark.group = "magic_packet"
+    packet = benchmark(_generate_magic_packet, "1A2B3C4D5E6F", "010203040506")
+    assert len(packet) == 108
+
+
+@pytest.mark.parametrize(
+    "mac_address, password",
+    [("1A2B3C4D5E6F", ""), ("1a2b3c4d5e6f", ""), ("1A2B3C4D5E6F", "010203040506")],
+    ids=["plain", "lower", "password"],
+)
+def test_packet_cache_hit(benchmark, mac_address, password):
+    """Hits should cost less than building the packet they return."""
+
+    benchmark.group = "magic_packet"
+    packet_cache.get(mac_address, password)
+    packet = benchmark(packet_cache.get, mac_address, password)
+    assert packet is packet_cache.get(mac_address, password)
+
+
+def test_send_udp_broadcast_new_socket(benchmark, receiver):
+    benchmark.group = "send_udp_broadcast"
+    payload = _generate_magic_packet("1A2B3C4D5E6F")
+    benchmark(_send_udp_broadcast, payload, *receiver)
+
+
+def test_send_udp_broadcast_pooled_socket(benchmark, receiver):
+    benchmark.group = "send_udp_broadcast"
+    payload = _generate_magic_packet("1A2B3C4D5E6F")
+    with _open_broadcast_socket(socket.AF_INET) as sock:
+        benchmark(_send_udp_broadcast, payload, *receiver, sock=sock)
+
+
+def test_wake(benchmark, receiver):
+    benchmark.group = "wake"
+    ip_address, port = receiver
+    dest = benchmark(
+        wake, "1A2B3C4D5E6F", ip_address=ip_address, port=port, return_dest=True
+    )
+    assert dest == (ip_address, str(port))
+
+
+@pytest.mark.parametrize("count", BULK_SIZES)
+def test_validate_bulk(benchmark, count):
+    benchmark.group = "bulk validate"
+    benchmark.extra_info["targets"] = count
+    mac_addresses = [f"{i:012X}" for i in range(count)]
+
+    def validate():
+        for mac_address in mac_addresses:
+            _clean_mac_address(mac_address)
+
+    benchmark.pedantic(validate, rounds=3 if count < 1000000 else 1)
+
+
+@pytest.mark.parametrize("count", BULK_SIZES)
+def test_wake_many_bulk(benchmark, receiver, count):
+    benchmark.group = "bulk wake_many"
+    benchmark.extra_info["targets"] = count
+    targets = _targets(count, receiver)
+    results = benchmark.pedantic(
+        wake_many,
+        args=(targets,),
+        setup=packet_cache.clear,
+        rounds=3 if count < 1000000 else 1,
+    )
+    assert len(results) == count
+
+
+def test_wake_many_observed(benchmark, receiver):
+    benchmark.group = "bulk wake_many"
+    benchmark.extra_info["targets"] = 1000
+    targets = _targets(1000, receiver)
+    collector = MetricsCollector()
+    add_observer(collector)
+    try:
+        benchmark.pedantic(
+            wake_many, args=(targets,), setup=packet_cache.clear, rounds=3
+        )
+    finally:
+        remove_observer(collector)
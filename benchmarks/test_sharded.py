@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks for sharded multi-process bulk sends.
+
+Each round wakes the same 200k distinct targets with an increasing
+number of worker processes; compare the 'processes' groups' means to see
+how sends scale across cores. Counts above the machine's CPU count are
+skipped.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import os
+
+import pytest
+
+from pywol.shard import wake_sharded
+
+TARGETS = 200000
+PROCESSES = [1, 2, 4, 8]
+
+
+@pytest.mark.parametrize("processes", PROCESSES)
+def test_wake_sharded(benchmark, receiver, processes):
+    if processes > (os.cpu_count() or 1):
+        pytest.skip(f"fewer than {processes} CPUs")
+    benchmark.group = "sharded wake"
+    benchmark.extra_info["targets"] = TARGETS
+    benchmark.extra_info["processes"] = processes
+    ip_address, port = receiver
+    targets = [(f"{i:012X}", ip_address, port) for i in range(TARGETS)]
+    results = benchmark.pedantic(
+        wake_sharded, args=(targets,), kwargs={"processes": processes}, rounds=3
+    )
+    assert len(results) == TARGETS
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks for the start-up time of the pywol console script.
+
+Each round imports the module in a fresh interpreter, so results include
+interpreter start-up. Compare the fast entry point against the full CLI
+and the bare interpreter to see what importing pywol costs.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "statement",
+    ["pass", "import pywol.entry", "import pywol.cli"],
+    ids=["interpreter", "entry", "cli"],
+)
+def test_import_time(benchmark, statement):
+    benchmark.group = "startup"
+    benchmark.pedantic(
+        subprocess.check_call, args=([sys.executable, "-c", statement],), rounds=20
+    )
@@ -1,4 +1,4 @@
-from .wol import wake
+from .wol import WakeRecord, WakeResult, iter_wake, wake, wake_many
 
-__all__ = ["wake"]
+__all__ = ["WakeRecord", "WakeResult", "iter_wake", "wake", "wake_many"]
 __version__ = "1.0.0"
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+pywol.aio
+---------
+This module implements asyncio-native sending of Wake-on-LAN magic packets.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import asyncio
+import socket
+from time import perf_counter
+
+from .metrics import STAGES, _notify_outcome, _notify_stages, _observers
+from .wol import WakeResult, _open_broadcast_socket, _prepare_target, _transport
+
+
+class _WakeProtocol(asyncio.DatagramProtocol):
+    """Datagram protocol tracking transport write pressure and errors."""
+
+    def __init__(self):
+        self.error = None
+        self._writable = asyncio.Event()
+        self._writable.set()
+
+    def pause_writing(self):
+        self._writable.clear()
+
+    def resume_writing(self):
+        self._writable.set()
+
+    def error_received(self, exc):
+        self.error = exc
+
+    def connection_lost(self, exc):
+        self._writable.set()
+
+    async def drained(self):
+        """Wait until the transport accepts more data."""
+
+        await self._writable.wait()
+
+
+class WakeSender:
+    """Send magic packets over reused datagram transports.
+
+    IPv4 packets share one broadcast transport, opened up front, and IPv6
+    packets use one multicast transport per interface scope, opened on
+    first use, like the sockets of `pywol.wake_many`.
+
+    Use as an async context manager. Sends wait while the transport's
+    write buffer is above its high-water mark, and at most `limit`
+    coroutines are let into the send path at once, so a large number
+    of concurrent callers can't pile up unbounded buffered packets.
+
+    Parameters
+    ----------
+    limit : int, optional
+        Maximum number of concurrent sends. (default is 1024).
+    yield_every : int, optional
+        Number of packets `wake_many` sends before yielding control
+        back to the event loop. (default is 256).
+    pacer : TokenBucket, optional
+        Rate limiter all sends wait on, e.g. a `pywol.pacing.TokenBucket`.
+
+    """
+
+    def __init__(self, *, limit=1024, yield_every=256, pacer=None):
+        self._limit = asyncio.Semaphore(limit)
+        self._yield_every = yield_every
+        self._pacer = pacer
+        self._endpoints = {}
+
+    async def open(self):
+        """Open the IPv4 broadcast datagram endpoint."""
+
+        await self._endpoint((socket.AF_INET, None))
+        return self
+
+    async def _endpoint(self, key):
+        """Return the (transport, protocol) for a (family, scope) `key`."""
+
+        endpoint = self._endpoints.get(key)
+        if endpoint is None:
+            loop = asyncio.get_event_loop()
+            sock = _open_broadcast_socket(*key)
+            try:
+                endpoint = await loop.create_datagram_endpoint(_WakeProtocol, sock=sock)
+            except BaseException:
+                sock.close()
+                raise
+            # Another sender may have opened the endpoint in the meantime.
+            if self._endpoints.setdefault(key, endpoint) is not endpoint:
+                endpoint[0].close()
+                endpoint = self._endpoints[key]
+        return endpoint
+
+    def close(self):
+        """Close the datagram endpoints."""
+
+        for transport, _ in self._endpoints.values():
+            transport.close()
+        self._endpoints.clear()
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    async def send(self, payload, ip_address, port):
+        """Send `payload` to `ip_address`:`port`.
+
+        Raises
+        ------
+        OSError
+            If the datagram could not be sent.
+
+        """
+
+        async with self._limit:
+            if not _observers:
+                if self._pacer is not None:
+                    await self._pacer.acquire_async()
+                await self._send(payload, ip_address, port)
+                return
+            start = perf_counter()
+            try:
+                if self._pacer is not None:
+                    await self._pacer.acquire_async()
+                await self._send(payload, ip_address, port)
+            except OSError as e:
+                _notify_stages((perf_counter() - start,), 1, STAGES[3:])
+                _notify_outcome(0, errors=(e,))
+                raise
+            _notify_stages((perf_counter() - start,), 1, STAGES[3:])
+            _notify_outcome(1)
+
+    async def _send(self, payload, ip_address, port):
+        transport, protocol = await self._endpoint(_transport(ip_address))
+        await protocol.drained()
+        protocol.error = None
+        transport.sendto(payload, (ip_address, port))
+        if protocol.error is not None:
+            raise protocol.error
+
+    async def wake(
+        self, mac_address, *, ip_address="255.255.255.255", port=9, return_dest=False
+    ):
+        """Generate and send WoL magic packet.
+
+        Accepts the same arguments as `pywol.wake`.
+
+        """
+
+        timings = [0.0, 0.0, 0.0] if _observers else None
+        try:
+            payload, valid_ip_address, valid_port = _prepare_target(
+                mac_address, ip_address, port, timings=timings
+            )
+        except (ValueError, TypeError) as e:
+            print(e)
+            if timings is not None:
+                _notify_outcome(0, invalid=(str(e),))
+            return
+        if timings is not None:
+            _notify_stages(timings, 1, STAGES[:3])
+        try:
+            await self.send(payload, valid_ip_address, valid_port)
+        except OSError:
+            print(f"[Error] Cannot send broadcast to IP address: {valid_ip_address}")
+        else:
+            if return_dest is True:
+                return (valid_ip_address, str(valid_port))
+
+    async def wake_many(self, targets, *, ip_address="255.255.255.255", port=9):
+        """Generate and send WoL magic packets for many targets.
+
+        Accepts the same arguments as `pywol.wake_many`.
+
+        Returns
+        -------
+        list(WakeResult)
+            One result per target, in input order.
+
+        """
+
+        results = []
+        observed = bool(_observers)
+        timings = [0.0, 0.0, 0.0, 0.0] if observed else None
+        errors = []
+        invalid = []
+        async with self._limit:
+            for count, target in enumerate(targets, 1):
+                try:
+                    payload, valid_ip_address, valid_port = _prepare_target(
+                        target, ip_address, port, timings=timings
+                    )
+                except (ValueError, TypeError) as e:
+                    results.append(WakeResult(target, None, str(e)))
+                    invalid.append(str(e))
+                    continue
+                start = perf_counter() if observed else 0.0
+                try:
+                    if self._pacer is not None:
+                        await self._pacer.acquire_async()
+                    await self._send(payload, valid_ip_address, valid_port)
+                except OSError as e:
+                    errors.append(e)
+                    error = (
+                        "[Error] Cannot send broadcast to IP address: "
+                        f"{valid_ip_address}"
+                    )
+                    results.append(WakeResult(target, None, error))
+                else:
+                    dest = (valid_ip_address, str(valid_port))
+                    results.append(WakeResult(target, dest, None))
+                if observed:
+                    timings[3] += perf_counter() - start
+                if count % self._yield_every == 0:
+                    await asyncio.sleep(0)
+        if observed:
+            prepared = len(results) - len(invalid)
+            if prepared:
+                _notify_stages(timings, prepared)
+            _notify_outcome(prepared - len(errors), errors, invalid)
+        return results
+
+
+async def wake(mac_address, *, ip_address="255.255.255.255", port=9, return_dest=False):
+    """Generate and send WoL magic packet without blocking the event loop.
+
+    Accepts the same arguments as `pywol.wake`. Use a `WakeSender` to
+    reuse one transport across many calls.
+
+    """
+
+    async with WakeSender() as sender:
+        return await sender.wake(
+            mac_address, ip_address=ip_address, port=port, return_dest=return_dest
+        )
+
+
+async def wake_many(targets, *, ip_address="255.255.255.255", port=9, pacer=None):
+    """Generate and send WoL magic packets for many targets.
+
+    Accepts the same arguments as `pywol.wake_many`. All packets are sent
+    over one datagram transport.
+
+    Returns
+    -------
+    list(WakeResult)
+        One result per target, in input order.
+
+    """
+
+    async with WakeSender(pacer=pacer) as sender:
+        return await sender.wake_many(targets, ip_address=ip_address, port=port)
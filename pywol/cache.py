@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+pywol.cache
+-----------
+This module implements a bounded LRU cache of prebuilt magic packets.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class PacketCache:
+    """Bounded cache of magic packet payloads keyed on MAC address and
+    SecureOn password.
+
+    Keys are normalized to upper case, so differently cased spellings of
+    a MAC address share an entry. When full, the least recently used
+    entry is evicted.
+
+    Hits are served without taking the lock, so a lookup costs little
+    more than a dict read and stays cheaper than building the payload.
+    Only misses and evictions are serialized.
+
+    Parameters
+    ----------
+    build : callable
+        Function building the payload for a 12-digit hexadecimal MAC
+        address, and a hexadecimal SecureOn password if there is one,
+        on a cache miss.
+    maxsize : int, optional
+        Maximum number of cached payloads. (default is 4096).
+
+    """
+
+    def __init__(self, build, maxsize=4096):
+        self._build = build
+        self._maxsize = maxsize
+        self._packets = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def maxsize(self):
+        """int: Maximum number of cached payloads.
+
+        Lowering it evicts least recently used entries right away.
+
+        """
+
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, maxsize):
+        if not isinstance(maxsize, int):
+            raise TypeError("[Error] Cache size must be of type int.")
+        if maxsize < 0:
+            raise ValueError(f"[Error] Invalid cache size: {maxsize}")
+        with self._lock:
+            self._maxsize = maxsize
+            while len(self._packets) > maxsize:
+                self._packets.popitem(last=False)
+
+    def get(self, mac_address, password=""):
+        """Return the payload for `mac_address`, building it on a miss.
+
+        Parameters
+        ----------
+        mac_address : str
+            12-digit hexadecimal MAC address without separators.
+        password : str, optional
+            8- or 12-digit hexadecimal SecureOn password without
+            separators. (default is no password).
+
+        Returns
+        -------
+        bytes
+            Magic packet payload.
+
+        """
+
+        # MAC addresses are 12 digits, so appending the password keeps
+        # (mac_address, password) keys distinct without building tuples.
+        key = mac_address + password if password else mac_address
+        packets = self._packets
+        payload = packets.get(key)
+        if payload is None:
+            key = key.upper()
+            payload = packets.get(key)
+        if payload is not None:
+            # Each step is atomic under the GIL. A concurrent eviction
+            # only costs the recency update.
+            self._hits += 1
+            try:
+                packets.move_to_end(key)
+            except KeyError:
+                pass
+            return payload
+        with self._lock:
+            self._misses += 1
+        payload = self._build(key[:12], key[12:]) if password else self._build(key)
+        with self._lock:
+            if self._maxsize > 0:
+                self._packets[key] = payload
+                if len(self._packets) > self._maxsize:
+                    self._packets.popitem(last=False)
+        return payload
+
+    def info(self):
+        """Return hit & miss statistics.
+
+        Hits are counted without the lock, so under heavy concurrent
+        use a few may be missing.
+
+        Returns
+        -------
+        CacheInfo
+            Named tuple of hits, misses, maxsize & currsize.
+
+        """
+
+        with self._lock:
+            return CacheInfo(
+                self._hits, self._misses, self._maxsize, len(self._packets)
+            )
+
+    def clear(self):
+        """Remove all cached payloads and reset statistics."""
+
+        with self._lock:
+            self._packets.clear()
+            self._hits = 0
+            self._misses = 0
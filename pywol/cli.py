@@ -11,22 +11,186 @@ license: MIT, see LICENSE for more details.
 
 import click
 
-from .wol import wake
+from .wol import _SocketPool, _wake_iter, wake
 
 
-@click.command()
-@click.argument("mac_address")
+def _read_targets(lines, ip_address, port):
+    """Lazily parse target lines of the form 'MAC[,IP[,PORT[,PASSWORD]]]'.
+
+    Blank lines and lines starting with '#' are skipped. Empty IP and
+    port fields fall back to `ip_address` and `port`.
+
+    Yields
+    ------
+    tuple(str, str, int or str) or tuple(str, str, int or str, str)
+        MAC address, IP address & port of each target, followed by its
+        SecureOn password if the line has one.
+
+    """
+
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        fields = [field.strip() for field in line.split(",")]
+        if len(fields) > 4:
+            yield tuple(fields)
+            continue
+        fields += [""] * (4 - len(fields))
+        mac_address, ip, port_number, password = fields
+        if port_number:
+            try:
+                port_number = int(port_number)
+            except ValueError:
+                pass
+        if password:
+            yield (mac_address, ip or ip_address, port_number or port, password)
+        else:
+            yield (mac_address, ip or ip_address, port_number or port)
+
+
+def _wake_from_file(file, ip_address, port, password, verbose):
+    """Stream targets from `file` over one socket and print a summary."""
+
+    sent = failed = 0
+    targets = _read_targets(file, ip_address, port)
+    with _SocketPool() as pool:
+        for result in _wake_iter(targets, ip_address, port, pool, password=password):
+            if result.error is not None:
+                failed += 1
+                click.echo(result.error)
+                continue
+            sent += 1
+            if verbose:
+                mac_address = result.target[0]
+                dest = result.dest
+                click.echo(
+                    f"Sent magic packet for '{mac_address}' to {dest[0]}:{dest[1]}."
+                )
+    click.echo(f"Sent {sent} magic packet(s), {failed} failed.")
+
+
+def _wake_from_registry(path, names, group, verbose):
+    """Wake the selected registry hosts and print a summary."""
+
+    from .registry import HostRegistry
+
+    sent = failed = 0
+    with HostRegistry(path) as registry:
+        results = registry.wake(names=names or None, group=group)
+    for result in results:
+        if result.error is not None:
+            failed += 1
+            click.echo(result.error)
+            continue
+        sent += 1
+        if verbose:
+            dest = result.dest
+            click.echo(
+                f"Sent magic packet for '{result.target}' to {dest[0]}:{dest[1]}."
+            )
+    click.echo(f"Sent {sent} magic packet(s), {failed} failed.")
+
+
+def _uses_groups(plan):
+    """Return True if a wake plan has registry group entries."""
+
+    entries = plan.get("waves") if isinstance(plan, dict) else None
+    if not isinstance(entries, list):
+        return False
+    return any(isinstance(entry, dict) and "group" in entry for entry in entries)
+
+
+def _report_wave(wave, results, verbose):
+    """Print the outcome of a scheduled wave."""
+
+    sent = failed = 0
+    for result in results:
+        if result.error is not None:
+            failed += 1
+            click.echo(result.error)
+            continue
+        sent += 1
+        if verbose:
+            target = result.target
+            mac_address = target if isinstance(target, str) else target[0]
+            dest = result.dest
+            click.echo(f"Sent magic packet for '{mac_address}' to {dest[0]}:{dest[1]}.")
+    click.echo(
+        f"Wave {wave.number}/{wave.count} of '{wave.name or 'plan'}': "
+        f"sent {sent} magic packet(s), {failed} failed."
+    )
+
+
+class _DefaultGroup(click.Group):
+    """Command group that runs its default command for unknown arguments.
+
+    This keeps `pywol MAC_ADDRESS` working as `pywol wake MAC_ADDRESS`.
+
+    """
+
+    def __init__(self, *args, default=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default = default
+
+    def parse_args(self, ctx, args):
+        if not args or (
+            args[0] not in self.commands and args[0] not in ctx.help_option_names
+        ):
+            args = [self.default] + list(args)
+        return super().parse_args(ctx, args)
+
+
+_registry_option = click.option(
+    "--registry",
+    type=click.Path(dir_okay=False),
+    help="Host registry database. [default: $PYWOL_REGISTRY or ~/.pywol/hosts.db]",
+)
+
+
+@click.group(cls=_DefaultGroup, default="wake")
+def cli():
+    """CLI for the Pywol package.
+
+    Runs the wake command unless another command is given.
+
+    """
+
+
+@cli.command("wake")
+@click.argument("mac_address", required=False)
 @click.option(
     "--ip_address",
     "--ip",
     default="255.255.255.255",
     show_default=True,
-    help="IPv4 broadcast address or host address with netmask.",
+    help="IPv4 broadcast address or host address with netmask, or IPv6 "
+    "multicast address with interface scope, e.g. ff02::1%eth0.",
 )
 @click.option("--port", "--p", default=9, show_default=True, help="Target port.")
+@click.option(
+    "--from-file",
+    "--f",
+    "file",
+    type=click.File("r"),
+    help="Read 'MAC[,IP[,PORT[,PASSWORD]]]' target lines from file, or '-' for "
+    "stdin.",
+)
+@click.option(
+    "--password",
+    "--pw",
+    help="SecureOn password, e.g. 01:02:03:04:05:06 or 192.168.1.1.",
+)
+@click.option("--group", "--g", help="Wake all hosts of a group in the host registry.")
+@click.option(
+    "--name", "--n", "names", multiple=True, help="Wake a host in the host registry."
+)
+@_registry_option
 @click.option("--verbose", "--v", is_flag=True)
-def cli(mac_address, ip_address, port, verbose):
-    """CLI for the Pywol package.
+def wake_command(
+    mac_address, ip_address, port, file, password, group, names, registry, verbose
+):
+    """Wake hosts by MAC address, from a file or from the host registry.
 
     Prefer to specify the IPv4 broadcast address of the target host's
     subnet over the default '255.255.255.255'.
@@ -35,12 +199,230 @@ def cli(mac_address, ip_address, port, verbose):
     specify the target host's IPv4 address along with its netmask. E.g.
     '192.168.1.5/24' or '192.168.1.5/255.255.255.0' --> '192.168.1.255'
 
+    To wake many hosts at once, pass a file of 'MAC[,IP[,PORT[,PASSWORD]]]'
+    lines with --from-file. Omitted fields default to --ip, --port and
+    --password.
+
+    To wake hosts stored with 'pywol hosts add', select them with
+    --group or one or more --name options. Their stored passwords are
+    used.
+
     """
 
-    dest = wake(mac_address, ip_address=ip_address, port=port, return_dest=True)
+    selected = bool(names) or group is not None
+    if [mac_address is not None, file is not None, selected].count(True) != 1:
+        raise click.UsageError(
+            "Specify either MAC_ADDRESS, --from-file or --group/--name."
+        )
+    if selected and password is not None:
+        raise click.UsageError(
+            "--password cannot be used with --group/--name, "
+            "as registry hosts are woken with their stored passwords."
+        )
+    if file is not None:
+        _wake_from_file(file, ip_address, port, password, verbose)
+        return
+    if selected:
+        _wake_from_registry(registry, names, group, verbose)
+        return
+    dest = wake(
+        mac_address,
+        ip_address=ip_address,
+        port=port,
+        return_dest=True,
+        password=password,
+    )
     if verbose and dest:
         click.echo(f"Sent magic packet for '{mac_address}' to {dest[0]}:{dest[1]}.")
 
 
+@cli.command()
+@click.option(
+    "--socket",
+    "path",
+    type=click.Path(dir_okay=False),
+    help="Unix socket path. [default: $PYWOL_SOCKET or a per-user temp file]",
+)
+@click.option(
+    "--window",
+    default=0.0,
+    show_default=True,
+    help="Milliseconds to wait for more requests before sending a batch.",
+)
+def serve(path, window):
+    """Run a daemon serving batched wake requests.
+
+    Requests are lines of JSON, e.g. {"targets": ["1A2B3C4D5E6F"]},
+    sent over a Unix socket. See pywol.daemon.WakeClient.
+
+    """
+
+    from .daemon import default_socket_path, serve as run
+
+    path = default_socket_path() if path is None else path
+    click.echo(f"Listening on {path}.")
+    run(path, window=window / 1000)
+
+
+@cli.command()
+@click.option(
+    "--host", default="0.0.0.0", show_default=True, help="Address to listen on."
+)
+@click.option("--port", "--p", default=9009, show_default=True, help="TCP & UDP port.")
+@click.option(
+    "--key-file",
+    type=click.File("rb"),
+    help="File holding the key shared with the controller. "
+    "[default: $PYWOL_RELAY_KEY]",
+)
+@click.option(
+    "--window",
+    default=0.0,
+    show_default=True,
+    help="Milliseconds to wait for more requests before sending a batch.",
+)
+def relay(host, port, key_file, window):
+    """Run a relay re-broadcasting authenticated wake requests locally.
+
+    Run one relay per routed subnet, and send it batches of targets
+    from a controller with pywol.relay.RelayClient, over TCP or UDP.
+
+    """
+
+    import os
+
+    from .relay import serve as run
+
+    key = key_file.read().strip() if key_file else os.environ.get("PYWOL_RELAY_KEY")
+    if not key:
+        raise click.UsageError("Specify --key-file or set $PYWOL_RELAY_KEY.")
+    run(
+        key,
+        host,
+        port,
+        window=window / 1000,
+        ready=lambda server: click.echo(
+            f"Listening on {server.host}:{server.port} (TCP & UDP)."
+        ),
+    )
+
+
+@cli.command()
+@click.argument("plan", type=click.File("r"))
+@_registry_option
+@click.option("--verbose", "--v", is_flag=True)
+def schedule(plan, registry, verbose):
+    """Run the wake plan in JSON file PLAN, waking hosts in timed waves.
+
+    \b
+    Example plan, waking lab hosts from 06:00 in waves of 500:
+    {"waves": [{"at": "06:00", "group": "lab", "wave_size": 500,
+                "interval": 30, "jitter": 5}]}
+
+    """
+
+    import json
+
+    from .schedule import WakeScheduler, load_plan
+
+    with WakeScheduler() as scheduler:
+        try:
+            plan_data = json.load(plan)
+            if _uses_groups(plan_data):
+                from .registry import HostRegistry
+
+                with HostRegistry(registry) as host_registry:
+                    waves = load_plan(scheduler, plan_data, host_registry)
+            else:
+                waves = load_plan(scheduler, plan_data)
+        except (ValueError, TypeError) as e:
+            click.echo(e)
+            raise click.exceptions.Exit(1)
+        click.echo(f"Scheduled {len(waves)} wave(s).")
+        scheduler.run(lambda wave, results: _report_wave(wave, results, verbose))
+
+
+@cli.group()
+def hosts():
+    """Manage the host registry."""
+
+
+@hosts.command("add")
+@click.argument("name")
+@click.argument("mac_address")
+@click.option(
+    "--ip_address",
+    "--ip",
+    default="255.255.255.255",
+    show_default=True,
+    help="IPv4 broadcast address or host address with netmask.",
+)
+@click.option("--port", "--p", default=9, show_default=True, help="Target port.")
+@click.option("--group", "--g", help="Group name.")
+@click.option(
+    "--interface", "--i", help="Local interface facing the host, for reference."
+)
+@click.option("--password", "--pw", help="SecureOn password.")
+@_registry_option
+def hosts_add(
+    name, mac_address, ip_address, port, group, interface, password, registry
+):
+    """Add or replace host NAME with MAC_ADDRESS."""
+
+    from .registry import HostRegistry
+
+    with HostRegistry(registry) as host_registry:
+        try:
+            host = host_registry.add(
+                name,
+                mac_address,
+                ip_address=ip_address,
+                port=port,
+                group=group,
+                interface=interface,
+                password=password,
+            )
+        except (ValueError, TypeError) as e:
+            click.echo(e)
+            raise click.exceptions.Exit(1)
+    click.echo(f"Added '{host.name}' ({host.mac_address}).")
+
+
+@hosts.command("remove")
+@click.argument("name")
+@_registry_option
+def hosts_remove(name, registry):
+    """Remove host NAME."""
+
+    from .registry import HostRegistry
+
+    with HostRegistry(registry) as host_registry:
+        if not host_registry.remove(name):
+            click.echo(f"[Error] Unknown host: {name}")
+            raise click.exceptions.Exit(1)
+    click.echo(f"Removed '{name}'.")
+
+
+@hosts.command("list")
+@click.option("--group", "--g", help="Only list hosts of this group.")
+@click.option("--subnet", help="Only list hosts of this subnet.")
+@_registry_option
+def hosts_list(group, subnet, registry):
+    """List registered hosts."""
+
+    from .registry import HostRegistry
+
+    with HostRegistry(registry) as host_registry:
+        try:
+            for host in host_registry.find(group=group, subnet=subnet):
+                click.echo(
+                    f"{host.name}\t{host.mac_address}\t{host.ip_address}:{host.port}"
+                    f"\t{host.group or '-'}\t{host.subnet or '-'}"
+                )
+        except ValueError as e:
+            click.echo(e)
+            raise click.exceptions.Exit(1)
+
+
 if __name__ == "__main__":
     cli()
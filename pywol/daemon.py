@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+"""
+pywol.daemon
+------------
+This module implements a long-running wake daemon serving batched wake
+requests over a Unix socket, and a client for it.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import asyncio
+import json
+import os
+import signal
+import socket
+import stat
+import tempfile
+from time import perf_counter
+
+from .metrics import STAGES, _notify_outcome, _notify_stages, _observers
+from .transmit import MAX_BATCH_SIZE
+from .wol import (
+    WakeResult,
+    _evaluate_ip_address,
+    _send_packets,
+    _prepare_target,
+    _SocketPool,
+)
+
+WINDOW = 0.0
+MAX_MESSAGE_SIZE = 2**20
+CHUNK_SIZE = 4096
+
+
+def default_socket_path():
+    """Return the daemon socket path from $PYWOL_SOCKET or a per-user default."""
+
+    path = os.environ.get("PYWOL_SOCKET")
+    if path is None:
+        path = os.path.join(tempfile.gettempdir(), f"pywol-{os.getuid()}.sock")
+    return path
+
+
+def _encode_results(results):
+    return {"results": [list(result) for result in results]}
+
+
+def _decode_result(item):
+    target, dest, error = item
+    if isinstance(target, list):
+        target = tuple(target)
+    return WakeResult(target, None if dest is None else tuple(dest), error)
+
+
+class WakeServer:
+    """Daemon answering wake requests over a Unix stream socket.
+
+    The daemon keeps its broadcast sockets, opened up front for IPv4 and
+    on first use for each IPv6 scope, and the shared packet cache warm
+    for its whole lifetime. Targets of all requests arriving within
+    `window` seconds of each other are coalesced into a single batched
+    send, so many small requests cost about as much as one large one.
+    The default window of 0 still coalesces every request read in the
+    same event loop iteration without delaying any of them.
+
+    Requests and responses are single lines of JSON. A request is an
+    object with a "targets" list, each target a MAC address string or a
+    [mac_address, ip_address, port] list with optional trailing fields,
+    and optional "ip_address" & "port" defaults. The response holds a
+    "results" list of [target, dest, error] entries in request order, or
+    an "error" message if the request could not be parsed. Lines are
+    limited to MAX_MESSAGE_SIZE bytes, and no target of a rejected
+    request is sent.
+
+    Use as an async context manager.
+
+    Parameters
+    ----------
+    path : str, optional
+        Socket path. A stale socket file is replaced.
+        (default is `default_socket_path()`).
+    window : float, optional
+        Seconds to wait for more requests before sending. (default is
+        WINDOW).
+    batch_size : int, optional
+        Pending packet count that triggers a send before the window
+        closes. (default is MAX_BATCH_SIZE).
+    resolver : BroadcastResolver, optional
+        Resolver used to map target IP addresses to broadcast addresses.
+
+    """
+
+    def __init__(
+        self, path=None, *, window=WINDOW, batch_size=MAX_BATCH_SIZE, resolver=None
+    ):
+        self.path = default_socket_path() if path is None else path
+        self.window = window
+        self.batch_size = batch_size
+        self._resolve = _evaluate_ip_address if resolver is None else resolver.resolve
+        self._pool = _SocketPool()
+        self._senders = {}
+        self._server = None
+        self._pending = []
+        self._timer = None
+
+    async def start(self):
+        """Open the IPv4 broadcast socket and start listening."""
+
+        try:
+            if stat.S_ISSOCK(os.stat(self.path).st_mode):
+                os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        self._pool.get()
+        self._server = await asyncio.start_unix_server(
+            self._handle, self.path, limit=MAX_MESSAGE_SIZE
+        )
+        return self
+
+    def close(self):
+        """Stop listening, send pending packets and close the sockets."""
+
+        if self._server is not None:
+            self._server.close()
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+        if self._pending:
+            self._flush()
+        self._pool.close()
+
+    async def wait_closed(self):
+        """Wait until the server is closed."""
+
+        if self._server is not None:
+            await self._server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+        await self.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # The line is over the stream limit, and its remainder
+                    # can't be told apart from the next request.
+                    response = {"error": "[Error] Request too large."}
+                    writer.write(json.dumps(response).encode() + b"\n")
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                writer.write(await self._respond(line) + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, line):
+        """Serve the request in `line` and return the encoded response."""
+
+        try:
+            results = await self._submit_request(json.loads(line.decode()))
+        except (ValueError, KeyError, TypeError, AttributeError):
+            response = {"error": "[Error] Invalid request."}
+        else:
+            response = _encode_results(results)
+        return json.dumps(response).encode()
+
+    async def _submit_request(self, request):
+        """Submit the targets of a decoded `request`."""
+
+        return await self.submit(
+            request["targets"],
+            ip_address=request.get("ip_address", "255.255.255.255"),
+            port=request.get("port", 9),
+        )
+
+    async def submit(self, targets, *, ip_address="255.255.255.255", port=9):
+        """Queue targets for the next batched send and wait for it.
+
+        Accepts the same arguments as `pywol.wake_many`, with targets
+        given as lists also accepted. Targets are only queued once all
+        of them were prepared, so none is sent if an error is raised.
+
+        Returns
+        -------
+        list(WakeResult)
+            One result per target, in input order.
+
+        """
+
+        loop = asyncio.get_event_loop()
+        results = []
+        sends = []
+        queued = []
+        timings = [0.0, 0.0, 0.0] if _observers else None
+        invalid = []
+        for target in targets:
+            if isinstance(target, list):
+                target = tuple(target)
+            try:
+                payload, valid_ip_address, valid_port = _prepare_target(
+                    target, ip_address, port, resolve=self._resolve, timings=timings
+                )
+            except (ValueError, TypeError) as e:
+                results.append(WakeResult(target, None, str(e)))
+                invalid.append(str(e))
+                continue
+            future = loop.create_future()
+            packet = (payload, (valid_ip_address, valid_port))
+            queued.append((packet, future))
+            sends.append((len(results), future))
+            results.append(
+                WakeResult(target, (valid_ip_address, str(valid_port)), None)
+            )
+        self._pending.extend(queued)
+        if timings is not None:
+            # The send stage and outcome are reported by `_flush`.
+            if sends:
+                _notify_stages(timings, len(sends), STAGES[:3])
+            if invalid:
+                _notify_outcome(0, invalid=invalid)
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._pending and self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        for index, future in sends:
+            if await future:
+                target, (valid_ip_address, _), _ = results[index]
+                error = (
+                    f"[Error] Cannot send broadcast to IP address: {valid_ip_address}"
+                )
+                results[index] = WakeResult(target, None, error)
+        return results
+
+    def _flush(self):
+        """Send all pending packets as one batch."""
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        observed = bool(_observers)
+        start = perf_counter() if observed else 0.0
+        failures = _send_packets(
+            self._senders,
+            self._pool,
+            [packet for packet, _ in pending],
+            self.batch_size,
+        )
+        if observed:
+            _notify_stages((perf_counter() - start,), len(pending), STAGES[3:])
+            _notify_outcome(len(pending) - len(failures), failures.values())
+        for index, (_, future) in enumerate(pending):
+            if not future.done():
+                future.set_result(index in failures)
+
+
+def serve(path=None, *, window=WINDOW, batch_size=MAX_BATCH_SIZE, resolver=None):
+    """Run a `WakeServer` until interrupted by SIGINT or SIGTERM.
+
+    Accepts the same arguments as `WakeServer`.
+
+    """
+
+    _run(WakeServer(path, window=window, batch_size=batch_size, resolver=resolver))
+
+
+def _run(server, ready=None):
+    """Run `server` on a new event loop until SIGINT or SIGTERM.
+
+    `ready` is called with the server once it's listening.
+
+    """
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(server.start())
+        if ready is not None:
+            ready(server)
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, loop.stop)
+        loop.run_forever()
+    finally:
+        server.close()
+        loop.run_until_complete(server.wait_closed())
+        loop.close()
+
+
+class WakeClient:
+    """Blocking client for a `WakeServer`.
+
+    Keeps one connection open across requests. Use as a context manager
+    to close it on exit.
+
+    Parameters
+    ----------
+    path : str, optional
+        Socket path of the daemon. (default is `default_socket_path()`).
+    timeout : float, optional
+        Seconds to wait for the daemon. (default is 5.0).
+    chunk_size : int, optional
+        Maximum number of targets per request. (default is CHUNK_SIZE).
+
+    """
+
+    def __init__(self, path=None, *, timeout=5.0, chunk_size=CHUNK_SIZE):
+        self.path = default_socket_path() if path is None else path
+        self.chunk_size = chunk_size
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._sock.settimeout(timeout)
+            self._sock.connect(self.path)
+        except OSError:
+            self._sock.close()
+            raise
+        self._reader = self._sock.makefile("rb")
+
+    def close(self):
+        """Close the connection."""
+
+        self._reader.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def wake_many(self, targets, *, ip_address="255.255.255.255", port=9):
+        """Have the daemon send WoL magic packets for many targets.
+
+        Accepts the same arguments as `pywol.wake_many`. Targets are
+        sent in requests of at most `chunk_size` targets.
+
+        Returns
+        -------
+        list(WakeResult)
+            One result per target, in input order. Tuple targets are
+            returned as tuples and dests as (ip_address, port) tuples.
+
+        Raises
+        ------
+        ValueError
+            If the daemon rejected a request.
+        OSError
+            If the daemon could not be reached.
+
+        """
+
+        targets = list(targets)
+        results = []
+        for start in range(0, len(targets), self.chunk_size):
+            stop = start + self.chunk_size
+            results.extend(self._request(targets[start:stop], ip_address, port))
+        return results
+
+    def _request(self, targets, ip_address, port):
+        request = {"targets": targets, "ip_address": ip_address, "port": port}
+        self._sock.sendall(json.dumps(request).encode() + b"\n")
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionResetError("[Error] Daemon closed the connection.")
+        response = json.loads(line.decode())
+        if "error" in response:
+            raise ValueError(response["error"])
+        return [_decode_result(item) for item in response["results"]]
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+pywol.entry
+-----------
+This module implements the startup-optimized `pywol` console script.
+
+A plain single-MAC wake, the common case for scripts calling `pywol` many
+times a minute, is parsed here without importing click. Everything else is
+handed to the full CLI in `pywol.cli`.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import sys
+
+from .mac import _split_mac
+from .wol import wake
+
+_OPTIONS = {
+    "--ip_address": "ip_address",
+    "--ip": "ip_address",
+    "--port": "port",
+    "--p": "port",
+}
+_FLAGS = frozenset(("--verbose", "--v"))
+
+
+def _parse_fast(args):
+    """Parse arguments of a plain single-MAC wake.
+
+    Parameters
+    ----------
+    args : list(str)
+        Command line arguments, without the program name.
+
+    Returns
+    -------
+    tuple(str, str, int, bool) or None
+        MAC address, IP address, port & verbose flag, or None if `args`
+        need the full CLI, including for help, other commands and
+        invalid MAC addresses or ports.
+
+    """
+
+    if args and args[0] == "wake":
+        args = args[1:]
+    mac_address = None
+    options = {"ip_address": "255.255.255.255", "port": "9"}
+    verbose = False
+    args = iter(args)
+    for arg in args:
+        if arg in _FLAGS:
+            verbose = True
+            continue
+        name, separator, value = arg.partition("=")
+        if name in _OPTIONS:
+            if not separator:
+                value = next(args, None)
+                if value is None:
+                    return None
+            options[_OPTIONS[name]] = value
+        elif arg.startswith("-") or mac_address is not None:
+            return None
+        else:
+            mac_address = arg
+    if mac_address is None:
+        return None
+    try:
+        _split_mac(mac_address)
+        port = int(options["port"])
+    except ValueError:
+        return None
+    return mac_address, options["ip_address"], port, verbose
+
+
+def main(argv=None):
+    """Run the `pywol` console script.
+
+    Parameters
+    ----------
+    argv : list(str), optional
+        Command line arguments, without the program name.
+        (default is sys.argv[1:]).
+
+    """
+
+    args = sys.argv[1:] if argv is None else list(argv)
+    parsed = _parse_fast(args)
+    if parsed is None:
+        from .cli import cli
+
+        return cli.main(args=args, prog_name="pywol")
+    mac_address, ip_address, port, verbose = parsed
+    dest = wake(mac_address, ip_address=ip_address, port=port, return_dest=True)
+    if verbose and dest:
+        print(f"Sent magic packet for '{mac_address}' to {dest[0]}:{dest[1]}.")
+
+
+if __name__ == "__main__":
+    main()
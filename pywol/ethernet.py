@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+pywol.ethernet
+--------------
+This module implements sending magic packets as raw Ethernet frames, for
+hosts reachable at layer 2 only.
+
+Frames carry the magic packet directly after the Ethernet header, with
+the Wake-on-LAN EtherType 0x0842, so no IP configuration or routing is
+involved. Raw sockets are Linux-only and need the CAP_NET_RAW capability.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import errno
+import socket
+from time import perf_counter
+
+from .metrics import STAGES, _notify_outcome, _notify_stages, _observers
+from .packet import PacketArena
+from .transmit import _AF_PACKET, MAX_BATCH_SIZE, BatchSender
+from .wol import (
+    WakeResult,
+    _chunked,
+    _clean_mac_address,
+    _clean_password,
+    _send_batch,
+    _unpack_target,
+)
+
+ETHERTYPE_WOL = 0x0842
+BROADCAST_MAC = "ff:ff:ff:ff:ff:ff"
+
+
+def _frame_header(source, destination=b"\xff" * 6):
+    """Return the 14-byte Ethernet header of WoL frames from `source`."""
+
+    return destination + source + ETHERTYPE_WOL.to_bytes(2, "big")
+
+
+def _open_packet_socket(interface):
+    """Open a raw packet socket bound to `interface`.
+
+    Raises
+    ------
+    OSError
+        If raw packet sockets are unavailable on this platform, the
+        caller lacks privileges or `interface` does not exist.
+
+    """
+
+    if _AF_PACKET is None:
+        raise OSError(
+            errno.EAFNOSUPPORT,
+            "[Error] Raw Ethernet frames require AF_PACKET sockets (Linux).",
+        )
+    sock = socket.socket(_AF_PACKET, socket.SOCK_RAW, socket.htons(ETHERTYPE_WOL))
+    try:
+        sock.bind((interface, ETHERTYPE_WOL))
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class EthernetSender:
+    """Send magic packets as broadcast Ethernet frames on one interface.
+
+    The frame header, with the interface's hardware address as source,
+    is written once into every slot of the sender's `PacketArena`, so
+    building a frame only writes the MAC address repetitions. Frames are
+    handed to the kernel in batches with a `BatchSender`.
+
+    Use as a context manager to close the socket on exit.
+
+    Parameters
+    ----------
+    interface : str
+        Name of the network interface to send on, e.g. 'eth0'.
+    batch_size : int, optional
+        Maximum number of frames per batch. (default is MAX_BATCH_SIZE).
+
+    Raises
+    ------
+    OSError
+        If the raw socket cannot be opened or bound to `interface`.
+
+    """
+
+    def __init__(self, interface, *, batch_size=MAX_BATCH_SIZE):
+        self.interface = interface
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        sock = _open_packet_socket(interface)
+        self.source = sock.getsockname()[4]
+        self.arena = PacketArena(self.batch_size, header=_frame_header(self.source))
+        self.sender = BatchSender(sock, self.batch_size, arena=self.arena)
+
+    def close(self):
+        """Close the raw socket."""
+
+        self.sender.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def wake_many(self, targets, *, pacer=None, password=None):
+        """Send a magic packet frame for each of many targets.
+
+        Parameters
+        ----------
+        targets : iterable
+            Targets as accepted by `pywol.wake_many`. IP addresses and
+            ports of tuple entries are ignored.
+        pacer : pywol.pacing.TokenBucket, optional
+            Bucket to rate-limit frames with. (default is None).
+        password : str or bytes, optional
+            SecureOn password for targets that don't specify one.
+
+        Returns
+        -------
+        list(WakeResult)
+            One result per target, in input order, with a destination of
+            (interface, BROADCAST_MAC) for sent frames.
+
+        """
+
+        results = []
+        for chunk in _chunked(targets, self.batch_size):
+            results.extend(self._wake_chunk(chunk, pacer, password))
+        return results
+
+    def _wake_chunk(self, chunk, pacer, password):
+        results = [None] * len(chunk)
+        frames = []
+        indices = []
+        invalid = []
+        pack = self.arena.pack
+        for index, target in enumerate(chunk):
+            try:
+                mac, _, _, entry_password = _unpack_target(target, None, None, password)
+                mac_address = bytes.fromhex(_clean_mac_address(mac))
+                secure_on = bytes.fromhex(_clean_password(entry_password))
+            except (ValueError, TypeError) as e:
+                results[index] = WakeResult(target, None, str(e))
+                invalid.append(str(e))
+                continue
+            frames.append((pack(len(frames), mac_address, secure_on), None))
+            indices.append(index)
+
+        observed = bool(_observers)
+        start = perf_counter() if observed else 0.0
+        failures = _send_batch(self.sender, frames, pacer) if frames else {}
+        if observed:
+            if frames:
+                _notify_stages((perf_counter() - start,), len(frames), STAGES[3:])
+            _notify_outcome(len(frames) - len(failures), failures.values(), invalid)
+        dest = (self.interface, BROADCAST_MAC)
+        error = f"[Error] Cannot send frame on interface: {self.interface}"
+        for frame_index, index in enumerate(indices):
+            if frame_index in failures:
+                results[index] = WakeResult(chunk[index], None, error)
+            else:
+                results[index] = WakeResult(chunk[index], dest, None)
+        return results
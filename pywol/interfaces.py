@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+pywol.interfaces
+----------------
+This module implements sending magic packets from several local network
+interfaces in parallel.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import ipaddress
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from .metrics import _notify_outcome, _notify_stages, _observers
+from .resolver import PrefixIndex, _ip_to_int
+from .transmit import MAX_BATCH_SIZE, BatchSender
+from .wol import (
+    WakeResult,
+    _chunked,
+    _evaluate_ip_address,
+    _open_broadcast_socket,
+    _send_packets,
+    _prepare_target,
+    _SocketPool,
+)
+
+LIMITED_BROADCAST = "255.255.255.255"
+
+# Not exposed by the socket module on all Python versions.
+SO_BINDTODEVICE = getattr(socket, "SO_BINDTODEVICE", 25)
+
+
+class _Interface:
+    """Local source address with its own bound broadcast socket."""
+
+    __slots__ = ("address", "network", "device", "sender")
+
+    def __init__(self, address, network, device, sender):
+        self.address = address
+        self.network = network
+        self.device = device
+        self.sender = sender
+
+
+class InterfaceSender:
+    """Send magic packets on the local interface facing each target.
+
+    One broadcast socket is bound per interface source address. Each
+    packet goes out on the interface whose subnet contains its
+    destination address, found with a longest-prefix lookup, and packets
+    to the limited broadcast address '255.255.255.255' go out on every
+    interface. Destinations outside all interface subnets, including
+    IPv6 destinations, are sent from unbound sockets, like `pywol.wake`
+    does. The interfaces of a batch
+    are sent in parallel from a thread pool.
+
+    Use as a context manager to close all sockets on exit.
+
+    Parameters
+    ----------
+    interfaces : iterable
+        Interface addresses with prefix, e.g. '10.1.0.5/24', or
+        (address, device) tuples such as ('10.1.0.5/24', 'eth1') to also
+        bind the socket to the named device, which requires privileges.
+    batch_size : int, optional
+        Maximum number of targets handled per batch.
+        (default is MAX_BATCH_SIZE).
+
+    Raises
+    ------
+    ValueError
+        If an interface address is invalid.
+
+    """
+
+    def __init__(self, interfaces, *, batch_size=MAX_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.interfaces = []
+        self._index = PrefixIndex()
+        self._pool = _SocketPool()
+        self._default_senders = {}
+        try:
+            for spec in interfaces:
+                self._add_interface(spec)
+        except Exception:
+            self.close()
+            raise
+        self._executor = ThreadPoolExecutor(max(len(self.interfaces), 1) + 1)
+
+    def _add_interface(self, spec):
+        address, device = (spec, None) if isinstance(spec, str) else spec
+        try:
+            interface = ipaddress.IPv4Interface(address.strip())
+        except Exception as e:
+            raise ValueError(f"[Error] Invalid interface address: {address}") from e
+        sock = _open_broadcast_socket()
+        try:
+            if device is not None:
+                sock.setsockopt(socket.SOL_SOCKET, SO_BINDTODEVICE, device.encode())
+            sock.bind((str(interface.ip), 0))
+        except OSError:
+            sock.close()
+            raise
+        self._index.insert(interface.network, len(self.interfaces))
+        self.interfaces.append(
+            _Interface(
+                str(interface.ip),
+                str(interface.network),
+                device,
+                BatchSender(sock, self.batch_size),
+            )
+        )
+
+    def close(self):
+        """Close all interface sockets and stop the thread pool."""
+
+        executor = getattr(self, "_executor", None)
+        if executor is not None:
+            executor.shutdown()
+        for interface in self.interfaces:
+            interface.sender.sock.close()
+        self._pool.close()
+        self._default_senders.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def route(self, ip_address):
+        """Return the interfaces a packet to `ip_address` is sent from.
+
+        Parameters
+        ----------
+        ip_address : str
+            Valid dotted-quad IPv4 destination address.
+
+        Returns
+        -------
+        list(int)
+            Indices into `interfaces`. An empty list stands for the
+            unbound default socket.
+
+        """
+
+        if ip_address == LIMITED_BROADCAST:
+            return list(range(len(self.interfaces)))
+        if ":" in ip_address:
+            return []
+        index = self._index.lookup(_ip_to_int(ip_address))
+        return [] if index is None else [index]
+
+    def wake_many(
+        self,
+        targets,
+        *,
+        ip_address=LIMITED_BROADCAST,
+        port=9,
+        resolver=None,
+        password=None,
+    ):
+        """Generate and send WoL magic packets for many targets.
+
+        Accepts the same arguments as `pywol.wake_many`, except for
+        `cache`, `pacer` and `retransmit`. A target sent on several
+        interfaces succeeds if any of its sends succeeded.
+
+        Returns
+        -------
+        list(WakeResult)
+            One result per target, in input order.
+
+        """
+
+        resolve = _evaluate_ip_address if resolver is None else resolver.resolve
+        results = []
+        for chunk in _chunked(targets, self.batch_size):
+            results.extend(self._wake_chunk(chunk, ip_address, port, resolve, password))
+        return results
+
+    def _wake_chunk(self, chunk, ip_address, port, resolve, password):
+        results = [None] * len(chunk)
+        groups = {}
+        pending = {}
+        observed = bool(_observers)
+        timings = [0.0, 0.0, 0.0, 0.0] if observed else None
+        invalid = []
+        for index, target in enumerate(chunk):
+            try:
+                payload, valid_ip_address, valid_port = _prepare_target(
+                    target, ip_address, port, password, resolve, timings
+                )
+            except (ValueError, TypeError) as e:
+                results[index] = WakeResult(target, None, str(e))
+                invalid.append(str(e))
+                continue
+            packet = (payload, (valid_ip_address, valid_port))
+            routes = self.route(valid_ip_address) or [None]
+            pending[index] = (valid_ip_address, valid_port, len(routes))
+            for route in routes:
+                packets, indices = groups.setdefault(route, ([], []))
+                packets.append(packet)
+                indices.append(index)
+
+        start = perf_counter() if observed else 0.0
+        futures = []
+        for route, (packets, indices) in groups.items():
+            if route is None:
+                future = self._executor.submit(
+                    _send_packets,
+                    self._default_senders,
+                    self._pool,
+                    packets,
+                    self.batch_size,
+                )
+            else:
+                future = self._executor.submit(
+                    self.interfaces[route].sender.send, packets
+                )
+            futures.append((future, indices))
+
+        failed = {}
+        errors = []
+        for future, indices in futures:
+            failures = future.result()
+            errors.extend(failures.values())
+            for packet_index in failures:
+                index = indices[packet_index]
+                failed[index] = failed.get(index, 0) + 1
+        if observed:
+            timings[3] = perf_counter() - start
+            if pending:
+                _notify_stages(timings, len(pending))
+            sends = sum(len(packets) for packets, _ in groups.values())
+            _notify_outcome(sends - len(errors), errors, invalid)
+
+        for index, (valid_ip_address, valid_port, sends) in pending.items():
+            if failed.get(index, 0) == sends:
+                error = (
+                    f"[Error] Cannot send broadcast to IP address: {valid_ip_address}"
+                )
+                results[index] = WakeResult(chunk[index], None, error)
+            else:
+                dest = (valid_ip_address, str(valid_port))
+                results[index] = WakeResult(chunk[index], dest, None)
+        return results
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+pywol.mac
+---------
+This module implements fast parsing of MAC address strings.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+
+
+def _split_mac(mac_address):
+    """Return the hex digits and binary form of `mac_address`.
+
+    Common notations are handled with a single `str.replace` call:
+    'AA:BB:CC:DD:EE:FF', 'AA-BB-CC-DD-EE-FF', 'AABB.CCDD.EEFF' and
+    'AABBCCDDEEFF'. Anything else falls back to dropping every
+    non-hexadecimal character.
+
+    Parameters
+    ----------
+    mac_address : str
+        Supplied MAC address.
+
+    Returns
+    -------
+    tuple(str, bytes)
+        12-digit hexadecimal MAC address without separators, and the
+        6-byte binary MAC address.
+
+    Raises
+    ------
+    ValueError
+        If `mac_address` does not contain exactly 12 hexadecimal
+        characters.
+
+    """
+
+    length = len(mac_address)
+    digits = None
+    if length == 17:
+        separator = mac_address[2]
+        if separator not in _HEX_DIGITS and mac_address[2::3] == separator * 5:
+            digits = mac_address.replace(separator, "")
+    elif length == 14:
+        if mac_address[4] == mac_address[9] == ".":
+            digits = mac_address.replace(".", "")
+    elif length == 12:
+        digits = mac_address
+    if digits is not None:
+        try:
+            packed = bytes.fromhex(digits)
+        except ValueError:
+            pass
+        else:
+            # fromhex() skips whitespace, which shortens the result.
+            if len(packed) == 6:
+                return digits, packed
+
+    digits = "".join([char for char in mac_address if char in _HEX_DIGITS])
+    if len(digits) == 12:
+        return digits, bytes.fromhex(digits)
+    raise ValueError(f"[Error] Invalid MAC address: {mac_address}")
+
+
+def parse_mac(mac_address):
+    """Parse a MAC address string.
+
+    Parameters
+    ----------
+    mac_address : str
+        MAC address in any notation with exactly 12 hexadecimal
+        characters, e.g. '1A:2B:3C:4D:5E:6F' or '1a2b.3c4d.5e6f'.
+
+    Returns
+    -------
+    bytes
+        6-byte binary MAC address.
+
+    Raises
+    ------
+    ValueError
+        If `mac_address` does not contain exactly 12 hexadecimal
+        characters.
+
+    """
+
+    return _split_mac(mac_address)[1]
+
+
+class MacAddress:
+    """Parsed MAC address.
+
+    Stores the 6-byte binary form only, so collections of millions of
+    addresses stay compact and later stages never re-parse strings.
+
+    Parameters
+    ----------
+    mac_address : str, bytes, int or MacAddress
+        MAC address string in any notation accepted by `parse_mac`,
+        6-byte binary MAC address or 48-bit integer.
+
+    Raises
+    ------
+    ValueError
+        If `mac_address` is not a valid MAC address.
+    TypeError
+        If `mac_address` is of an unsupported type.
+
+    """
+
+    __slots__ = ("packed",)
+
+    def __init__(self, mac_address):
+        if isinstance(mac_address, str):
+            packed = parse_mac(mac_address)
+        elif isinstance(mac_address, MacAddress):
+            packed = mac_address.packed
+        elif isinstance(mac_address, (bytes, bytearray)):
+            if len(mac_address) != 6:
+                raise ValueError(f"[Error] Invalid MAC address: {mac_address!r}")
+            packed = bytes(mac_address)
+        elif isinstance(mac_address, int) and not isinstance(mac_address, bool):
+            if not 0 <= mac_address < 1 << 48:
+                raise ValueError(f"[Error] Invalid MAC address: {mac_address}")
+            packed = mac_address.to_bytes(6, "big")
+        else:
+            raise TypeError(f"[Error] Invalid MAC address type: {mac_address!r}")
+        self.packed = packed
+
+    @property
+    def hex(self):
+        """str: 12-digit upper case hexadecimal MAC address."""
+
+        return self.packed.hex().upper()
+
+    def __int__(self):
+        return int.from_bytes(self.packed, "big")
+
+    def __str__(self):
+        return ":".join(format(byte, "02X") for byte in self.packed)
+
+    def __repr__(self):
+        return f"MacAddress('{self}')"
+
+    def __eq__(self, other):
+        if isinstance(other, MacAddress):
+            return self.packed == other.packed
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.packed)
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+pywol.metrics
+-------------
+This module implements instrumentation hooks for magic packet sends and a
+metrics collector with a Prometheus text exporter.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import errno
+import threading
+
+STAGES = ("parse", "resolve", "build", "send")
+
+# Shared with the sending modules, which check it before doing any timing.
+_observers = []
+
+
+class Observer:
+    """Base class for wake observers.
+
+    Subclass and override the hooks of interest, then register an
+    instance with `add_observer`. Hooks are called synchronously from
+    the sending thread, so they should return quickly.
+
+    """
+
+    def stage(self, name, seconds, count):
+        """Called with the time spent in a stage.
+
+        Parameters
+        ----------
+        name : str
+            One of STAGES: 'parse' (MAC address cleaning), 'resolve'
+            (IP address & port evaluation), 'build' (magic packet lookup
+            or construction) or 'send', which includes waiting on a pacer
+            in bulk sends.
+        seconds : float
+            Time spent in the stage.
+        count : int
+            Number of targets the time was spent on.
+
+        """
+
+    def sent(self, count):
+        """Called with the number of packets sent."""
+
+    def failed(self, errno):
+        """Called for each packet that could not be sent, with its errno."""
+
+    def invalid(self, error):
+        """Called for each rejected target, with its error message."""
+
+
+def add_observer(observer):
+    """Register `observer` to be notified of all wakes."""
+
+    _observers.append(observer)
+
+
+def remove_observer(observer):
+    """Unregister `observer`."""
+
+    _observers.remove(observer)
+
+
+def _notify_stages(timings, count, stages=STAGES):
+    """Report the `timings` of `count` targets, one for each of `stages`."""
+
+    for observer in _observers:
+        for name, seconds in zip(stages, timings):
+            observer.stage(name, seconds, count)
+
+
+def _notify_outcome(sent, errors=(), invalid=()):
+    """Report sent packets, send `errors` and `invalid` target messages."""
+
+    for observer in _observers:
+        if sent:
+            observer.sent(sent)
+        for error in errors:
+            observer.failed(error.errno)
+        for message in invalid:
+            observer.invalid(message)
+
+
+class MetricsCollector(Observer):
+    """Observer aggregating counters and stage timings.
+
+    Thread-safe, so one collector can be shared by all senders.
+
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Reset all counters and timings to zero."""
+
+        with self._lock:
+            self.packets_sent = 0
+            self.packets_failed = 0
+            self.targets_invalid = 0
+            self.send_errors = {}
+            self.stage_seconds = dict.fromkeys(STAGES, 0.0)
+            self.stage_count = dict.fromkeys(STAGES, 0)
+
+    def stage(self, name, seconds, count):
+        with self._lock:
+            self.stage_seconds[name] += seconds
+            self.stage_count[name] += count
+
+    def sent(self, count):
+        with self._lock:
+            self.packets_sent += count
+
+    def failed(self, errno):
+        with self._lock:
+            self.packets_failed += 1
+            self.send_errors[errno] = self.send_errors.get(errno, 0) + 1
+
+    def invalid(self, error):
+        with self._lock:
+            self.targets_invalid += 1
+
+    def render_prometheus(self):
+        """Return all metrics in the Prometheus text exposition format."""
+
+        with self._lock:
+            lines = [
+                "# HELP pywol_packets_sent_total Magic packets sent.",
+                "# TYPE pywol_packets_sent_total counter",
+                f"pywol_packets_sent_total {self.packets_sent}",
+                "# HELP pywol_packets_failed_total Magic packets that failed to send.",
+                "# TYPE pywol_packets_failed_total counter",
+                f"pywol_packets_failed_total {self.packets_failed}",
+                "# HELP pywol_targets_invalid_total Targets rejected as invalid.",
+                "# TYPE pywol_targets_invalid_total counter",
+                f"pywol_targets_invalid_total {self.targets_invalid}",
+                "# HELP pywol_send_errors_total Send errors by errno.",
+                "# TYPE pywol_send_errors_total counter",
+            ]
+            for number, count in sorted(
+                self.send_errors.items(), key=lambda item: item[0] or 0
+            ):
+                name = errno.errorcode.get(number, str(number))
+                lines.append(f'pywol_send_errors_total{{errno="{name}"}} {count}')
+            lines += [
+                "# HELP pywol_stage_seconds Time spent per wake stage.",
+                "# TYPE pywol_stage_seconds summary",
+            ]
+            for name in STAGES:
+                lines.append(
+                    f'pywol_stage_seconds_sum{{stage="{name}"}} '
+                    f"{self.stage_seconds[name]!r}"
+                )
+                lines.append(
+                    f'pywol_stage_seconds_count{{stage="{name}"}} '
+                    f"{self.stage_count[name]}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+def start_exporter(collector, port=9910, address="127.0.0.1"):
+    """Serve `collector` metrics over HTTP from a background thread.
+
+    Every GET request is answered with `collector.render_prometheus()`.
+
+    Parameters
+    ----------
+    collector : MetricsCollector
+        Collector to export.
+    port : int, optional
+        Port to listen on, 0 for any free port. (default is 9910).
+    address : str, optional
+        Address to listen on. (default is '127.0.0.1').
+
+    Returns
+    -------
+    http.server.HTTPServer
+        The running server. Call its `shutdown` method to stop it.
+
+    """
+
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = collector.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = HTTPServer((address, port), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
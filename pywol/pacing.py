@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+pywol.pacing
+------------
+This module implements a token bucket for pacing magic packet sends.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """Token bucket limiting the rate of sent packets.
+
+    Tokens refill continuously at `rate` per second up to `burst`, and
+    each packet costs one token. Taking more tokens than are available
+    reserves them in advance and returns how long the caller must wait,
+    so concurrent callers are served in order at an even pace.
+
+    Parameters
+    ----------
+    rate : float
+        Sustained rate in packets per second.
+    burst : int, optional
+        Maximum number of packets sent back-to-back, which is also the
+        largest batch bulk senders hand to the kernel at once.
+        (default is one tenth of a second's worth of packets, at least 1).
+    clock : callable, optional
+        Monotonic time source in seconds. (default is time.monotonic).
+
+    Raises
+    ------
+    ValueError
+        If `rate` or `burst` is not positive.
+
+    """
+
+    def __init__(self, rate, burst=None, *, clock=time.monotonic):
+        if not rate > 0:
+            raise ValueError(f"[Error] Invalid rate: {rate}")
+        if burst is None:
+            burst = max(int(rate / 10), 1)
+        if not burst >= 1:
+            raise ValueError(f"[Error] Invalid burst size: {burst}")
+        self.rate = rate
+        self.burst = int(burst)
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """Take `tokens` and return the time to wait before using them.
+
+        Parameters
+        ----------
+        tokens : int, optional
+            Number of packets about to be sent. (default is 1).
+
+        Returns
+        -------
+        float
+            Seconds to wait before sending.
+
+        """
+
+        with self._lock:
+            now = self._clock()
+            elapsed = now - self._updated
+            self._updated = now
+            self._tokens = min(self._tokens + elapsed * self.rate, self.burst)
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` packets may be sent."""
+
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens=1):
+        """Wait without blocking the event loop until `tokens` may be sent."""
+
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+pywol.packet
+------------
+This module implements in-place construction of magic packets in a
+reusable buffer.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+PACKET_SIZE = 102  # Six FF bytes followed by sixteen repetitions of the MAC.
+MAX_PASSWORD_SIZE = 6  # SecureOn passwords are 4 or 6 bytes.
+SLOT_SIZE = 128  # Arena bytes per packet, leaving room for a SecureOn password.
+
+_SYNC_STREAM = b"\xff" * 6
+
+
+class PacketArena:
+    """Preallocated buffer holding a fixed number of magic packets.
+
+    Each packet occupies a fixed-size slot of one `bytearray`. Slot
+    headers are filled in once, and packing a slot only writes the MAC
+    address repetitions and any SecureOn password, so building packets
+    for many targets allocates no per-packet bytes objects. Packed
+    packets are returned as memoryview slices, which can be passed to
+    `socket.sendto` or a `pywol.transmit.BatchSender` as is.
+
+    Parameters
+    ----------
+    capacity : int
+        Number of packet slots.
+    slot_size : int, optional
+        Bytes per slot. (default is SLOT_SIZE).
+    header : bytes, optional
+        Fixed bytes written once in front of every packet, such as an
+        Ethernet frame header. Packed packets include it.
+        (default is no header).
+
+    Raises
+    ------
+    ValueError
+        If `header` and a packet with a password don't fit in
+        `slot_size` bytes.
+
+    """
+
+    def __init__(self, capacity, slot_size=SLOT_SIZE, header=b""):
+        if len(header) + PACKET_SIZE + MAX_PASSWORD_SIZE > slot_size:
+            raise ValueError(f"[Error] Packet header too large: {len(header)} bytes")
+        self.capacity = capacity
+        self.slot_size = slot_size
+        self.header = header
+        self.buffer = bytearray(capacity * slot_size)
+        view = memoryview(self.buffer)
+        sync_start = len(header)
+        mac_start = sync_start + 6
+        self._packet_end = packet_end = sync_start + PACKET_SIZE
+        self._slots = []
+        self._bodies = []
+        self._packets = []
+        for offset in range(0, len(self.buffer), slot_size):
+            end = offset + slot_size
+            slot = view[offset:end]
+            slot[:sync_start] = header
+            slot[sync_start:mac_start] = _SYNC_STREAM
+            self._slots.append(slot)
+            self._bodies.append(slot[mac_start:packet_end])
+            self._packets.append(slot[:packet_end])
+        # Packet views by password length, built on first use. The view
+        # last packed in a slot is kept in _packets for `is_packet`.
+        self._views = {0: list(self._packets)}
+        self._passwords = False
+
+    def __len__(self):
+        return self.capacity
+
+    def pack(self, index, mac_address, password=b""):
+        """Build the magic packet for `mac_address` in slot `index`.
+
+        Parameters
+        ----------
+        index : int
+            Slot to build the packet in.
+        mac_address : bytes
+            6-byte binary MAC address.
+        password : bytes, optional
+            4- or 6-byte SecureOn password. (default is no password).
+
+        Returns
+        -------
+        memoryview
+            102-byte magic packet, or 106 or 108 bytes with a password,
+            preceded by the arena's header, valid until slot `index` is
+            reused.
+
+        """
+
+        self._bodies[index][:] = mac_address * 16
+        if password or self._passwords:
+            return self._pack_password(index, password)
+        return self._packets[index]
+
+    def _pack_password(self, index, password):
+        start = self._packet_end
+        views = self._views.get(len(password))
+        if views is None:
+            end = start + len(password)
+            views = self._views[len(password)] = [slot[:end] for slot in self._slots]
+            self._passwords = True
+        packet = views[index]
+        packet[start:] = password
+        self._packets[index] = packet
+        return packet
+
+    def packet(self, index):
+        """Return the magic packet in slot `index` as a memoryview."""
+
+        return self._packets[index]
+
+    def is_packet(self, index, payload):
+        """Return True if `payload` is the packet view of slot `index`."""
+
+        return payload is self._packets[index]
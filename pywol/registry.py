@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+"""
+pywol.registry
+--------------
+This module implements a persistent SQLite registry of named hosts.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import ipaddress
+import os
+import sqlite3
+from collections import namedtuple
+from time import perf_counter
+
+from .metrics import STAGES, _notify_outcome, _notify_stages, _observers
+from .transmit import MAX_BATCH_SIZE
+from .wol import (
+    WakeResult,
+    _clean_mac_address,
+    _evaluate_ip_address,
+    _clean_password,
+    _generate_magic_packet,
+    _send_packets,
+    _SocketPool,
+    _validate_port_number,
+)
+
+DEFAULT_PATH = os.path.join("~", ".pywol", "hosts.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hosts (
+    name TEXT PRIMARY KEY,
+    mac TEXT NOT NULL,
+    ip TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    grp TEXT,
+    subnet TEXT,
+    interface TEXT,
+    packet BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS hosts_grp ON hosts (grp);
+CREATE INDEX IF NOT EXISTS hosts_subnet ON hosts (subnet);
+"""
+
+Host = namedtuple(
+    "Host",
+    ["name", "mac_address", "ip_address", "port", "group", "subnet", "interface"],
+)
+Host.__doc__ = """Host stored in a `HostRegistry`.
+
+Attributes
+----------
+name : str
+    Unique host name.
+mac_address : str
+    12-digit upper case hexadecimal MAC address.
+ip_address : str
+    Resolved IPv4 address magic packets are sent to.
+port : int
+    Port magic packets are sent to.
+group : str or None
+    Group name, e.g. 'rack-12'.
+subnet : str or None
+    Host subnet in CIDR notation.
+interface : str or None
+    Name or address of the local interface facing the host. Kept for
+    reference only; `HostRegistry.wake` sends over the default route
+    regardless. Use it to build a `pywol.interfaces.InterfaceSender`.
+
+"""
+
+_HOST_COLUMNS = "name, mac, ip, port, grp, subnet, interface"
+
+
+def default_path():
+    """Return the registry path from $PYWOL_REGISTRY or DEFAULT_PATH."""
+
+    return os.path.expanduser(os.environ.get("PYWOL_REGISTRY", DEFAULT_PATH))
+
+
+class HostRegistry:
+    """Persistent registry of named hosts backed by SQLite.
+
+    Hosts are indexed by group and subnet, so selecting thousands of
+    targets is a single indexed query. Each host's magic packet is built
+    once when it is added and stored next to its resolved destination,
+    so waking hosts from the registry skips validation and packet
+    construction altogether. Only the selected rows are ever read.
+
+    Parameters
+    ----------
+    path : str, optional
+        Database file, created if missing. Use ':memory:' for a
+        throwaway registry. (default is `default_path()`).
+
+    """
+
+    def __init__(self, path=None):
+        self.path = default_path() if path is None else path
+        if self.path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        """Close the database connection."""
+
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM hosts").fetchone()[0]
+
+    def add(
+        self,
+        name,
+        mac_address,
+        *,
+        ip_address="255.255.255.255",
+        port=9,
+        group=None,
+        subnet=None,
+        interface=None,
+        password=None,
+    ):
+        """Add or replace a host.
+
+        Parameters
+        ----------
+        name : str
+            Unique host name.
+        mac_address : str
+            Host MAC address.
+        ip_address : str, optional
+            IPv4 broadcast address, or host address with netmask to store
+            its subnet broadcast address. (default is '255.255.255.255').
+        port : int, optional
+            Target port. (default is 9).
+        group : str, optional
+            Group name.
+        subnet : str, optional
+            Host subnet. Defaults to the subnet of `ip_address` if it is
+            given with a netmask.
+        interface : str, optional
+            Name or address of the local interface facing the host,
+            stored for reference only.
+        password : str or bytes, optional
+            SecureOn password, stored as part of the host's magic packet
+            only.
+
+        Returns
+        -------
+        Host
+            The stored host.
+
+        Raises
+        ------
+        ValueError
+            If the MAC address, IP address, port number, subnet or
+            password is invalid.
+        TypeError
+            If `port` is not of type int.
+
+        """
+
+        mac_cleaned = _clean_mac_address(mac_address).upper()
+        password_cleaned = _clean_password(password)
+        valid_ip_address = _evaluate_ip_address(ip_address)
+        valid_port = _validate_port_number(port)
+        if subnet is None and "/" in ip_address:
+            subnet = ip_address
+        if subnet is not None:
+            try:
+                subnet = str(ipaddress.IPv4Network(subnet.strip(), strict=False))
+            except Exception as e:
+                raise ValueError(f"[Error] Invalid subnet: {subnet}") from e
+        host = Host(
+            name, mac_cleaned, valid_ip_address, valid_port, group, subnet, interface
+        )
+        with self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO hosts ({_HOST_COLUMNS}, packet) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                host + (_generate_magic_packet(mac_cleaned, password_cleaned),),
+            )
+        return host
+
+    def remove(self, name):
+        """Remove a host.
+
+        Returns
+        -------
+        bool
+            True if the host existed.
+
+        """
+
+        with self._conn:
+            cursor = self._conn.execute("DELETE FROM hosts WHERE name = ?", (name,))
+        return cursor.rowcount > 0
+
+    def get(self, name):
+        """Return the host called `name`, or None."""
+
+        row = self._conn.execute(
+            f"SELECT {_HOST_COLUMNS} FROM hosts WHERE name = ?", (name,)
+        ).fetchone()
+        return None if row is None else Host(*row)
+
+    @staticmethod
+    def _where(names, group, subnet):
+        clauses = []
+        params = []
+        if names is not None:
+            names = list(names)
+            clauses.append(f"name IN ({', '.join('?' * len(names))})")
+            params.extend(names)
+        if group is not None:
+            clauses.append("grp = ?")
+            params.append(group)
+        if subnet is not None:
+            try:
+                network = ipaddress.IPv4Network(subnet.strip(), strict=False)
+            except Exception as e:
+                raise ValueError(f"[Error] Invalid subnet: {subnet}") from e
+            clauses.append("subnet = ?")
+            params.append(str(network))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def find(self, *, names=None, group=None, subnet=None):
+        """Iterate over matching hosts, ordered by name.
+
+        Parameters
+        ----------
+        names : iterable of str, optional
+            Host names to select.
+        group : str, optional
+            Group to select.
+        subnet : str, optional
+            Subnet to select, in CIDR or netmask notation.
+
+        Yields
+        ------
+        Host
+            Matching hosts. All hosts if no filter is given.
+
+        Raises
+        ------
+        ValueError
+            If `subnet` is invalid.
+
+        """
+
+        where, params = self._where(names, group, subnet)
+        cursor = self._conn.execute(
+            f"SELECT {_HOST_COLUMNS} FROM hosts{where} ORDER BY name", params
+        )
+        for row in cursor:
+            yield Host(*row)
+
+    def packets(self, *, names=None, group=None, subnet=None):
+        """Iterate over the stored magic packets of matching hosts.
+
+        Accepts the same filters as `find`.
+
+        Yields
+        ------
+        tuple(str, bytes, str, int)
+            Name, magic packet, IP address & port of each matching host,
+            ordered by name. Packets include the hosts' SecureOn
+            passwords.
+
+        """
+
+        where, params = self._where(names, group, subnet)
+        yield from self._conn.execute(
+            f"SELECT name, packet, ip, port FROM hosts{where} ORDER BY name", params
+        )
+
+    def wake(self, *, names=None, group=None, subnet=None):
+        """Send the stored magic packets of matching hosts.
+
+        Accepts the same filters as `find`. Rows are read and sent in
+        batches over pooled sockets, over the default route. The stored
+        `interface` of hosts is not used.
+
+        Returns
+        -------
+        list(WakeResult)
+            One result per host, with the host name as target, followed
+            by an error result for each of `names` not in the registry.
+
+        Raises
+        ------
+        ValueError
+            If `subnet` is invalid.
+
+        """
+
+        if names is not None:
+            names = list(names)
+        where, params = self._where(names, group, subnet)
+        cursor = self._conn.execute(
+            f"SELECT name, packet, ip, port FROM hosts{where}", params
+        )
+        results = []
+        senders = {}
+        with _SocketPool() as pool:
+            rows = cursor.fetchmany(MAX_BATCH_SIZE)
+            while rows:
+                packets = [(row[1], (row[2], row[3])) for row in rows]
+                observed = bool(_observers)
+                start = perf_counter() if observed else 0.0
+                failures = _send_packets(senders, pool, packets, MAX_BATCH_SIZE)
+                if observed:
+                    # Stored packets skip the parse, resolve & build stages.
+                    _notify_stages((perf_counter() - start,), len(rows), STAGES[3:])
+                    _notify_outcome(len(rows) - len(failures), failures.values())
+                for index, (name, _, ip, port) in enumerate(rows):
+                    if index in failures:
+                        error = f"[Error] Cannot send broadcast to IP address: {ip}"
+                        results.append(WakeResult(name, None, error))
+                    else:
+                        results.append(WakeResult(name, (ip, str(port)), None))
+                rows = cursor.fetchmany(MAX_BATCH_SIZE)
+        if names is not None:
+            found = {result.target for result in results}
+            unknown = []
+            for name in names:
+                if name not in found:
+                    error = f"[Error] Unknown host: {name}"
+                    results.append(WakeResult(name, None, error))
+                    unknown.append(error)
+            if unknown and _observers:
+                _notify_outcome(0, invalid=unknown)
+        return results
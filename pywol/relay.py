@@ -0,0 +1,454 @@
+# -*- coding: utf-8 -*-
+"""
+pywol.relay
+-----------
+This module implements a wake relay, an agent run on each routed subnet
+that re-broadcasts authenticated batched wake requests from a central
+controller on its local segment, and a client for it.
+
+Directed broadcasts are dropped by most routers, so a controller cannot
+reach hosts on other subnets itself. Instead it sends batches of targets
+over TCP or UDP to the relay on each subnet, which wakes them with its
+reused broadcast sockets like `pywol.daemon.WakeServer`.
+
+Messages are authenticated with HMAC-SHA256 over a shared key. Each
+message is a single line: the hexadecimal digest, a space and the JSON
+payload. Requests carry their send time and a random nonce, and relays
+reject requests older than `max_age` seconds or seen before, so
+captured requests cannot be replayed. Responses echo the nonce and are
+signed too, so controllers can trust the reported results.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import asyncio
+import hashlib
+import heapq
+import hmac
+import json
+import os
+import socket
+import time
+
+from .daemon import (
+    MAX_MESSAGE_SIZE,
+    WINDOW,
+    WakeServer,
+    _decode_result,
+    _encode_results,
+    _run,
+)
+from .transmit import MAX_BATCH_SIZE
+
+DEFAULT_PORT = 9009
+MAX_AGE = 30.0
+TCP_CHUNK_SIZE = 4096
+UDP_CHUNK_SIZE = 128
+
+
+def _load_key(key):
+    """Return the shared relay `key` as bytes.
+
+    Raises
+    ------
+    ValueError
+        If `key` is empty.
+    TypeError
+        If `key` is neither str nor bytes.
+
+    """
+
+    if isinstance(key, str):
+        key = key.encode()
+    elif not isinstance(key, (bytes, bytearray)):
+        raise TypeError("[Error] Relay key must be of type str or bytes.")
+    if not key:
+        raise ValueError("[Error] Relay key must not be empty.")
+    return bytes(key)
+
+
+def _sign(key, message):
+    """Return the signed line, without newline, of a JSON `message`."""
+
+    payload = json.dumps(message, separators=(",", ":")).encode()
+    digest = hmac.new(key, payload, hashlib.sha256).hexdigest()
+    return digest.encode() + b" " + payload
+
+
+def _verify(key, line):
+    """Return the JSON message of a signed `line`.
+
+    Raises
+    ------
+    ValueError
+        If the signature doesn't match or the payload isn't valid JSON.
+
+    """
+
+    digest, _, payload = line.strip().partition(b" ")
+    expected = hmac.new(key, payload, hashlib.sha256).hexdigest().encode()
+    if not hmac.compare_digest(digest, expected):
+        raise ValueError("[Error] Invalid signature.")
+    return json.loads(payload.decode())
+
+
+class _RelayProtocol(asyncio.DatagramProtocol):
+    """Datagram protocol answering each request datagram with one reply."""
+
+    def __init__(self, server):
+        self._server = server
+        self._transport = None
+
+    def connection_made(self, transport):
+        self._transport = transport
+
+    def datagram_received(self, data, addr):
+        asyncio.ensure_future(self._reply(data, addr))
+
+    async def _reply(self, data, addr):
+        response = await self._server._respond(data)
+        if not self._transport.is_closing():
+            self._transport.sendto(response, addr)
+
+
+class RelayServer(WakeServer):
+    """Relay answering authenticated wake requests over TCP and UDP.
+
+    Listens on the same port number for both transports. Requests are
+    signed lines as described in `pywol.relay`, whose JSON payload is a
+    `WakeServer` request with added "time" and "nonce" fields. Targets of
+    requests from all connections and datagrams are coalesced into
+    batched sends, as by `WakeServer`.
+
+    Requests that fail authentication, are older than `max_age` or
+    replay a seen nonce are answered with an "error" response and not
+    sent, which needs the clocks of controller and relay to agree within
+    `max_age` seconds. Error responses echo the nonce and are signed if
+    the request's signature is valid, and unsigned otherwise.
+
+    Use as an async context manager.
+
+    Parameters
+    ----------
+    key : str or bytes
+        Key shared with the controller.
+    host : str, optional
+        Address to listen on. (default is '0.0.0.0').
+    port : int, optional
+        Port to listen on, or 0 for any free port, which is stored in
+        `port` once started. (default is DEFAULT_PORT).
+    max_age : float, optional
+        Seconds a request stays valid after it was sent.
+        (default is MAX_AGE).
+    window : float, optional
+        Seconds to wait for more requests before sending. (default is
+        WINDOW).
+    batch_size : int, optional
+        Pending packet count that triggers a send before the window
+        closes. (default is MAX_BATCH_SIZE).
+    resolver : BroadcastResolver, optional
+        Resolver used to map target IP addresses to broadcast addresses.
+    clock : callable, optional
+        Function returning the current time in seconds since the epoch.
+        (default is `time.time`).
+
+    Raises
+    ------
+    ValueError
+        If `key` is empty.
+
+    """
+
+    def __init__(
+        self,
+        key,
+        host="0.0.0.0",
+        port=DEFAULT_PORT,
+        *,
+        max_age=MAX_AGE,
+        window=WINDOW,
+        batch_size=MAX_BATCH_SIZE,
+        resolver=None,
+        clock=time.time,
+    ):
+        super().__init__(window=window, batch_size=batch_size, resolver=resolver)
+        self.path = None
+        self.host = host
+        self.port = port
+        self.max_age = max_age
+        self._key = _load_key(key)
+        self._clock = clock
+        self._nonces = set()
+        self._expiries = []
+        self._transport = None
+
+    async def start(self):
+        """Open the IPv4 broadcast socket and start listening."""
+
+        self._pool.get()
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, limit=MAX_MESSAGE_SIZE
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        loop = asyncio.get_event_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _RelayProtocol(self), local_addr=(self.host, self.port)
+        )
+        return self
+
+    def close(self):
+        """Stop listening, send pending packets and close the sockets."""
+
+        if self._server is not None:
+            self._server.close()
+        if self._transport is not None:
+            self._transport.close()
+        if self._pending:
+            self._flush()
+        self._pool.close()
+
+    async def _respond(self, line):
+        try:
+            request = self._authenticate(line)
+            results = await self._submit_request(request)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return self._error(line)
+        response = _encode_results(results)
+        response["nonce"] = request["nonce"]
+        return _sign(self._key, response)
+
+    def _error(self, line):
+        """Return the error response to a rejected request `line`.
+
+        The response is signed and echoes the nonce if the signature of
+        `line` is valid, so clients can trust it over UDP.
+
+        """
+
+        response = {"error": "[Error] Invalid request."}
+        try:
+            response["nonce"] = _verify(self._key, line)["nonce"]
+        except (ValueError, KeyError, TypeError):
+            return json.dumps(response).encode()
+        return _sign(self._key, response)
+
+    def _authenticate(self, line):
+        """Return the request of a signed `line` if it's fresh.
+
+        Raises
+        ------
+        ValueError
+            If the signature doesn't match, or the request has expired
+            or was seen before.
+
+        """
+
+        request = _verify(self._key, line)
+        sent_at = float(request["time"])
+        nonce = str(request["nonce"])
+        now = self._clock()
+        if not abs(now - sent_at) <= self.max_age:
+            raise ValueError("[Error] Request expired.")
+        while self._expiries and self._expiries[0][0] < now:
+            self._nonces.discard(heapq.heappop(self._expiries)[1])
+        if nonce in self._nonces:
+            raise ValueError("[Error] Replayed request.")
+        self._nonces.add(nonce)
+        heapq.heappush(self._expiries, (sent_at + self.max_age, nonce))
+        return request
+
+
+def serve(
+    key,
+    host="0.0.0.0",
+    port=DEFAULT_PORT,
+    *,
+    max_age=MAX_AGE,
+    window=WINDOW,
+    batch_size=MAX_BATCH_SIZE,
+    resolver=None,
+    ready=None,
+):
+    """Run a `RelayServer` until interrupted by SIGINT or SIGTERM.
+
+    Accepts the same arguments as `RelayServer`, and `ready`, a callable
+    called with the server once it's listening.
+
+    """
+
+    server = RelayServer(
+        key,
+        host,
+        port,
+        max_age=max_age,
+        window=window,
+        batch_size=batch_size,
+        resolver=resolver,
+    )
+    _run(server, ready)
+
+
+class RelayClient:
+    """Blocking client for a `RelayServer`.
+
+    Keeps one TCP connection, or one connected UDP socket, open across
+    requests. Use as a context manager to close it on exit.
+
+    Over UDP, a lost request or response raises `socket.timeout`; TCP
+    should be preferred where delivery matters. Unsigned error datagrams
+    may be forged, so they only raise once no signed response arrived
+    before the timeout.
+
+    Parameters
+    ----------
+    host : str
+        Address of the relay.
+    port : int, optional
+        Port of the relay. (default is DEFAULT_PORT).
+    key : str or bytes
+        Key shared with the relay.
+    transport : str, optional
+        'tcp' or 'udp'. (default is 'tcp').
+    timeout : float, optional
+        Seconds to wait for the relay. (default is 5.0).
+    chunk_size : int, optional
+        Maximum number of targets per request. (default is
+        TCP_CHUNK_SIZE or UDP_CHUNK_SIZE, by transport).
+
+    Raises
+    ------
+    ValueError
+        If `key` is empty or `transport` is invalid.
+    OSError
+        If the relay cannot be reached over TCP.
+
+    """
+
+    def __init__(
+        self,
+        host,
+        port=DEFAULT_PORT,
+        *,
+        key,
+        transport="tcp",
+        timeout=5.0,
+        chunk_size=None,
+    ):
+        if transport not in ("tcp", "udp"):
+            raise ValueError(f"[Error] Invalid transport: {transport}")
+        self._key = _load_key(key)
+        self.transport = transport
+        if chunk_size is None:
+            chunk_size = TCP_CHUNK_SIZE if transport == "tcp" else UDP_CHUNK_SIZE
+        self.chunk_size = chunk_size
+        if transport == "tcp":
+            self._sock = socket.create_connection((host, port), timeout)
+            self._reader = self._sock.makefile("rb")
+        else:
+            family, kind, proto, _, address = socket.getaddrinfo(
+                host, port, type=socket.SOCK_DGRAM
+            )[0]
+            self._sock = socket.socket(family, kind, proto)
+            try:
+                self._sock.settimeout(timeout)
+                self._sock.connect(address)
+            except OSError:
+                self._sock.close()
+                raise
+            self._reader = None
+
+    def close(self):
+        """Close the connection."""
+
+        if self._reader is not None:
+            self._reader.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def wake_many(self, targets, *, ip_address="255.255.255.255", port=9):
+        """Have the relay send WoL magic packets for many targets.
+
+        Accepts the same arguments as `pywol.wake_many`. Targets are
+        sent in requests of at most `chunk_size` targets.
+
+        Returns
+        -------
+        list(WakeResult)
+            One result per target, in input order. Tuple targets are
+            returned as tuples and dests as (ip_address, port) tuples.
+
+        Raises
+        ------
+        ValueError
+            If the relay rejected a request or a response failed
+            authentication.
+        OSError
+            If the relay could not be reached.
+
+        """
+
+        targets = list(targets)
+        results = []
+        for start in range(0, len(targets), self.chunk_size):
+            stop = start + self.chunk_size
+            results.extend(self._request(targets[start:stop], ip_address, port))
+        return results
+
+    def _request(self, targets, ip_address, port):
+        nonce = os.urandom(16).hex()
+        request = {
+            "targets": targets,
+            "ip_address": ip_address,
+            "port": port,
+            "time": time.time(),
+            "nonce": nonce,
+        }
+        line = _sign(self._key, request)
+        if self._reader is not None:
+            self._sock.sendall(line + b"\n")
+            response = self._reader.readline()
+            if not response:
+                raise ConnectionResetError("[Error] Relay closed the connection.")
+            return self._decode(response, nonce)
+        self._sock.send(line)
+        error = None
+        while True:
+            try:
+                datagram = self._sock.recv(65535)
+            except socket.timeout:
+                if error is None:
+                    raise
+                raise ValueError(error) from None
+            if datagram.startswith(b"{"):
+                try:
+                    error = str(json.loads(datagram.decode())["error"])
+                except (ValueError, KeyError, TypeError):
+                    pass
+                continue
+            # Late replies to earlier requests and forged datagrams are
+            # skipped until the timeout.
+            try:
+                response = _verify(self._key, datagram)
+            except ValueError:
+                continue
+            if response.get("nonce") == nonce:
+                return self._results(response, nonce)
+
+    def _decode(self, line, nonce):
+        if line.startswith(b"{"):
+            raise ValueError(json.loads(line.decode())["error"])
+        return self._results(_verify(self._key, line), nonce)
+
+    def _results(self, response, nonce):
+        if response.get("nonce") != nonce:
+            raise ValueError("[Error] Unexpected response.")
+        if "error" in response:
+            raise ValueError(response["error"])
+        return [_decode_result(item) for item in response["results"]]
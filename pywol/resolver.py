@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+pywol.resolver
+--------------
+This module implements memoized resolution of target IPv4 addresses to
+subnet broadcast addresses.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import functools
+import ipaddress
+import socket
+
+from .wol import _evaluate_ip_address
+
+
+def _ip_to_int(ip_address):
+    """Return a valid dotted-quad IPv4 address as an integer."""
+
+    return int.from_bytes(socket.inet_aton(ip_address), "big")
+
+
+class PrefixIndex:
+    """Binary prefix tree mapping IPv4 subnets to values.
+
+    Lookups walk at most one node per address bit and return the value
+    of the longest matching prefix.
+
+    """
+
+    def __init__(self):
+        self._root = [None, None, None]
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def insert(self, network, value):
+        """Map `network` to `value`.
+
+        Parameters
+        ----------
+        network : ipaddress.IPv4Network
+            Subnet to index.
+        value
+            Value returned for addresses within `network`. Must not be
+            None.
+
+        """
+
+        address = int(network.network_address)
+        node = self._root
+        for shift in range(31, 31 - network.prefixlen, -1):
+            bit = (address >> shift) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, None]
+            node = node[bit]
+        if node[2] is None:
+            self._count += 1
+        node[2] = value
+
+    def lookup(self, address):
+        """Return the value of the longest prefix matching `address`.
+
+        Parameters
+        ----------
+        address : int
+            IPv4 address as an integer.
+
+        Returns
+        -------
+        object or None
+            Value of the longest matching subnet, or None if no indexed
+            subnet matches.
+
+        """
+
+        node = self._root
+        value = node[2]
+        shift = 31
+        while shift >= 0:
+            node = node[(address >> shift) & 1]
+            if node is None:
+                break
+            if node[2] is not None:
+                value = node[2]
+            shift -= 1
+        return value
+
+
+class BroadcastResolver:
+    """Resolve target addresses to broadcast addresses, with caching.
+
+    Known subnets are indexed in a binary prefix tree, so a bare host
+    address inside one of them resolves to the subnet's directed
+    broadcast address in at most 32 steps, and the longest matching
+    prefix wins. Addresses outside all known subnets, and addresses
+    given with a netmask, resolve like in `pywol.wake`. Results are
+    memoized, so repeated targets skip `ipaddress` parsing altogether.
+    Resolvers can be pickled, e.g. to send them to worker processes,
+    which rebuild the memo empty.
+
+    Parameters
+    ----------
+    subnets : iterable of str, optional
+        Subnets to index, e.g. '192.168.1.0/24' or '10.0.0.5/255.0.0.0'.
+    maxsize : int, optional
+        Maximum number of memoized resolutions. (default is 4096).
+
+    """
+
+    def __init__(self, subnets=(), *, maxsize=4096):
+        self._index = PrefixIndex()
+        self.maxsize = maxsize
+        self._memoize()
+        for subnet in subnets:
+            self.add_subnet(subnet)
+
+    def _memoize(self):
+        self.resolve = functools.lru_cache(maxsize=self.maxsize)(self._resolve)
+        self.resolve.__doc__ = self._resolve.__doc__
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["resolve"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._memoize()
+
+    def __len__(self):
+        return len(self._index)
+
+    def add_subnet(self, subnet):
+        """Index a subnet.
+
+        Parameters
+        ----------
+        subnet : str
+            Subnet in CIDR or netmask notation. Host bits are ignored.
+
+        Raises
+        ------
+        ValueError
+            If `subnet` is not a valid IPv4 subnet.
+
+        """
+
+        try:
+            network = ipaddress.IPv4Network(subnet.strip(), strict=False)
+        except Exception as e:
+            raise ValueError(f"[Error] Invalid subnet: {subnet}") from e
+        self._index.insert(network, str(network.broadcast_address))
+        self.resolve.cache_clear()
+
+    def lookup(self, address):
+        """Return the broadcast address of the longest matching subnet.
+
+        Parameters
+        ----------
+        address : int
+            IPv4 address as an integer.
+
+        Returns
+        -------
+        str or None
+            Broadcast address, or None if no known subnet matches.
+
+        """
+
+        return self._index.lookup(address)
+
+    def _resolve(self, ip_address):
+        """Resolve a target address to the address to send to.
+
+        Parameters
+        ----------
+        ip_address : str
+            IPv4 host or broadcast address, optionally with a netmask.
+
+        Returns
+        -------
+        str
+            Broadcast address of the longest known subnet containing a
+            bare IPv4 `ip_address`, else the result of `pywol.wake`'s own
+            address evaluation.
+
+        Raises
+        ------
+        ValueError
+            If `ip_address` does not contain a valid IPv4 address.
+
+        """
+
+        valid_ip_address = _evaluate_ip_address(ip_address)
+        if "/" in ip_address or ":" in valid_ip_address:
+            return valid_ip_address
+        return self.lookup(_ip_to_int(valid_ip_address)) or valid_ip_address
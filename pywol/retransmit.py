@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+pywol.retransmit
+----------------
+This module implements a retransmit policy sending each magic packet
+several times, for segments where single UDP datagrams are lost.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import time
+
+from .wol import _validate_port_number
+
+
+class RetransmitPolicy:
+    """Policy sending every magic packet several times.
+
+    Copies are interleaved across a batch: the whole batch is sent once
+    per round, and rounds start `interval` seconds apart, so the copies
+    for one host are spread out instead of sent back-to-back, where a
+    burst of loss would take them all. Every round reuses the batch's
+    built payloads and sockets.
+
+    Pass a policy as ``retransmit`` to `pywol.wake`, `pywol.wake_many`
+    or `pywol.iter_wake`, whose records report the copies sent per
+    target.
+
+    Parameters
+    ----------
+    copies : int, optional
+        Number of times each packet is sent per port. (default is 3).
+    interval : float, optional
+        Seconds between the starts of successive rounds.
+        (default is 0.05).
+    ports : iterable of int, optional
+        Additional ports to send every copy to, besides each target's own
+        port, e.g. (7,) to send to both the echo and discard ports.
+        (default is no additional ports).
+    clock : callable, optional
+        Monotonic time source in seconds. (default is time.monotonic).
+    sleep : callable, optional
+        Function sleeping for a number of seconds.
+        (default is time.sleep).
+
+    Raises
+    ------
+    ValueError
+        If `copies`, `interval` or one of `ports` is invalid.
+
+    """
+
+    def __init__(
+        self,
+        copies=3,
+        interval=0.05,
+        ports=(),
+        *,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        if isinstance(copies, bool) or not isinstance(copies, int) or copies < 1:
+            raise ValueError(f"[Error] Invalid number of copies: {copies}")
+        if not interval >= 0:
+            raise ValueError(f"[Error] Invalid interval: {interval}")
+        self.copies = copies
+        self.interval = interval
+        self.ports = tuple(dict.fromkeys(_validate_port_number(p) for p in ports))
+        self._clock = clock
+        self._sleep = sleep
+
+    def __repr__(self):
+        return (
+            f"RetransmitPolicy(copies={self.copies!r}, "
+            f"interval={self.interval!r}, ports={self.ports!r})"
+        )
+
+    def _passes(self, packets):
+        """Return the (packets, indices) sent in each round.
+
+        The first pass is `packets` itself. Each additional port gets a
+        pass with the packets not already sent to it, whose `indices`
+        map them back to `packets`.
+
+        """
+
+        passes = [(packets, None)]
+        for port in self.ports:
+            indices = [
+                index
+                for index, (_, (_, packet_port)) in enumerate(packets)
+                if packet_port != port
+            ]
+            if indices:
+                port_packets = [
+                    (packets[index][0], (packets[index][1][0], port))
+                    for index in indices
+                ]
+                passes.append((port_packets, indices))
+        return passes
+
+    def send(self, send, packets):
+        """Send `packets` according to the policy.
+
+        Parameters
+        ----------
+        send : callable
+            Function sending a list of packets and returning the errors
+            of unsent packets by index, like `BatchSender.send`.
+        packets : list
+            (payload, (ip_address, port)) pairs.
+
+        Returns
+        -------
+        tuple(dict(int, OSError), list(int))
+            Last error of each packet no copy of which was sent, by
+            index, and the number of copies sent of each packet.
+
+        """
+
+        passes = self._passes(packets)
+        attempts = [self.copies] * len(packets)
+        for _, indices in passes[1:]:
+            for index in indices:
+                attempts[index] += self.copies
+        errors = {}
+        missed = [0] * len(packets)
+        start = self._clock()
+        for copy in range(self.copies):
+            if copy and self.interval:
+                delay = start + copy * self.interval - self._clock()
+                if delay > 0:
+                    self._sleep(delay)
+            for pass_packets, indices in passes:
+                for pass_index, error in send(pass_packets).items():
+                    index = pass_index if indices is None else indices[pass_index]
+                    missed[index] += 1
+                    errors[index] = error
+
+        copies = [sent - failed for sent, failed in zip(attempts, missed)]
+        failures = {
+            index: error for index, error in errors.items() if not copies[index]
+        }
+        return failures, copies
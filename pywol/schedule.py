@@ -0,0 +1,442 @@
+# -*- coding: utf-8 -*-
+"""
+pywol.schedule
+--------------
+This module implements scheduled wake plans, which wake fleets in timed,
+staggered waves from a single long-running process.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import heapq
+import itertools
+import random
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from .metrics import STAGES, _notify_outcome, _notify_stages, _observers
+from .transmit import MAX_BATCH_SIZE
+from .wol import (
+    WakeResult,
+    _evaluate_ip_address,
+    _send_packets,
+    _SocketPool,
+    _validate_target,
+    packet_cache,
+)
+
+Wave = namedtuple("Wave", ["due", "name", "number", "count", "targets"])
+Wave.__doc__ = """Scheduled wave of a wake plan.
+
+Attributes
+----------
+due : float
+    Time the wave fires at, in seconds since the epoch, jitter included.
+name : str or None
+    Name of the plan entry the wave belongs to.
+number : int
+    Position of the wave in its entry, starting at 1.
+count : int
+    Number of waves of the entry.
+targets : list
+    Targets woken by the wave.
+
+"""
+
+_PLAN_KEYS = frozenset(
+    (
+        "at",
+        "name",
+        "targets",
+        "group",
+        "wave_size",
+        "interval",
+        "jitter",
+        "ip_address",
+        "port",
+        "password",
+    )
+)
+
+# Keys of settings that group entries take from the registry instead.
+_STORED_KEYS = frozenset(("ip_address", "port", "password"))
+
+
+def _due_time(at, now):
+    """Return the time `at` in seconds since the epoch.
+
+    Parameters
+    ----------
+    at : float, datetime or str
+        Seconds since the epoch, a datetime, or a local time of day
+        'HH:MM' or 'HH:MM:SS', which stands for its next occurrence.
+    now : float
+        Current time in seconds since the epoch.
+
+    Raises
+    ------
+    ValueError
+        If `at` is not a valid time of day.
+    TypeError
+        If `at` is of an unsupported type.
+
+    """
+
+    if isinstance(at, datetime):
+        return at.timestamp()
+    if isinstance(at, str):
+        for time_format in ("%H:%M", "%H:%M:%S"):
+            try:
+                time_of_day = datetime.strptime(at.strip(), time_format).time()
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"[Error] Invalid time of day: {at}")
+        today = datetime.fromtimestamp(now)
+        due = datetime.combine(today.date(), time_of_day)
+        if due.timestamp() < now:
+            due += timedelta(days=1)
+        return due.timestamp()
+    if isinstance(at, (int, float)) and not isinstance(at, bool):
+        return float(at)
+    raise TypeError(f"[Error] Invalid schedule time: {at!r}")
+
+
+class WakeScheduler:
+    """Fire waves of magic packets at scheduled times.
+
+    Plan entries are validated and their magic packets built when they
+    are added, so mistakes surface before the first wave is due and
+    firing a wave only costs the sends. Waves are kept in a heap ordered
+    by due time, and all waves share one pool of sockets.
+
+    Use as a context manager to close the sockets on exit.
+
+    Parameters
+    ----------
+    batch_size : int, optional
+        Maximum number of packets per send call.
+        (default is MAX_BATCH_SIZE).
+    clock : callable, optional
+        Function returning the current time in seconds since the epoch.
+        (default is `time.time`).
+    sleep : callable, optional
+        Function sleeping for a number of seconds.
+        (default is `time.sleep`).
+    rng : random.Random, optional
+        Random number generator for jitter. (default is a new one).
+
+    """
+
+    def __init__(
+        self,
+        *,
+        batch_size=MAX_BATCH_SIZE,
+        clock=time.time,
+        sleep=time.sleep,
+        rng=None,
+    ):
+        self.batch_size = batch_size
+        self._clock = clock
+        self._sleep = sleep
+        self._random = random.Random() if rng is None else rng
+        self._heap = []
+        self._counter = itertools.count()
+        self._pool = _SocketPool()
+        self._senders = {}
+
+    def __len__(self):
+        return len(self._heap)
+
+    def close(self):
+        """Close the pooled sockets."""
+
+        self._pool.close()
+        self._senders.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def next_due(self):
+        """float or None: Due time of the next wave, if any."""
+
+        return self._heap[0][0] if self._heap else None
+
+    def add(
+        self,
+        at,
+        targets,
+        *,
+        name=None,
+        wave_size=None,
+        interval=0.0,
+        jitter=0.0,
+        ip_address="255.255.255.255",
+        port=9,
+        resolver=None,
+        password=None,
+    ):
+        """Schedule waking `targets` in waves.
+
+        Parameters
+        ----------
+        at : float, datetime or str
+            Time of the first wave: seconds since the epoch, a datetime,
+            or a local time of day 'HH:MM[:SS]' for its next occurrence.
+        targets : iterable
+            Targets as accepted by `pywol.wake_many`.
+        name : str, optional
+            Name reported with the entry's waves.
+        wave_size : int, optional
+            Maximum number of targets per wave. (default is all targets
+            in one wave).
+        interval : float, optional
+            Seconds between the starts of successive waves.
+            (default is 0.0).
+        jitter : float, optional
+            Maximum random delay in seconds added to each wave, to
+            spread the load of waves from several entries.
+            (default is 0.0).
+        ip_address : str, optional
+            IP address for targets that don't specify one.
+            (default is '255.255.255.255').
+        port : int, optional
+            Port for targets that don't specify one. (default is 9).
+        resolver : BroadcastResolver, optional
+            Resolver mapping target addresses to broadcast addresses.
+        password : str or bytes, optional
+            SecureOn password for targets that don't specify one.
+
+        Returns
+        -------
+        list(Wave)
+            The scheduled waves, in order.
+
+        Raises
+        ------
+        ValueError
+            If `at`, a target, password or the wave size is invalid.
+        TypeError
+            If `at` or a target is of the wrong type.
+
+        """
+
+        entries = self._prepare(
+            at,
+            targets,
+            name=name,
+            wave_size=wave_size,
+            interval=interval,
+            jitter=jitter,
+            ip_address=ip_address,
+            port=port,
+            resolver=resolver,
+            password=password,
+        )
+        return self._push(entries)
+
+    def _prepare(
+        self,
+        at,
+        targets,
+        *,
+        name=None,
+        wave_size=None,
+        interval=0.0,
+        jitter=0.0,
+        ip_address="255.255.255.255",
+        port=9,
+        resolver=None,
+        password=None,
+    ):
+        """Validate an entry and build its (wave, packets) entries.
+
+        Accepts the same arguments as `add`, but schedules nothing.
+
+        """
+
+        due = _due_time(at, self._clock())
+        resolve = _evaluate_ip_address if resolver is None else resolver.resolve
+        prepared = []
+        for target in targets:
+            (
+                mac_cleaned,
+                valid_ip_address,
+                valid_port,
+                password_cleaned,
+            ) = _validate_target(target, ip_address, port, resolve, password)
+            packet = (
+                packet_cache.get(mac_cleaned, password_cleaned),
+                (valid_ip_address, valid_port),
+            )
+            prepared.append((target, packet))
+        return self._waves(due, prepared, name, wave_size, interval, jitter)
+
+    def _prepare_stored(
+        self, at, rows, *, name=None, wave_size=None, interval=0.0, jitter=0.0
+    ):
+        """Build the (wave, packets) entries of stored registry packets.
+
+        `rows` are (name, packet, ip_address, port) tuples, as yielded by
+        `HostRegistry.packets`, whose host names become the targets.
+
+        """
+
+        due = _due_time(at, self._clock())
+        prepared = [
+            (host_name, (packet, (ip_address, port)))
+            for host_name, packet, ip_address, port in rows
+        ]
+        return self._waves(due, prepared, name, wave_size, interval, jitter)
+
+    def _waves(self, due, prepared, name, wave_size, interval, jitter):
+        """Split (target, packet) pairs into (wave, packets) entries."""
+
+        if wave_size is None:
+            wave_size = max(len(prepared), 1)
+        elif wave_size < 1:
+            raise ValueError(f"[Error] Invalid wave size: {wave_size}")
+
+        count = -(-len(prepared) // wave_size)
+        entries = []
+        for number, start in enumerate(range(0, len(prepared), wave_size), 1):
+            stop = start + wave_size
+            chunk = prepared[start:stop]
+            wave_due = due + (number - 1) * interval
+            if jitter:
+                wave_due += self._random.uniform(0, jitter)
+            wave = Wave(wave_due, name, number, count, [entry[0] for entry in chunk])
+            entries.append((wave, [entry[1] for entry in chunk]))
+        return entries
+
+    def _push(self, entries):
+        """Schedule prepared (wave, packets) entries and return their waves."""
+
+        waves = []
+        for wave, packets in entries:
+            heapq.heappush(self._heap, (wave.due, next(self._counter), wave, packets))
+            waves.append(wave)
+        return waves
+
+    def run(self, callback=None):
+        """Fire all scheduled waves when due, blocking until done.
+
+        Parameters
+        ----------
+        callback : callable, optional
+            Called as callback(wave, results) after each wave is sent.
+
+        Returns
+        -------
+        list(WakeResult)
+            One result per target, in the order the waves fired.
+
+        """
+
+        results = []
+        while self._heap:
+            delay = self._heap[0][0] - self._clock()
+            if delay > 0:
+                # Sleep may return early, so the next wave is checked again.
+                self._sleep(delay)
+                continue
+            _, _, wave, packets = heapq.heappop(self._heap)
+            wave_results = self._fire(wave, packets)
+            if callback is not None:
+                callback(wave, wave_results)
+            results.extend(wave_results)
+        return results
+
+    def _fire(self, wave, packets):
+        observed = bool(_observers)
+        start = time.perf_counter() if observed else 0.0
+        failures = _send_packets(self._senders, self._pool, packets, self.batch_size)
+        if observed:
+            # Packets were built when the wave was scheduled.
+            _notify_stages((time.perf_counter() - start,), len(packets), STAGES[3:])
+            _notify_outcome(len(packets) - len(failures), failures.values())
+        results = []
+        for index, (target, (_, (ip, port))) in enumerate(zip(wave.targets, packets)):
+            if index in failures:
+                error = f"[Error] Cannot send broadcast to IP address: {ip}"
+                results.append(WakeResult(target, None, error))
+            else:
+                results.append(WakeResult(target, (ip, str(port)), None))
+        return results
+
+
+def load_plan(scheduler, plan, registry=None):
+    """Schedule the entries of a wake plan.
+
+    Parameters
+    ----------
+    scheduler : WakeScheduler
+        Scheduler to add the entries to.
+    plan : dict
+        Plan with a list of entries under 'waves', as parsed from JSON.
+        Each entry has an 'at' time and either 'targets' or a registry
+        'group', and optionally 'name', 'wave_size', 'interval',
+        'jitter', 'ip_address', 'port' and 'password', as taken by
+        `WakeScheduler.add`. Group entries send the magic packets stored
+        in the registry, with the hosts' own addresses and passwords, so
+        they can't set 'ip_address', 'port' or 'password', and their
+        waves have host names as targets. Entries are named after their
+        group by default.
+    registry : HostRegistry, optional
+        Registry to look up the hosts of 'group' entries in.
+
+    Returns
+    -------
+    list(Wave)
+        All scheduled waves.
+
+    Raises
+    ------
+    ValueError
+        If the plan or one of its entries is invalid, in which case no
+        entry is scheduled.
+    TypeError
+        If an entry's time or a target is of the wrong type.
+
+    """
+
+    if not isinstance(plan, dict) or not isinstance(plan.get("waves"), list):
+        raise ValueError("[Error] Invalid plan: expected a list of 'waves'.")
+    prepared = []
+    for entry in plan["waves"]:
+        if not isinstance(entry, dict) or "at" not in entry:
+            raise ValueError(f"[Error] Invalid plan entry: {entry!r}")
+        unknown = set(entry) - _PLAN_KEYS
+        if unknown:
+            raise ValueError(f"[Error] Unknown plan keys: {', '.join(sorted(unknown))}")
+        options = dict(entry)
+        at = options.pop("at")
+        group = options.pop("group", None)
+        targets = options.pop("targets", None)
+        if (group is None) == (targets is None):
+            raise ValueError(
+                f"[Error] Plan entry needs either targets or a group: {entry!r}"
+            )
+        if group is not None:
+            if registry is None:
+                raise ValueError(f"[Error] No host registry for group: {group}")
+            stored = set(options) & _STORED_KEYS
+            if stored:
+                raise ValueError(
+                    "[Error] Plan entries with a group cannot set: "
+                    f"{', '.join(sorted(stored))}"
+                )
+            options.setdefault("name", group)
+            rows = registry.packets(group=group)
+            prepared += scheduler._prepare_stored(at, rows, **options)
+        else:
+            prepared += scheduler._prepare(at, targets, **options)
+    return scheduler._push(prepared)
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+pywol.shard
+-----------
+This module implements sharded bulk sends across a pool of worker
+processes, for fleets too large for a single GIL-bound process to wake
+at line rate.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import os
+from multiprocessing import get_context
+
+from .metrics import STAGES, Observer, _observers
+from .wol import WakeResult, wake_many
+
+# Worker process state, set by `_init_worker`.
+_worker = {"options": {}, "observed": False}
+
+
+class _ShardRecorder(Observer):
+    """Observer recording a worker's events for replay in the parent."""
+
+    def __init__(self):
+        self.stages = {name: [0.0, 0] for name in STAGES}
+        self.sent_count = 0
+        self.errnos = []
+        self.errors = []
+
+    def stage(self, name, seconds, count):
+        entry = self.stages[name]
+        entry[0] += seconds
+        entry[1] += count
+
+    def sent(self, count):
+        self.sent_count += count
+
+    def failed(self, errno):
+        self.errnos.append(errno)
+
+    def invalid(self, error):
+        self.errors.append(error)
+
+    def events(self):
+        """Return the recorded events as a picklable tuple."""
+
+        return self.stages, self.sent_count, self.errnos, self.errors
+
+
+def _init_worker(options, observed):
+    """Set up a worker process with its own `wake_many` options.
+
+    Observers inherited from a forked parent are dropped, so events are
+    only reported once, by the parent.
+
+    """
+
+    _worker["options"] = options
+    _worker["observed"] = observed
+    del _observers[:]
+
+
+def _compact(results):
+    """Return the outcome of each of `results`, for sending to the parent.
+
+    Only destinations and error messages are sent back, interned so that
+    pickling encodes repeats of the same destination as a reference, and
+    the parent pairs them with its own copy of the targets.
+
+    """
+
+    interned = {}
+    outcomes = []
+    for result in results:
+        outcome = result.error if result.dest is None else result.dest
+        outcomes.append(interned.setdefault(outcome, outcome))
+    return outcomes
+
+
+def _wake_shard(shard):
+    """Wake the targets of `shard` in a worker process.
+
+    Returns
+    -------
+    tuple(list, tuple or None)
+        Destination tuple or error message of each target, and the
+        events recorded while sending the shard if the parent has
+        observers.
+
+    """
+
+    options = _worker["options"]
+    if not _worker["observed"]:
+        return _compact(wake_many(shard, **options)), None
+    recorder = _ShardRecorder()
+    _observers.append(recorder)
+    try:
+        results = wake_many(shard, **options)
+    finally:
+        _observers.remove(recorder)
+    return _compact(results), recorder.events()
+
+
+def _replay(events):
+    """Report the recorded `events` of a shard to this process' observers."""
+
+    stages, sent, errnos, errors = events
+    for observer in _observers:
+        for name in STAGES:
+            seconds, count = stages[name]
+            if count:
+                observer.stage(name, seconds, count)
+        if sent:
+            observer.sent(sent)
+        for number in errnos:
+            observer.failed(number)
+        for message in errors:
+            observer.invalid(message)
+
+
+def wake_sharded(
+    targets,
+    *,
+    processes=None,
+    shard_size=None,
+    ip_address="255.255.255.255",
+    port=9,
+    cache=True,
+    resolver=None,
+    password=None,
+):
+    """Generate and send WoL magic packets for many targets from several
+    processes.
+
+    Targets are split into contiguous shards that are woken with
+    `wake_many` by a pool of worker processes, each with its own socket
+    and packet cache, so sends scale across CPU cores. Results and, if
+    observers are registered, the workers' stage timings and outcomes
+    are sent back to the parent over the pool's pipes and reported to
+    this process' observers.
+
+    Parameters
+    ----------
+    targets : iterable
+        Targets as accepted by `wake_many`.
+    processes : int, optional
+        Number of worker processes. With 1, targets are woken in this
+        process. (default is the number of CPUs).
+    shard_size : int, optional
+        Number of targets per shard. (default is an equal share of the
+        targets per process).
+    ip_address : str, optional
+        IP address for targets that don't specify one.
+        (default is '255.255.255.255').
+    port : int, optional
+        Port for targets that don't specify one. (default is 9).
+    cache : bool, optional
+        Flag to reuse payloads from the workers' packet caches.
+        (default is True).
+    resolver : BroadcastResolver, optional
+        Resolver mapping target addresses to broadcast addresses. It's
+        pickled into every worker, each with its own memo.
+    password : str or bytes, optional
+        SecureOn password for targets that don't specify one.
+
+    Returns
+    -------
+    list(WakeResult)
+        One result per target, in input order.
+
+    """
+
+    targets = list(targets)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    options = {
+        "ip_address": ip_address,
+        "port": port,
+        "cache": cache,
+        "resolver": resolver,
+        "password": password,
+    }
+    if processes <= 1 or len(targets) <= 1:
+        return wake_many(targets, **options)
+    if shard_size is None:
+        shard_size = -(-len(targets) // processes)
+    shards = []
+    for start in range(0, len(targets), shard_size):
+        stop = start + shard_size
+        shards.append(targets[start:stop])
+
+    results = []
+    context = get_context()
+    with context.Pool(
+        min(processes, len(shards)), _init_worker, (options, bool(_observers))
+    ) as pool:
+        outcomes = pool.imap(_wake_shard, shards)
+        for shard, (shard_outcomes, events) in zip(shards, outcomes):
+            for target, outcome in zip(shard, shard_outcomes):
+                if isinstance(outcome, str):
+                    results.append(WakeResult(target, None, outcome))
+                else:
+                    results.append(WakeResult(target, outcome, None))
+            if events is not None:
+                _replay(events)
+    return results
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""
+pywol.transmit
+--------------
+This module implements batched transmission of prebuilt magic packets.
+
+On Linux, packets are handed to the kernel in batches with the
+`sendmmsg(2)` system call through ctypes. On other platforms, or if the
+call is unavailable, packets are sent one `sendto` call at a time.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import ctypes
+import errno
+import functools
+import os
+import socket
+import sys
+from array import array
+
+from .packet import PacketArena
+
+MAX_BATCH_SIZE = 1024  # UIO_MAXIOV, the kernel's limit per sendmmsg call.
+
+# Not exposed by the socket module outside of Linux.
+_AF_PACKET = getattr(socket, "AF_PACKET", None)
+
+_WORD_FORMAT = "Q" if ctypes.sizeof(ctypes.c_void_p) == 8 else "I"
+
+
+class _iovec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class _msghdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(_iovec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class _mmsghdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", _msghdr), ("msg_len", ctypes.c_uint)]
+
+
+class _sockaddr_in(ctypes.Structure):
+    _fields_ = [
+        ("sin_family", ctypes.c_ushort),
+        ("sin_port", ctypes.c_uint16),
+        ("sin_addr", ctypes.c_ubyte * 4),
+        ("sin_zero", ctypes.c_ubyte * 8),
+    ]
+
+
+@functools.lru_cache(maxsize=None)
+def _load_sendmmsg():
+    """Return libc's `sendmmsg` function, or None if unavailable."""
+
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        sendmmsg = ctypes.CDLL(None, use_errno=True).sendmmsg
+    except (OSError, AttributeError):
+        return None
+    sendmmsg.argtypes = [
+        ctypes.c_int,
+        ctypes.POINTER(_mmsghdr),
+        ctypes.c_uint,
+        ctypes.c_int,
+    ]
+    sendmmsg.restype = ctypes.c_int
+    return sendmmsg
+
+
+def _buffer_address(payload):
+    """Return the address of `payload`'s data without copying it."""
+
+    if isinstance(payload, bytes):
+        return ctypes.cast(ctypes.c_char_p(payload), ctypes.c_void_p).value
+    return ctypes.addressof((ctypes.c_char * len(payload)).from_buffer(payload))
+
+
+class BatchSender:
+    """Send many datagrams over one socket with as few syscalls as possible.
+
+    In batched mode each packet is staged in a fixed slot of a
+    `PacketArena` whose `sendmmsg` message headers are set up once, so a
+    batch only needs its destinations and lengths filled in, which is
+    done with a few bulk memoryview writes. Packets already built in the
+    sender's arena are sent from where they are without being copied,
+    also when a subset or slice of a batch moves them out of their slot,
+    so that they are never overwritten by staging. Other payloads are
+    copied into their slot, so they must not be mixed in one call with
+    packets built in the arena.
+
+    Parameters
+    ----------
+    sock : socket.socket
+        Broadcast-enabled UDP socket to send with, or an `AF_PACKET`
+        raw socket bound to an interface, whose packets are complete
+        Ethernet frames with a destination of None.
+    batch_size : int, optional
+        Maximum number of packets per `sendmmsg` call.
+        (default is MAX_BATCH_SIZE).
+    batched : bool, optional
+        Flag to use `sendmmsg` where available. (default is True).
+    arena : PacketArena, optional
+        Arena to stage packets in. Must hold at least `batch_size`
+        packets. A new arena is allocated if not supplied.
+
+    """
+
+    def __init__(self, sock, batch_size=MAX_BATCH_SIZE, batched=True, arena=None):
+        self.sock = sock
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self.arena = arena
+        self._sendmmsg = None
+        if batched and sock.family in (socket.AF_INET, _AF_PACKET):
+            self._sendmmsg = _load_sendmmsg()
+        if self._sendmmsg is not None:
+            if self.arena is None:
+                self.arena = PacketArena(self.batch_size)
+            self._setup_buffers()
+
+    def _setup_buffers(self):
+        size = self.batch_size
+        arena = self.arena
+        namelen = 0
+        if self.sock.family == socket.AF_INET:
+            namelen = ctypes.sizeof(_sockaddr_in)
+        self._msgs = (_mmsghdr * size)()
+        self._iovs = (_iovec * size)()
+        for msg, iov in zip(self._msgs, self._iovs):
+            msg.msg_hdr.msg_iov = ctypes.pointer(iov)
+            msg.msg_hdr.msg_iovlen = 1
+            msg.msg_hdr.msg_namelen = namelen
+
+        buffer = arena.buffer
+        base = ctypes.addressof((ctypes.c_char * len(buffer)).from_buffer(buffer))
+        self._slots = memoryview(buffer)
+        self._slot_addresses = array(
+            _WORD_FORMAT, range(base, base + size * arena.slot_size, arena.slot_size)
+        )
+
+        word = ctypes.sizeof(ctypes.c_void_p)
+        self._msg_words = memoryview(self._msgs).cast("B").cast(_WORD_FORMAT)
+        self._msg_stride = ctypes.sizeof(_mmsghdr) // word
+        self._name_index = (_mmsghdr.msg_hdr.offset + _msghdr.msg_name.offset) // word
+        self._iov_words = memoryview(self._iovs).cast("B").cast(_WORD_FORMAT)
+        # Frames on bound packet sockets are sent without a msg_name.
+        self._sockaddrs = {None: (0, None)}
+
+    @property
+    def batched(self):
+        """bool: True if packets are sent with `sendmmsg`."""
+
+        return self._sendmmsg is not None
+
+    def send(self, packets):
+        """Send packets to their destinations.
+
+        Parameters
+        ----------
+        packets : sequence
+            (payload, (ip_address, port)) pairs, or (frame, None) pairs
+            for packet sockets. Payloads may be bytes or any other
+            bytes-like object such as a memoryview slice.
+
+        Returns
+        -------
+        dict(int, OSError)
+            Errors of packets that could not be sent, by index.
+
+        """
+
+        if self._sendmmsg is None:
+            return self._send_each(packets, 0)
+        failures = {}
+        for start in range(0, len(packets), self.batch_size):
+            stop = start + self.batch_size
+            for index, error in self._send_chunk(packets[start:stop]).items():
+                failures[start + index] = error
+            if self._sendmmsg is None:
+                failures.update(self._send_each(packets, stop))
+                break
+        return failures
+
+    def _send_each(self, packets, start):
+        failures = {}
+        sock = self.sock
+        for index in range(start, len(packets)):
+            payload, address = packets[index]
+            try:
+                if address is None:
+                    sock.send(payload)
+                else:
+                    sock.sendto(payload, address)
+            except OSError as e:
+                failures[index] = e
+        return failures
+
+    def _sockaddr(self, address):
+        """Return the address of a cached sockaddr_in for `address`."""
+
+        entry = self._sockaddrs.get(address)
+        if entry is None:
+            ip_address, port = address
+            sockaddr = _sockaddr_in(socket.AF_INET, socket.htons(port))
+            sockaddr.sin_addr[:] = socket.inet_aton(ip_address)
+            entry = self._sockaddrs[address] = (ctypes.addressof(sockaddr), sockaddr)
+        return entry[0]
+
+    def _stage(self, chunk):
+        """Copy `chunk` into the staging buffer and fill in its headers."""
+
+        count = len(chunk)
+        slots = self._slots
+        slot_size = self.arena.slot_size
+        is_packet = self.arena.is_packet
+        buffer = self.arena.buffer
+        sockaddr = self._sockaddr
+        bases = self._slot_addresses[:count]
+        names = array(_WORD_FORMAT)
+        lengths = array(_WORD_FORMAT)
+        offset = 0
+        for index, (payload, address) in enumerate(chunk):
+            size = len(payload)
+            if not is_packet(index, payload):
+                if isinstance(payload, memoryview) and payload.obj is buffer:
+                    # Built in another slot, so sent from there.
+                    bases[index] = _buffer_address(payload)
+                elif size <= slot_size:
+                    end = offset + size
+                    slots[offset:end] = payload
+                else:
+                    bases[index] = _buffer_address(payload)
+            offset += slot_size
+            names.append(sockaddr(address))
+            lengths.append(size)
+
+        first = self._name_index
+        stride = self._msg_stride
+        stop = count * stride
+        self._msg_words[first:stop:stride] = names
+        stop = count * 2
+        self._iov_words[0:stop:2] = bases
+        self._iov_words[1:stop:2] = lengths
+
+    def _send_chunk(self, chunk):
+        self._stage(chunk)
+        msgs = self._msgs
+        failures = {}
+        fd = self.sock.fileno()
+        offset = 0
+        while offset < len(chunk):
+            sent = self._sendmmsg(
+                fd, ctypes.byref(msgs[offset]), len(chunk) - offset, 0
+            )
+            if sent >= 0:
+                offset += sent
+                continue
+            err = ctypes.get_errno()
+            if err == errno.EINTR:
+                continue
+            if err == errno.ENOSYS:
+                self._sendmmsg = None
+                failures.update(self._send_each(chunk, offset))
+                break
+            # The kernel reports the error for the first unsent packet only.
+            failures[offset] = OSError(err, os.strerror(err))
+            offset += 1
+        return failures
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+pywol.vector
+------------
+This module implements vectorized MAC address validation and magic packet
+generation for large inventories with NumPy.
+
+NumPy is an optional dependency, install it with `pip install pywol[vector]`.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+try:
+    import numpy as np
+except ImportError as e:  # pragma: no cover
+    raise ImportError(
+        "pywol.vector requires NumPy, install it with 'pip install pywol[vector]'."
+    ) from e
+
+from .packet import PACKET_SIZE
+
+_SHIFTS = np.arange(40, -1, -8, dtype=np.uint64)
+
+
+def _nibbles(codes):
+    """Return hex digit values of Unicode code points, -1 for non-hex."""
+
+    nibbles = np.full(codes.shape, -1, dtype=np.int8)
+    for first, last, offset in ((48, 57, 48), (65, 70, 55), (97, 102, 87)):
+        in_range = (codes >= first) & (codes <= last)
+        nibbles[in_range] = (codes[in_range] - offset).astype(np.int8)
+    return nibbles
+
+
+def _parse_strings(macs):
+    """Parse an array of MAC address strings.
+
+    Follows the rules of `pywol.wol._clean_mac_address`: all
+    non-hexadecimal characters are dropped, and entries must contain
+    exactly 12 hexadecimal characters.
+
+    """
+
+    macs = np.asarray(macs, dtype=str)
+    count = len(macs)
+    width = macs.dtype.itemsize // 4
+    mac_bytes = np.zeros((count, 6), dtype=np.uint8)
+    if width == 0:
+        return mac_bytes, np.zeros(count, dtype=bool)
+    codes = macs.view(np.uint32).reshape(count, width)
+    nibbles = _nibbles(codes)
+    is_hex = nibbles >= 0
+    valid = is_hex.sum(axis=1) == 12
+    digits = nibbles[valid][is_hex[valid]].reshape(-1, 12).astype(np.uint8)
+    mac_bytes[valid] = (digits[:, 0::2] << 4) | digits[:, 1::2]
+    return mac_bytes, valid
+
+
+def _parse_values(macs):
+    """Parse an array of 48-bit integer MAC addresses."""
+
+    values = np.asarray(macs)
+    valid = (values >= 0) & (values < 1 << 48)
+    values = np.where(valid, values, 0).astype(np.uint64)
+    mac_bytes = ((values[:, None] >> _SHIFTS) & 0xFF).astype(np.uint8)
+    return mac_bytes, valid
+
+
+def _parse(macs):
+    macs = np.asarray(macs)
+    if macs.ndim != 1:
+        raise ValueError("[Error] MAC addresses must be a one-dimensional array.")
+    if macs.dtype.kind in "iu":
+        return _parse_values(macs)
+    if macs.dtype.kind in "UO":
+        return _parse_strings(macs)
+    raise TypeError(f"[Error] Invalid MAC address array type: {macs.dtype}")
+
+
+def validate_macs(macs):
+    """Validate an array of MAC addresses.
+
+    Parameters
+    ----------
+    macs : array_like
+        One-dimensional array of MAC address strings in any notation, or
+        of integer MAC addresses.
+
+    Returns
+    -------
+    numpy.ndarray
+        Indices of invalid entries.
+
+    Raises
+    ------
+    ValueError
+        If `macs` is not one-dimensional.
+    TypeError
+        If `macs` is neither a string nor an integer array.
+
+    """
+
+    return np.flatnonzero(~_parse(macs)[1])
+
+
+def mac_values(macs):
+    """Convert an array of MAC addresses to 48-bit integers.
+
+    Parameters
+    ----------
+    macs : array_like
+        One-dimensional array of MAC address strings or integers.
+
+    Returns
+    -------
+    tuple(numpy.ndarray, numpy.ndarray)
+        uint64 MAC addresses, with 0 for invalid entries, and the
+        indices of invalid entries.
+
+    """
+
+    mac_bytes, valid = _parse(macs)
+    values = (mac_bytes.astype(np.uint64) << _SHIFTS).sum(axis=1, dtype=np.uint64)
+    return values, np.flatnonzero(~valid)
+
+
+def magic_packets(macs):
+    """Generate magic packets for an array of MAC addresses.
+
+    Parameters
+    ----------
+    macs : array_like
+        One-dimensional array of MAC address strings or integers.
+
+    Returns
+    -------
+    tuple(numpy.ndarray, numpy.ndarray)
+        (N, 102) uint8 array of magic packet payloads, with all-zero rows
+        for invalid entries, and the indices of invalid entries.
+
+    """
+
+    mac_bytes, valid = _parse(macs)
+    packets = np.zeros((len(mac_bytes), PACKET_SIZE), dtype=np.uint8)
+    packets[:, :6] = 0xFF
+    packets[:, 6:] = np.tile(mac_bytes, 16)
+    packets[~valid] = 0
+    return packets, np.flatnonzero(~valid)
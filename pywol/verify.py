@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+pywol.verify
+------------
+This module implements waking hosts and waiting until they are reachable.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import asyncio
+from collections import namedtuple
+
+from .aio import WakeSender
+from .wol import _prepare_target
+
+BACKOFF = (1.0, 2.0, 4.0, 8.0, 15.0, 30.0)
+
+WaitResult = namedtuple("WaitResult", ["target", "latency", "sent", "error"])
+WaitResult.__doc__ = """Outcome of a single host woken by `wake_and_wait`.
+
+Attributes
+----------
+target
+    The host entry as supplied by the caller.
+latency : float or None
+    Seconds from the first magic packet until the host answered a
+    probe, None if it never did.
+sent : int
+    Number of magic packets sent, including retransmissions.
+error : str or None
+    Error message if the host did not come up, else None.
+
+"""
+
+
+async def _probe_tcp(host, port, timeout):
+    """Return True if `host` accepts or actively refuses a TCP connection."""
+
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except ConnectionRefusedError:
+        return True
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    return True
+
+
+class _EchoProtocol(asyncio.DatagramProtocol):
+    """Resolve `reply` once the peer answers or its port is unreachable."""
+
+    def __init__(self, reply):
+        self.reply = reply
+
+    def datagram_received(self, data, addr):
+        if not self.reply.done():
+            self.reply.set_result(True)
+
+    def error_received(self, exc):
+        if not self.reply.done():
+            self.reply.set_result(isinstance(exc, ConnectionRefusedError))
+
+
+async def _probe_udp(host, port, timeout):
+    """Return True if `host` echoes a UDP datagram or refuses it."""
+
+    loop = asyncio.get_event_loop()
+    reply = loop.create_future()
+    try:
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _EchoProtocol(reply), remote_addr=(host, port)
+        )
+    except OSError:
+        return False
+    try:
+        transport.sendto(b"pywol")
+        return await asyncio.wait_for(reply, timeout)
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        transport.close()
+
+
+_PROBES = {"tcp": _probe_tcp, "udp": _probe_udp}
+
+
+def _unpack_host(entry):
+    """Split a host entry into its wake target and probe address."""
+
+    if isinstance(entry, (tuple, list)) and 2 <= len(entry) <= 5:
+        mac_address, host, *rest = entry
+        return (mac_address, *rest), host
+    raise TypeError(f"[Error] Invalid host: {entry!r}")
+
+
+async def _wake_and_wait_host(entry, sender, limit, deadline, options):
+    """Wake and probe a single host until it is up or `deadline` passes."""
+
+    loop = asyncio.get_event_loop()
+    try:
+        target, host = _unpack_host(entry)
+        payload, valid_ip_address, valid_port = _prepare_target(
+            target, options["ip_address"], options["port"]
+        )
+    except (ValueError, TypeError) as e:
+        return WaitResult(entry, None, 0, str(e))
+
+    probe = _PROBES[options["probe"]]
+    backoff = options["backoff"]
+    start = loop.time()
+    next_send = start
+    sent = 0
+    while True:
+        now = loop.time()
+        if now >= next_send:
+            try:
+                await sender.send(payload, valid_ip_address, valid_port)
+            except OSError:
+                error = (
+                    f"[Error] Cannot send broadcast to IP address: {valid_ip_address}"
+                )
+                return WaitResult(entry, None, sent, error)
+            delay = backoff[min(sent, len(backoff) - 1)] if backoff else None
+            next_send = float("inf") if delay is None else now + delay
+            sent += 1
+
+        remaining = deadline - now
+        if remaining <= 0:
+            return WaitResult(
+                entry, None, sent, f"[Error] Host did not come up: {host}"
+            )
+        async with limit:
+            up = await probe(
+                host, options["probe_port"], min(options["probe_interval"], remaining)
+            )
+        if up:
+            return WaitResult(entry, loop.time() - start, sent, None)
+        pause = now + options["probe_interval"] - loop.time()
+        if pause > 0:
+            await asyncio.sleep(min(pause, max(deadline - loop.time(), 0)))
+
+
+async def wake_and_wait(
+    hosts,
+    *,
+    probe_port=22,
+    probe="tcp",
+    timeout=300.0,
+    probe_interval=1.0,
+    backoff=BACKOFF,
+    concurrency=1024,
+    ip_address="255.255.255.255",
+    port=9,
+):
+    """Wake hosts and wait until they are reachable.
+
+    Every host is handled concurrently: its magic packet is retransmitted
+    on the `backoff` schedule while the host is probed every
+    `probe_interval` seconds, until it answers or `timeout` expires for
+    the whole batch. A TCP probe succeeds once the host accepts or
+    refuses a connection on `probe_port`, and a UDP probe once it echoes
+    a datagram or reports the port unreachable, since either means its
+    network stack is up.
+
+    Parameters
+    ----------
+    hosts : iterable
+        Host entries, each a tuple of (mac_address, host),
+        (mac_address, host, ip_address),
+        (mac_address, host, ip_address, port) or
+        (mac_address, host, ip_address, port, password), where `host` is
+        the address to probe, `ip_address` & `port` are where to send the
+        magic packet and `password` is the host's SecureOn password.
+    probe_port : int, optional
+        Port to probe. (default is 22).
+    probe : str, optional
+        Probe type, 'tcp' or 'udp'. (default is 'tcp').
+    timeout : float, optional
+        Seconds to wait for all hosts. (default is 300.0).
+    probe_interval : float, optional
+        Seconds between probes of a host. (default is 1.0).
+    backoff : sequence of float, optional
+        Seconds between retransmissions, the last one repeating. An
+        empty sequence sends a single packet. (default is BACKOFF).
+    concurrency : int, optional
+        Maximum number of probes in flight. (default is 1024).
+    ip_address : str, optional
+        IPv4 address for hosts that don't specify one.
+        (default is '255.255.255.255').
+    port : int, optional
+        Port for hosts that don't specify one. (default is 9).
+
+    Returns
+    -------
+    list(WaitResult)
+        One result per host, in input order.
+
+    Raises
+    ------
+    ValueError
+        If `probe` is not 'tcp' or 'udp'.
+
+    """
+
+    if probe not in _PROBES:
+        raise ValueError(f"[Error] Invalid probe type: {probe}")
+    options = {
+        "probe": probe,
+        "probe_port": probe_port,
+        "probe_interval": probe_interval,
+        "backoff": tuple(backoff),
+        "ip_address": ip_address,
+        "port": port,
+    }
+    loop = asyncio.get_event_loop()
+    deadline = loop.time() + timeout
+    limit = asyncio.Semaphore(concurrency)
+    async with WakeSender() as sender:
+        return await asyncio.gather(
+            *(
+                _wake_and_wait_host(entry, sender, limit, deadline, options)
+                for entry in hosts
+            )
+        )
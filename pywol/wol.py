@@ -9,12 +9,80 @@ license: MIT, see LICENSE for more details.
 
 """
 
-import ipaddress
-import re
+import functools
 import socket
+from collections import namedtuple
+from itertools import islice
+from time import perf_counter
 
-NON_HEX_CHARS = re.compile(r"[^a-f0-9]", re.IGNORECASE)
-MAC_PATTERN = re.compile(r"^[a-f0-9]{12}$", re.IGNORECASE)
+from .cache import PacketCache
+from .mac import MacAddress, _split_mac
+from .metrics import _notify_outcome, _notify_stages, _observers
+from .packet import PacketArena
+
+WakeResult = namedtuple("WakeResult", ["target", "dest", "error"])
+WakeResult.__doc__ = """Outcome of a single target sent by `wake_many`.
+
+Attributes
+----------
+target
+    The target entry as supplied by the caller.
+dest : tuple(str, str) or None
+    Destination IP & port of the sent packet, None on failure.
+error : str or None
+    Error message if the target could not be woken, else None.
+
+"""
+
+SENT = "sent"
+FAILED = "failed"
+INVALID = "invalid"
+
+
+class WakeRecord:
+    """Outcome of a single target streamed by `iter_wake`.
+
+    Attributes
+    ----------
+    target
+        The target entry as supplied by the caller.
+    dest : tuple(str, str) or None
+        Destination IP & port of the packet, None if the target was
+        invalid.
+    status : str
+        SENT, FAILED if the packet could not be sent, or INVALID if the
+        target was rejected.
+    errno : int or None
+        Error number of the failed send, else None.
+    error : str or None
+        Error message if the target could not be woken, else None.
+    elapsed : float
+        Seconds from starting to process the target until its packet was
+        handed to the kernel or it was rejected.
+    copies : int
+        Number of copies of the packet sent, more than 1 with a
+        retransmit policy.
+
+    """
+
+    __slots__ = ("target", "dest", "status", "errno", "error", "elapsed", "copies")
+
+    def __init__(self, target, dest, status, errno, error, elapsed, copies=0):
+        self.target = target
+        self.dest = dest
+        self.status = status
+        self.errno = errno
+        self.error = error
+        self.elapsed = elapsed
+        self.copies = copies
+
+    def __repr__(self):
+        return (
+            f"WakeRecord(target={self.target!r}, dest={self.dest!r}, "
+            f"status={self.status!r}, errno={self.errno!r}, "
+            f"error={self.error!r}, elapsed={self.elapsed!r}, "
+            f"copies={self.copies!r})"
+        )
 
 
 def _clean_mac_address(mac_address_supplied):
@@ -25,7 +93,7 @@ def _clean_mac_address(mac_address_supplied):
 
     Parameters
     ----------
-    mac_address_supplied : str
+    mac_address_supplied : str or MacAddress
         Supplied MAC address.
 
     Returns
@@ -41,20 +109,79 @@ def _clean_mac_address(mac_address_supplied):
 
     """
 
-    mac_address_cleaned = NON_HEX_CHARS.sub("", mac_address_supplied)
-    if MAC_PATTERN.fullmatch(mac_address_cleaned):
-        return mac_address_cleaned
-    else:
-        raise ValueError(f"[Error] Invalid MAC address: {mac_address_supplied}")
+    if isinstance(mac_address_supplied, MacAddress):
+        return mac_address_supplied.hex
+    return _split_mac(mac_address_supplied)[0]
+
+
+_DECIMAL_DIGITS = frozenset("0123456789")
+
+
+def _is_plain_ipv4(ip):
+    """Return True if `ip` is a dotted-quad IPv4 address in canonical form.
+
+    Lets the common case skip importing `ipaddress`, which is only needed
+    for netmasks and for rejecting or normalizing unusual input.
+
+    """
+
+    octets = ip.split(".")
+    if len(octets) != 4:
+        return False
+    for octet in octets:
+        if not 0 < len(octet) <= 3 or not _DECIMAL_DIGITS.issuperset(octet):
+            return False
+        if (octet[0] == "0" and len(octet) > 1) or int(octet) > 255:
+            return False
+    return True
+
+
+def _evaluate_ipv6_address(ip, ip_address):
+    """Evaluate a stripped IPv6 address with optional '%scope' suffix.
+
+    Returns the compressed address, with its scope if given. Link-local
+    addresses such as the all-nodes multicast address 'ff02::1' require
+    a scope naming the interface to send from, e.g. 'ff02::1%eth0'.
+
+    Raises
+    ------
+    ValueError
+        If `ip` is not a valid IPv6 address, or is link-local without a
+        scope.
+
+    """
+
+    import ipaddress
+
+    address, separator, scope = ip.partition("%")
+    try:
+        address = ipaddress.IPv6Address(address)
+    except ipaddress.AddressValueError as e:
+        raise ValueError(f"[Error] Invalid IP address: {ip_address}") from e
+    if separator and not scope:
+        raise ValueError(f"[Error] Invalid IP address: {ip_address}")
+    # Multicast scopes 1 & 2 are interface- and link-local.
+    link_local = address.is_link_local or (
+        address.is_multicast and address.packed[1] & 0x0F <= 2
+    )
+    if link_local and not scope:
+        error = "[Error] IPv6 link-local address requires an interface scope"
+        raise ValueError(f"{error}: {ip_address}")
+    return f"{address}%{scope}" if scope else str(address)
 
 
+@functools.lru_cache(maxsize=1024)
 def _evaluate_ip_address(ip_address):
     """Evaluate supplied IPv4 address.
 
     Returns the supplied IPv4 address if valid and specified without a
     netmask, or returns the subnet broadcast address if the supplied
     IPV4 address is specified with a netmask such as '192.168.1.5/24' or
-    '192.168.1.5/255.255.255.0'.
+    '192.168.1.5/255.255.255.0'. IPv6 addresses, such as the link-local
+    all-nodes multicast address with an interface scope 'ff02::1%eth0',
+    are returned compressed.
+
+    Results are memoized, as targets usually share few distinct addresses.
 
     Parameters
     ----------
@@ -69,11 +196,18 @@ def _evaluate_ip_address(ip_address):
     Raises
     ------
     ValueError
-        If `ip_address` does not contain a valid IPv4 address.
+        If `ip_address` does not contain a valid IPv4 or IPv6 address.
 
     """
 
     ip = ip_address.strip()
+    if _is_plain_ipv4(ip):
+        return ip
+
+    import ipaddress
+
+    if ":" in ip:
+        return _evaluate_ipv6_address(ip, ip_address)
     try:
         ip = str(ipaddress.IPv4Address(ip))
     except ipaddress.AddressValueError:
@@ -84,43 +218,196 @@ def _evaluate_ip_address(ip_address):
     return ip
 
 
-def _generate_magic_packet(mac_address):
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+
+
+def _clean_password(password):
+    """Clean and validate a SecureOn password.
+
+    Parameters
+    ----------
+    password : str, bytes or None
+        4- or 6-byte password, as bytes, as hexadecimal digits with
+        optional ':' or '-' separators, e.g. '01:02:03:04:05:06', or as
+        a dotted-decimal 4-byte password, e.g. '192.168.1.1'.
+
+    Returns
+    -------
+    str
+        8- or 12-digit hexadecimal password without separators, or an
+        empty string if `password` is None or empty.
+
+    Raises
+    ------
+    ValueError
+        If `password` is not a valid 4- or 6-byte password.
+    TypeError
+        If `password` is of an unsupported type.
+
+    """
+
+    if not password:
+        return ""
+    if isinstance(password, (bytes, bytearray)):
+        if len(password) in (4, 6):
+            return password.hex().upper()
+        raise ValueError(f"[Error] Invalid SecureOn password: {password!r}")
+    if not isinstance(password, str):
+        raise TypeError(f"[Error] Invalid SecureOn password: {password!r}")
+    cleaned = password.strip()
+    if "." in cleaned:
+        octets = cleaned.split(".")
+        if len(octets) == 4 and all(
+            octet.isdigit() and int(octet) <= 255 for octet in octets
+        ):
+            return bytes(int(octet) for octet in octets).hex().upper()
+    else:
+        cleaned = cleaned.replace(":", "").replace("-", "")
+        if len(cleaned) in (8, 12) and set(cleaned) <= _HEX_DIGITS:
+            return cleaned.upper()
+    raise ValueError(f"[Error] Invalid SecureOn password: {password}")
+
+
+def _generate_magic_packet(mac_address, password=""):
     """Generate WoL magic packet.
 
     A  WoL 'magic packet' payload consists of six FF (255 decimal) bytes
-    followed by sixteen repetitions of the target's 6-byte MAC address.
+    followed by sixteen repetitions of the target's 6-byte MAC address,
+    and optionally a 4- or 6-byte SecureOn password.
 
     Parameters
     ----------
     mac_address : str
         12-digit hexadecimal MAC address without separators.
+    password : str, optional
+        8- or 12-digit hexadecimal SecureOn password without separators.
+        (default is no password).
 
     Returns
     -------
     bytes
-        102-byte magic packet payload.
+        102-byte magic packet payload, or 106 or 108 bytes with a
+        password.
+
+    """
+
+    return b"\xff" * 6 + bytes.fromhex(mac_address) * 16 + bytes.fromhex(password)
+
+
+def _scope_index(scope):
+    """Return the interface index of an IPv6 scope name or number."""
+
+    return int(scope) if scope.isdigit() else socket.if_nametoindex(scope)
+
+
+def _open_broadcast_socket(family=socket.AF_INET, scope=None):
+    """Open a broadcast-enabled UDP socket.
+
+    Parameters
+    ----------
+    family : int, optional
+        Socket address family. (default is socket.AF_INET).
+    scope : str, optional
+        For AF_INET6, name or index of the interface to send multicast
+        packets from.
+
+    Returns
+    -------
+    socket.socket
+        UDP socket with SO_BROADCAST set, or for AF_INET6 a socket
+        sending multicast packets with a hop limit of 1 from the
+        `scope` interface.
+
+    """
+
+    sock = socket.socket(family, socket.SOCK_DGRAM)
+    try:
+        if family == socket.AF_INET6:
+            sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_MULTICAST_HOPS, 1)
+            if scope is not None:
+                sock.setsockopt(
+                    socket.IPPROTO_IPV6, socket.IPV6_MULTICAST_IF, _scope_index(scope)
+                )
+        else:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _transport(ip_address):
+    """Return the (family, scope) of the socket sending to `ip_address`."""
+
+    if ":" not in ip_address:
+        return socket.AF_INET, None
+    scope = ip_address.partition("%")[2]
+    return socket.AF_INET6, scope or None
+
+
+class _SocketPool:
+    """Lazily opened broadcast sockets, one per address family and scope.
+
+    Lets bulk sends reuse a single socket instead of paying for a
+    socket(), setsockopt() and close() syscall round trip per packet.
+    IPv6 sockets are kept per interface scope, as the multicast
+    interface is a socket option. Use as a context manager to close all
+    pooled sockets on exit.
 
     """
 
-    return bytes.fromhex("FF" * 6 + mac_address * 16)
+    def __init__(self):
+        self._sockets = {}
+
+    def get(self, family=socket.AF_INET, scope=None):
+        """Return the pooled socket for `family` & `scope`, opening it if needed."""
+
+        key = (family, scope)
+        sock = self._sockets.get(key)
+        if sock is None:
+            sock = self._sockets[key] = _open_broadcast_socket(family, scope)
+        return sock
+
+    def close(self):
+        """Close all pooled sockets."""
+
+        for sock in self._sockets.values():
+            sock.close()
+        self._sockets.clear()
+
+    def __enter__(self):
+        return self
 
+    def __exit__(self, *exc_info):
+        self.close()
 
-def _send_udp_broadcast(payload, ip_address, port):
+
+packet_cache = PacketCache(_generate_magic_packet)
+"""PacketCache: Payloads reused by `wake` and `wake_many`."""
+
+
+def _send_udp_broadcast(payload, ip_address, port, sock=None):
     """Send data as UDP broadcast message.
 
     Parameters
     ----------
-    payload : bytes
-        Should be 102-byte magic packet payload.
+    payload : bytes-like
+        Should be 102-byte magic packet payload, as bytes or a
+        memoryview slice of a `PacketArena`.
     ip_address : str
-        Target IP address.
+        Target IPv4 address, or IPv6 address with optional '%scope'.
     port : int
         Target port.
+    sock : socket.socket, optional
+        Broadcast-enabled socket to send with. A new socket is opened
+        and closed for this packet if not supplied.
 
     """
 
-    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
-        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    if sock is not None:
+        sock.sendto(payload, (ip_address, port))
+        return
+    with _open_broadcast_socket(*_transport(ip_address)) as sock:
         sock.sendto(payload, (ip_address, port))
 
 
@@ -154,7 +441,16 @@ def _validate_port_number(port_number):
         raise ValueError(f"[Error] Invalid port number: {port_number}")
 
 
-def wake(mac_address, *, ip_address="255.255.255.255", port=9, return_dest=False):
+def wake(
+    mac_address,
+    *,
+    ip_address="255.255.255.255",
+    port=9,
+    return_dest=False,
+    pacer=None,
+    retransmit=None,
+    password=None,
+):
     """Generate and send WoL magic packet.
 
     Prefer to specify the IPv4 broadcast address of the target host's
@@ -164,6 +460,9 @@ def wake(mac_address, *, ip_address="255.255.255.255", port=9, return_dest=False
     specify the target host's IPv4 address along with its netmask. E.g.
     '192.168.1.5/24' or '192.168.1.5/255.255.255.0' --> '192.168.1.255'
 
+    Payloads are reused from `packet_cache`, whose size can be changed
+    by setting `packet_cache.maxsize`.
+
     Parameters
     ----------
     mac_address : str
@@ -175,6 +474,17 @@ def wake(mac_address, *, ip_address="255.255.255.255", port=9, return_dest=False
     return_dest : bool, optional
         Flag to return package destination ip & port on success.
         (default is False).
+    pacer : TokenBucket, optional
+        Rate limiter shared by successive calls, e.g. a
+        `pywol.pacing.TokenBucket`, to keep tight loops from flooding
+        the network.
+    retransmit : RetransmitPolicy, optional
+        Policy sending the packet several times, e.g. a
+        `pywol.retransmit.RetransmitPolicy`. The packet counts as sent
+        if any copy was sent.
+    password : str or bytes, optional
+        4- or 6-byte SecureOn password appended to the packet, e.g.
+        '01:02:03:04:05:06' or '192.168.1.1'. (default is no password).
 
     Returns
     -------
@@ -184,8 +494,17 @@ def wake(mac_address, *, ip_address="255.255.255.255", port=9, return_dest=False
 
     """
 
+    if retransmit is not None:
+        return _wake_retransmit(
+            mac_address, ip_address, port, return_dest, pacer, retransmit, password
+        )
+    if _observers:
+        return _wake_observed(
+            mac_address, ip_address, port, return_dest, pacer, password
+        )
     try:
         mac_cleaned = _clean_mac_address(mac_address)
+        password_cleaned = _clean_password(password) if password else ""
         valid_ip_address = _evaluate_ip_address(ip_address)
         valid_port = _validate_port_number(port)
     except ValueError as e:
@@ -193,7 +512,9 @@ def wake(mac_address, *, ip_address="255.255.255.255", port=9, return_dest=False
     except TypeError as e:
         print(e)
     else:
-        payload = _generate_magic_packet(mac_cleaned)
+        payload = packet_cache.get(mac_cleaned, password_cleaned)
+        if pacer is not None:
+            pacer.acquire()
         try:
             _send_udp_broadcast(payload, valid_ip_address, valid_port)
         except OSError:
@@ -201,3 +522,564 @@ def wake(mac_address, *, ip_address="255.255.255.255", port=9, return_dest=False
         else:
             if return_dest is True:
                 return (valid_ip_address, str(valid_port))
+
+
+def _timed_prepare(mac, ip, port_number, password, resolve, build, timings):
+    """Validate a target and build its payload, timing each stage.
+
+    Adds the seconds spent parsing, resolving and building to the first
+    three items of `timings`.
+
+    Returns
+    -------
+    tuple(bytes, str, int)
+        Magic packet payload, destination IP address & port.
+
+    """
+
+    start = perf_counter()
+    mac_cleaned = _clean_mac_address(mac)
+    password_cleaned = _clean_password(password) if password else ""
+    parsed = perf_counter()
+    valid_ip_address = resolve(ip)
+    valid_port = _validate_port_number(port_number)
+    resolved = perf_counter()
+    payload = build(mac_cleaned, password_cleaned)
+    timings[0] += parsed - start
+    timings[1] += resolved - parsed
+    timings[2] += perf_counter() - resolved
+    return payload, valid_ip_address, valid_port
+
+
+def _wake_observed(mac_address, ip_address, port, return_dest, pacer, password):
+    """`wake` reporting stage timings and outcome to `pywol.metrics` observers."""
+
+    timings = [0.0, 0.0, 0.0, 0.0]
+    try:
+        payload, valid_ip_address, valid_port = _timed_prepare(
+            mac_address,
+            ip_address,
+            port,
+            password,
+            _evaluate_ip_address,
+            packet_cache.get,
+            timings,
+        )
+    except (ValueError, TypeError) as e:
+        print(e)
+        _notify_outcome(0, invalid=(str(e),))
+        return
+    if pacer is not None:
+        pacer.acquire()
+    start = perf_counter()
+    try:
+        _send_udp_broadcast(payload, valid_ip_address, valid_port)
+    except OSError as e:
+        timings[3] = perf_counter() - start
+        _notify_stages(timings, 1)
+        _notify_outcome(0, errors=(e,))
+        print(f"[Error] Cannot send broadcast to IP address: {valid_ip_address}")
+    else:
+        timings[3] = perf_counter() - start
+        _notify_stages(timings, 1)
+        _notify_outcome(1)
+        if return_dest is True:
+            return (valid_ip_address, str(valid_port))
+
+
+def _wake_retransmit(
+    mac_address, ip_address, port, return_dest, pacer, retransmit, password
+):
+    """`wake` sending the packet according to a retransmit policy."""
+
+    with _SocketPool() as pool:
+        (result,) = _wake_iter(
+            [(mac_address, ip_address, port, password)],
+            ip_address,
+            port,
+            pool,
+            pacer=pacer,
+            retransmit=retransmit,
+        )
+    if result.error is not None:
+        print(result.error)
+    elif return_dest is True:
+        return result.dest
+
+
+def _unpack_target(target, ip_address, port, password=None):
+    """Unpack a `wake_many` target entry.
+
+    Parameters
+    ----------
+    target : str, MacAddress or tuple
+        MAC address, or a (mac, ip), (mac, ip, port) or
+        (mac, ip, port, password) tuple.
+    ip_address : str
+        IP address to use if the entry doesn't specify one.
+    port : int
+        Port to use if the entry doesn't specify one.
+    password : str or bytes, optional
+        SecureOn password to use if the entry doesn't specify one.
+
+    Returns
+    -------
+    tuple(str, str, int, str)
+        MAC address, IP address, port & password of the target.
+
+    Raises
+    ------
+    TypeError
+        If `target` is not a string or a tuple of 1 - 4 items.
+
+    """
+
+    if isinstance(target, (str, MacAddress)):
+        return target, ip_address, port, password
+    if isinstance(target, (tuple, list)) and 1 <= len(target) <= 4:
+        entry = tuple(target)
+        missing = len(entry) - 1
+        return entry + (ip_address, port, password)[missing:]
+    raise TypeError(f"[Error] Invalid target: {target!r}")
+
+
+def _validate_target(
+    target, ip_address, port, resolve=_evaluate_ip_address, password=None
+):
+    """Validate a target entry.
+
+    Parameters
+    ----------
+    target : str or tuple
+        Target entry as accepted by `wake_many`.
+    ip_address : str
+        IP address to use if the entry doesn't specify one.
+    port : int
+        Port to use if the entry doesn't specify one.
+    resolve : callable, optional
+        Function evaluating the IP address.
+        (default is `_evaluate_ip_address`).
+    password : str or bytes, optional
+        SecureOn password to use if the entry doesn't specify one.
+
+    Returns
+    -------
+    tuple(str, str, int, str)
+        Cleaned MAC address, destination IP address, port & cleaned
+        password, an empty string if there is none.
+
+    Raises
+    ------
+    ValueError
+        If the MAC address, IP address, port number or password is
+        invalid.
+    TypeError
+        If the entry, port number or password is of the wrong type.
+
+    """
+
+    mac, ip, port_number, entry_password = _unpack_target(
+        target, ip_address, port, password
+    )
+    mac_cleaned = _clean_mac_address(mac)
+    password_cleaned = _clean_password(entry_password) if entry_password else ""
+    valid_ip_address = resolve(ip)
+    valid_port = _validate_port_number(port_number)
+    return mac_cleaned, valid_ip_address, valid_port, password_cleaned
+
+
+def _prepare_target(
+    target, ip_address, port, password=None, resolve=_evaluate_ip_address, timings=None
+):
+    """Validate a target entry and look up its magic packet.
+
+    Accepts the same arguments as `_validate_target`, and `timings`, a
+    list to add stage timings to as `_timed_prepare` does, for callers
+    reporting to `pywol.metrics` observers.
+
+    Returns
+    -------
+    tuple(bytes, str, int)
+        Magic packet payload, destination IP address & port.
+
+    """
+
+    if timings is not None:
+        return _timed_prepare(
+            *_unpack_target(target, ip_address, port, password),
+            resolve,
+            packet_cache.get,
+            timings,
+        )
+    mac_cleaned, valid_ip_address, valid_port, password_cleaned = _validate_target(
+        target, ip_address, port, resolve, password
+    )
+    return (
+        packet_cache.get(mac_cleaned, password_cleaned),
+        valid_ip_address,
+        valid_port,
+    )
+
+
+def _chunked(iterable, size):
+    """Yield successive lists of up to `size` items from `iterable`."""
+
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def _send_batch(sender, packets, pacer=None):
+    """Send `packets` with `sender`, paced by `pacer` if supplied.
+
+    Paced packets are handed to the sender in slices no larger than the
+    pacer's burst size, each once its tokens are available.
+
+    Returns
+    -------
+    dict(int, OSError)
+        Errors of packets that could not be sent, by index.
+
+    """
+
+    if pacer is None:
+        return sender.send(packets)
+    failures = {}
+    for start in range(0, len(packets), pacer.burst):
+        stop = min(start + pacer.burst, len(packets))
+        pacer.acquire(stop - start)
+        for index, error in sender.send(packets[start:stop]).items():
+            failures[start + index] = error
+    return failures
+
+
+def _send_packets(senders, pool, packets, batch_size, arena=None, pacer=None):
+    """Send `packets` over the pooled sockets matching their destinations.
+
+    IPv4 packets are sent over the pool's IPv4 socket and IPv6 packets
+    over one socket per interface scope, so mixed fleets go out in one
+    pass. Senders are created on first use and kept in `senders` by
+    (family, scope). Only IPv4 senders stage packets in `arena`.
+
+    Returns
+    -------
+    dict(int, OSError)
+        Errors of packets that could not be sent, by index.
+
+    """
+
+    groups = {}
+    for index, packet in enumerate(packets):
+        if ":" in packet[1][0]:
+            groups.setdefault(_transport(packet[1][0]), []).append(index)
+    if not groups:
+        return _send_group(senders, pool, packets, batch_size, arena, pacer)
+
+    ipv6_indices = set()
+    for indices in groups.values():
+        ipv6_indices.update(indices)
+    groups[(socket.AF_INET, None)] = [
+        index for index in range(len(packets)) if index not in ipv6_indices
+    ]
+    failures = {}
+    for indices in groups.values():
+        if not indices:
+            continue
+        group = [packets[index] for index in indices]
+        errors = _send_group(senders, pool, group, batch_size, arena, pacer)
+        for group_index, error in errors.items():
+            failures[indices[group_index]] = error
+    return failures
+
+
+def _send_group(senders, pool, packets, batch_size, arena, pacer):
+    """Send `packets`, which share a transport, with a pooled sender."""
+
+    from .transmit import BatchSender
+
+    key = _transport(packets[0][1][0])
+    sender = senders.get(key)
+    if sender is None:
+        try:
+            sock = pool.get(*key)
+        except OSError as e:
+            return dict.fromkeys(range(len(packets)), e)
+        if key[0] != socket.AF_INET:
+            arena = None
+        sender = senders[key] = BatchSender(sock, batch_size, arena=arena)
+    return _send_batch(sender, packets, pacer)
+
+
+def _wake_iter(
+    targets,
+    ip_address,
+    port,
+    pool,
+    batch_size=None,
+    cache=True,
+    resolve=_evaluate_ip_address,
+    pacer=None,
+    record=False,
+    retransmit=None,
+    password=None,
+):
+    """Validate and send magic packets for `targets` in batches.
+
+    Targets are consumed lazily, `batch_size` at a time (default is
+    `pywol.transmit.MAX_BATCH_SIZE`), and each batch of valid packets is
+    handed to a `BatchSender` in one go, or in bursts if paced by
+    `pacer`. Payloads are looked up in `packet_cache` or, if `cache` is
+    False, packed into the sender's reusable `PacketArena`. With a
+    `retransmit` policy, each batch is sent once per policy round.
+    `password` is the SecureOn password of targets without their own.
+
+    Yields
+    ------
+    WakeResult or WakeRecord
+        Outcome for each target, in input order. WakeRecords are
+        yielded if `record` is True.
+
+    """
+
+    from .transmit import MAX_BATCH_SIZE
+
+    if batch_size is None:
+        batch_size = MAX_BATCH_SIZE
+    senders = {}
+    arena = None if cache else PacketArena(batch_size)
+    for chunk in _chunked(targets, batch_size):
+        results = [None] * len(chunk)
+        packets = []
+        indices = []
+        observed = bool(_observers)
+        if observed:
+            timings = [0.0, 0.0, 0.0, 0.0]
+            invalid = []
+            if cache:
+                build = packet_cache.get
+            else:
+
+                def build(mac_cleaned, password_cleaned):
+                    return arena.pack(
+                        len(packets),
+                        bytes.fromhex(mac_cleaned),
+                        bytes.fromhex(password_cleaned),
+                    )
+
+        if record:
+            starts = [0.0] * len(chunk)
+        for index, target in enumerate(chunk):
+            if record:
+                starts[index] = perf_counter()
+            try:
+                if observed:
+                    payload, valid_ip_address, valid_port = _timed_prepare(
+                        *_unpack_target(target, ip_address, port, password),
+                        resolve,
+                        build,
+                        timings,
+                    )
+                else:
+                    (
+                        mac_cleaned,
+                        valid_ip_address,
+                        valid_port,
+                        password_cleaned,
+                    ) = _validate_target(target, ip_address, port, resolve, password)
+                    if cache:
+                        payload = packet_cache.get(mac_cleaned, password_cleaned)
+                    elif password_cleaned:
+                        payload = arena.pack(
+                            len(packets),
+                            bytes.fromhex(mac_cleaned),
+                            bytes.fromhex(password_cleaned),
+                        )
+                    else:
+                        payload = arena.pack(len(packets), bytes.fromhex(mac_cleaned))
+            except (ValueError, TypeError) as e:
+                if record:
+                    elapsed = perf_counter() - starts[index]
+                    results[index] = WakeRecord(
+                        target, None, INVALID, None, str(e), elapsed
+                    )
+                else:
+                    results[index] = WakeResult(target, None, str(e))
+                if observed:
+                    invalid.append(str(e))
+                continue
+            packets.append((payload, (valid_ip_address, valid_port)))
+            indices.append(index)
+        failures = {}
+        copies = None
+        if packets:
+            start = perf_counter() if observed else 0.0
+            if retransmit is None:
+                failures = _send_packets(
+                    senders, pool, packets, batch_size, arena, pacer
+                )
+            else:
+                failures, copies = retransmit.send(
+                    lambda group: _send_packets(
+                        senders, pool, group, batch_size, arena, pacer
+                    ),
+                    packets,
+                )
+            if observed:
+                timings[3] = perf_counter() - start
+                _notify_stages(timings, len(packets))
+            if record:
+                sent_at = perf_counter()
+            for packet_index, (index, packet) in enumerate(zip(indices, packets)):
+                valid_ip_address, valid_port = packet[1]
+                dest = (valid_ip_address, str(valid_port))
+                if packet_index in failures:
+                    error = (
+                        "[Error] Cannot send broadcast to IP address: "
+                        f"{valid_ip_address}"
+                    )
+                    if record:
+                        results[index] = WakeRecord(
+                            chunk[index],
+                            dest,
+                            FAILED,
+                            failures[packet_index].errno,
+                            error,
+                            sent_at - starts[index],
+                        )
+                    else:
+                        results[index] = WakeResult(chunk[index], None, error)
+                elif record:
+                    results[index] = WakeRecord(
+                        chunk[index],
+                        dest,
+                        SENT,
+                        None,
+                        None,
+                        sent_at - starts[index],
+                        1 if copies is None else copies[packet_index],
+                    )
+                else:
+                    results[index] = WakeResult(chunk[index], dest, None)
+        if observed:
+            if copies is None:
+                sent = len(packets) - len(failures)
+            else:
+                sent = sum(copies)
+            _notify_outcome(sent, failures.values(), invalid)
+        yield from results
+
+
+def wake_many(
+    targets,
+    *,
+    ip_address="255.255.255.255",
+    port=9,
+    cache=True,
+    resolver=None,
+    pacer=None,
+    retransmit=None,
+    password=None,
+):
+    """Generate and send WoL magic packets for many targets.
+
+    All packets are sent over a single pooled broadcast socket, which
+    avoids the per-packet socket setup cost of calling `wake` in a loop.
+    On Linux, packets are sent in batches with `sendmmsg`.
+    Errors are returned per target instead of being printed.
+
+    Parameters
+    ----------
+    targets : iterable
+        Target entries, each either a MAC address string or `MacAddress`,
+        or a tuple of (mac_address, ip_address),
+        (mac_address, ip_address, port) or
+        (mac_address, ip_address, port, password).
+    ip_address : str, optional
+        IPv4 address for targets that don't specify one.
+        (default is '255.255.255.255').
+    port : int, optional
+        Port for targets that don't specify one. (default is 9).
+    cache : bool, optional
+        Flag to reuse payloads from `packet_cache`. Set to False for
+        one-off sends to large fleets to build packets in place in a
+        reusable buffer instead of filling the cache. (default is True).
+    resolver : BroadcastResolver, optional
+        Resolver mapping target addresses to broadcast addresses, e.g.
+        a `pywol.resolver.BroadcastResolver` with the fleet's subnets.
+    pacer : TokenBucket, optional
+        Rate limiter spreading sends evenly, e.g. a
+        `pywol.pacing.TokenBucket`. Packets are sent in bursts of at most
+        the pacer's burst size.
+    retransmit : RetransmitPolicy, optional
+        Policy sending every packet several times, e.g. a
+        `pywol.retransmit.RetransmitPolicy`. A target fails only if no
+        copy of its packet was sent; `iter_wake` reports the copies.
+    password : str or bytes, optional
+        4- or 6-byte SecureOn password for targets that don't specify
+        one. (default is no password).
+
+    Returns
+    -------
+    list(WakeResult)
+        One result per target, in input order.
+
+    """
+
+    resolve = _evaluate_ip_address if resolver is None else resolver.resolve
+    with _SocketPool() as pool:
+        return list(
+            _wake_iter(
+                targets,
+                ip_address,
+                port,
+                pool,
+                cache=cache,
+                resolve=resolve,
+                pacer=pacer,
+                retransmit=retransmit,
+                password=password,
+            )
+        )
+
+
+def iter_wake(
+    targets,
+    *,
+    ip_address="255.255.255.255",
+    port=9,
+    cache=True,
+    resolver=None,
+    pacer=None,
+    retransmit=None,
+    password=None,
+):
+    """Generate and send WoL magic packets, streaming a record per target.
+
+    Accepts the same arguments as `wake_many`, but consumes `targets`
+    lazily and yields each batch's outcomes as soon as it is sent, so
+    memory use stays flat for any number of targets. Nothing is printed.
+    The socket is closed when the generator is exhausted or closed.
+
+    Yields
+    ------
+    WakeRecord
+        Outcome for each target, in input order.
+
+    """
+
+    resolve = _evaluate_ip_address if resolver is None else resolver.resolve
+    with _SocketPool() as pool:
+        yield from _wake_iter(
+            targets,
+            ip_address,
+            port,
+            pool,
+            cache=cache,
+            resolve=resolve,
+            pacer=pacer,
+            record=True,
+            retransmit=retransmit,
+            password=password,
+        )
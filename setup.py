@@ -24,8 +24,9 @@ setup(
     packages=["pywol"],
     python_requires=">=3.6",
     install_requires=["Click"],
+    extras_require={"vector": ["numpy"]},
     entry_points="""
         [console_scripts]
-        pywol=pywol.cli:cli
+        pywol=pywol.entry:main
     """,
 )
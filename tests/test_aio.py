@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""Tests for the pywol.aio module.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import asyncio
+import socket
+
+import pytest
+
+from pywol import aio
+from pywol.wol import _generate_magic_packet
+
+
+class _Receiver(asyncio.DatagramProtocol):
+    """Collect datagrams received on a loopback endpoint."""
+
+    def __init__(self):
+        self.received = []
+
+    def datagram_received(self, data, addr):
+        self.received.append(data)
+
+
+@pytest.fixture()
+def loop():
+    """Test fixture to supply a fresh event loop."""
+
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+async def _with_receiver(coro_fn):
+    loop = asyncio.get_event_loop()
+    transport, receiver = await loop.create_datagram_endpoint(
+        _Receiver, local_addr=("127.0.0.1", 0)
+    )
+    port = transport.get_extra_info("sockname")[1]
+    try:
+        result = await coro_fn(port)
+        await asyncio.sleep(0.05)
+    finally:
+        transport.close()
+    return result, receiver.received
+
+
+def test_wake_return_dest(loop):
+    """Packet should be delivered and destination returned."""
+
+    async def run(port):
+        return await aio.wake(
+            "1A2B3C4D5E6F", ip_address="127.0.0.1", port=port, return_dest=True
+        )
+
+    dest, received = loop.run_until_complete(_with_receiver(run))
+    assert dest[0] == "127.0.0.1"
+    assert received == [_generate_magic_packet("1A2B3C4D5E6F")]
+
+
+def test_wake_invalid_mac(loop, capsys):
+    """Invalid MAC address should be printed like `pywol.wake`."""
+
+    loop.run_until_complete(aio.wake("1A2B3C4D5E6FF"))
+    assert capsys.readouterr().out == "[Error] Invalid MAC address: 1A2B3C4D5E6FF\n"
+
+
+def test_wake_many(loop):
+    """All valid targets should be delivered over one transport."""
+
+    macs = ["1A2B3C4D5E6F", "AABBCCDDEEFF", "A1B2C3D4E5F6"]
+
+    async def run(port):
+        async with aio.WakeSender(yield_every=2) as sender:
+            return await sender.wake_many(
+                macs + ["invalid"], ip_address="127.0.0.1", port=port
+            )
+
+    results, received = loop.run_until_complete(_with_receiver(run))
+    assert [r.error for r in results[:3]] == [None, None, None]
+    assert results[3].error == "[Error] Invalid MAC address: invalid"
+    assert received == [_generate_magic_packet(mac) for mac in macs]
+
+
+def test_send_waits_for_backpressure(loop):
+    """Sends should wait while the transport has paused writing."""
+
+    async def run():
+        async with aio.WakeSender() as sender:
+            protocol = sender._endpoints[(socket.AF_INET, None)][1]
+            protocol.pause_writing()
+            task = asyncio.ensure_future(
+                sender.send(b"payload", "127.0.0.1", 9)  # discard port
+            )
+            await asyncio.sleep(0.01)
+            assert not task.done()
+            protocol.resume_writing()
+            await task
+
+    loop.run_until_complete(run())
+
+
+def test_wake_many_ipv6(loop):
+    """IPv6 targets should be sent over their own transport."""
+
+    async def run():
+        transport, receiver = await asyncio.get_event_loop().create_datagram_endpoint(
+            _Receiver, local_addr=("::1", 0)
+        )
+        port = transport.get_extra_info("sockname")[1]
+        try:
+            async with aio.WakeSender() as sender:
+                results = await sender.wake_many(
+                    ["1A2B3C4D5E6F", ("AABBCCDDEEFF", "::1", port)],
+                    ip_address="127.0.0.1",
+                    port=port,
+                )
+                assert len(sender._endpoints) == 2
+            await asyncio.sleep(0.05)
+        finally:
+            transport.close()
+        return results, receiver.received
+
+    results, received = loop.run_until_complete(run())
+    assert results[1].dest == ("::1", str(results[1].target[2]))
+    assert received == [_generate_magic_packet("AABBCCDDEEFF")]
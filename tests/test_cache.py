@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Tests for the pywol.cache module.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import mock
+import pytest
+
+from pywol.cache import CacheInfo, PacketCache
+from pywol.wol import _generate_magic_packet
+
+
+@pytest.fixture()
+def cache():
+    """Test fixture to supply a small packet cache."""
+
+    return PacketCache(mock.Mock(side_effect=_generate_magic_packet), maxsize=2)
+
+
+def test_get_builds_once(cache):
+    """Repeated lookups should be served from the cache."""
+
+    first = cache.get("1a2b3c4d5e6f")
+    second = cache.get("1A2B3C4D5E6F")
+    assert first is second
+    assert first == _generate_magic_packet("1A2B3C4D5E6F")
+    cache._build.assert_called_once_with("1A2B3C4D5E6F")
+    assert cache.info() == CacheInfo(hits=1, misses=1, maxsize=2, currsize=1)
+
+
+def test_get_evicts_least_recently_used(cache):
+    """The least recently used payload should be evicted when full."""
+
+    cache.get("AAAAAAAAAAAA")
+    cache.get("BBBBBBBBBBBB")
+    cache.get("AAAAAAAAAAAA")
+    cache.get("CCCCCCCCCCCC")
+    cache.get("AAAAAAAAAAAA")
+    cache.get("BBBBBBBBBBBB")
+    assert cache.info() == CacheInfo(hits=2, misses=4, maxsize=2, currsize=2)
+
+
+def test_maxsize_shrink_evicts(cache):
+    """Lowering maxsize should evict entries right away."""
+
+    cache.get("AAAAAAAAAAAA")
+    cache.get("BBBBBBBBBBBB")
+    cache.maxsize = 1
+    assert cache.info().currsize == 1
+    cache.get("BBBBBBBBBBBB")
+    assert cache.info().hits == 1
+
+
+def test_maxsize_zero_disables_caching(cache):
+    """A cache with maxsize 0 should build every payload."""
+
+    cache.maxsize = 0
+    cache.get("AAAAAAAAAAAA")
+    cache.get("AAAAAAAAAAAA")
+    assert cache.info() == CacheInfo(hits=0, misses=2, maxsize=0, currsize=0)
+
+
+@pytest.mark.parametrize(
+    "invalid_size, exception", [(-1, ValueError), (1.5, TypeError), (None, TypeError)]
+)
+def test_maxsize_invalid(cache, invalid_size, exception):
+    """Invalid sizes should be rejected."""
+
+    with pytest.raises(exception):
+        cache.maxsize = invalid_size
+
+
+def test_clear(cache):
+    """Clearing should drop entries and statistics."""
+
+    cache.get("AAAAAAAAAAAA")
+    cache.clear()
+    assert cache.info() == CacheInfo(hits=0, misses=0, maxsize=2, currsize=0)
+
+
+def test_get_password(cache):
+    """Payloads should be cached per MAC address and password."""
+
+    plain = cache.get("1A2B3C4D5E6F")
+    secure = cache.get("1A2B3C4D5E6F", "010203040506")
+    assert secure == plain + bytes.fromhex("010203040506")
+    assert cache.get("1A2B3C4D5E6F", "010203040506") is secure
+    cache._build.assert_called_with("1A2B3C4D5E6F", "010203040506")
+    assert cache.info().misses == 2
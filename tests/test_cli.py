@@ -6,11 +6,23 @@ license: MIT, see LICENSE for more details.
 
 """
 
+import mock
+import pytest
 from click.testing import CliRunner
 
 from pywol.cli import cli
 
 
+@pytest.fixture()
+def sendto():
+    """Test fixture to mock out per-packet sends."""
+
+    with mock.patch("pywol.transmit._load_sendmmsg", return_value=None), mock.patch(
+        "socket.socket.sendto", autospec=True
+    ) as sendto:
+        yield sendto
+
+
 def test_cli_defaults():
     """Invoke with only MAC address."""
 
@@ -68,3 +80,212 @@ def test_cli_non_integer_port():
     runner = CliRunner()
     result = runner.invoke(cli, ["1A2B3C4D5E6F", "--p", "a"])
     assert result.exit_code == 2
+
+
+def test_cli_from_stdin(sendto):
+    """Invoke with targets streamed from stdin."""
+
+    lines = [
+        "# rack 12",
+        "1A2B3C4D5E6F",
+        "",
+        "1A:2B:3C:4D:5E:6F, 192.168.1.5/24",
+        "1A-2B-3C-4D-5E-6F,,7",
+        "1A2B3C4D5E6FF",
+        "1A2B3C4D5E6F,192.168.1.255,a",
+    ]
+    runner = CliRunner()
+    result = runner.invoke(cli, ["--from-file", "-", "--v"], input="\n".join(lines))
+    assert result.exit_code == 0
+    assert result.output == (
+        "Sent magic packet for '1A2B3C4D5E6F' to 255.255.255.255:9.\n"
+        "Sent magic packet for '1A:2B:3C:4D:5E:6F' to 192.168.1.255:9.\n"
+        "Sent magic packet for '1A-2B-3C-4D-5E-6F' to 255.255.255.255:7.\n"
+        "[Error] Invalid MAC address: 1A2B3C4D5E6FF\n"
+        "[Error] Port number must be of type int.\n"
+        "Sent 3 magic packet(s), 2 failed.\n"
+    )
+    assert sendto.call_count == 3
+
+
+def test_cli_from_file(sendto, tmp_path):
+    """Invoke with targets read from a file and default --ip & --p."""
+
+    hosts = tmp_path / "hosts.csv"
+    hosts.write_text("1A2B3C4D5E6F\nAABBCCDDEEFF,10.0.0.255\n")
+    runner = CliRunner()
+    result = runner.invoke(
+        cli, ["--f", str(hosts), "--ip", "192.168.1.255", "--p", "7"]
+    )
+    assert result.exit_code == 0
+    assert result.output == "Sent 2 magic packet(s), 0 failed.\n"
+    assert [call[0][1] for call in sendto.call_args_list] == [
+        ("192.168.1.255", 7),
+        ("10.0.0.255", 7),
+    ]
+
+
+def test_cli_password(sendto, tmp_path):
+    """Invoke with a default --password and per-line passwords."""
+
+    hosts = tmp_path / "hosts.csv"
+    hosts.write_text("1A2B3C4D5E6F\n1A2B3C4D5E6F,,,0A0B0C0D\n")
+    runner = CliRunner()
+    result = runner.invoke(cli, ["--f", str(hosts), "--pw", "01:02:03:04"])
+    assert result.exit_code == 0
+    assert [bytes(call[0][0])[102:] for call in sendto.call_args_list] == [
+        b"\x01\x02\x03\x04",
+        b"\x0a\x0b\x0c\x0d",
+    ]
+    result = runner.invoke(cli, ["1A2B3C4D5E6F", "--password", "0102"])
+    assert result.output == "[Error] Invalid SecureOn password: 0102\n"
+
+
+def test_cli_mac_and_file():
+    """Invoke with both a MAC address and --from-file."""
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["1A2B3C4D5E6F", "--from-file", "-"], input="")
+    assert result.exit_code == 2
+
+
+def test_cli_wake_subcommand():
+    """Invoke the explicit wake command."""
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["wake", "1A2B3C4D5E6F", "--v"])
+    assert result.exit_code == 0
+    assert (
+        result.output == "Sent magic packet for '1A2B3C4D5E6F' to 255.255.255.255:9.\n"
+    )
+
+
+def test_cli_hosts_and_wake_group(sendto, tmp_path):
+    """Register hosts, then wake them by group and name."""
+
+    registry = str(tmp_path / "hosts.db")
+    runner = CliRunner(env={"PYWOL_REGISTRY": registry})
+    result = runner.invoke(
+        cli, ["hosts", "add", "web-1", "1A2B3C4D5E6F", "--ip", "10.1.2.5/24"]
+    )
+    assert result.exit_code == 0
+    assert result.output == "Added 'web-1' (1A2B3C4D5E6F).\n"
+    runner.invoke(cli, ["hosts", "add", "web-2", "AABBCCDDEEFF", "--g", "rack-12"])
+    runner.invoke(cli, ["hosts", "add", "web-3", "112233445566", "--g", "rack-12"])
+
+    result = runner.invoke(cli, ["hosts", "list", "--g", "rack-12"])
+    assert result.output == (
+        "web-2\tAABBCCDDEEFF\t255.255.255.255:9\track-12\t-\n"
+        "web-3\t112233445566\t255.255.255.255:9\track-12\t-\n"
+    )
+
+    result = runner.invoke(cli, ["wake", "--group", "rack-12"])
+    assert result.exit_code == 0
+    assert result.output == "Sent 2 magic packet(s), 0 failed.\n"
+    assert sendto.call_count == 2
+
+    result = runner.invoke(cli, ["--v", "--n", "web-1", "--n", "web-4"])
+    assert result.output == (
+        "Sent magic packet for 'web-1' to 10.1.2.255:9.\n"
+        "[Error] Unknown host: web-4\n"
+        "Sent 1 magic packet(s), 1 failed.\n"
+    )
+
+    result = runner.invoke(cli, ["hosts", "remove", "web-1", "--registry", registry])
+    assert result.output == "Removed 'web-1'.\n"
+    result = runner.invoke(cli, ["hosts", "remove", "web-1"])
+    assert result.exit_code == 1
+    assert result.output == "[Error] Unknown host: web-1\n"
+
+
+def test_cli_hosts_add_invalid(tmp_path):
+    """Invalid hosts should be reported and not added."""
+
+    runner = CliRunner(env={"PYWOL_REGISTRY": str(tmp_path / "hosts.db")})
+    result = runner.invoke(cli, ["hosts", "add", "web-1", "1A2B3C4D5E6FF"])
+    assert result.exit_code == 1
+    assert result.output == "[Error] Invalid MAC address: 1A2B3C4D5E6FF\n"
+
+
+def test_cli_hosts_list_invalid_subnet(tmp_path):
+    """Invalid subnet filters should be reported without a traceback."""
+
+    runner = CliRunner(env={"PYWOL_REGISTRY": str(tmp_path / "hosts.db")})
+    result = runner.invoke(cli, ["hosts", "list", "--subnet", "bogus"])
+    assert result.exit_code == 1
+    assert result.output == "[Error] Invalid subnet: bogus\n"
+
+
+def test_cli_mac_and_group():
+    """Invoke with both a MAC address and --group."""
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["1A2B3C4D5E6F", "--group", "rack-12"])
+    assert result.exit_code == 2
+
+
+def test_cli_serve(tmp_path):
+    """Invoke serve with a socket path and window."""
+
+    path = str(tmp_path / "pywol.sock")
+    runner = CliRunner()
+    with mock.patch("pywol.daemon.serve") as serve:
+        result = runner.invoke(cli, ["serve", "--socket", path, "--window", "2"])
+    assert result.exit_code == 0
+    assert result.output == f"Listening on {path}.\n"
+    serve.assert_called_once_with(path, window=0.002)
+
+
+def test_cli_relay(tmp_path):
+    """Invoke relay with a key file, or without any key."""
+
+    key_file = tmp_path / "relay.key"
+    key_file.write_bytes(b"secret\n")
+    runner = CliRunner(env={"PYWOL_RELAY_KEY": None})
+    with mock.patch("pywol.relay.serve") as serve:
+        result = runner.invoke(
+            cli, ["relay", "--p", "9100", "--key-file", str(key_file)]
+        )
+        assert result.exit_code == 0
+        args, kwargs = serve.call_args
+        assert args == (b"secret", "0.0.0.0", 9100)
+        assert kwargs["window"] == 0.0
+        result = runner.invoke(cli, ["relay"])
+    assert result.exit_code == 2
+    assert serve.call_count == 1
+
+
+def test_cli_schedule(sendto, tmp_path):
+    """Run a wake plan and report each wave."""
+
+    registry = str(tmp_path / "hosts.db")
+    runner = CliRunner(env={"PYWOL_REGISTRY": registry})
+    runner.invoke(cli, ["hosts", "add", "lab-1", "1A2B3C4D5E6F", "--g", "lab"])
+    runner.invoke(cli, ["hosts", "add", "lab-2", "AABBCCDDEEFF", "--g", "lab"])
+    plan = tmp_path / "plan.json"
+    plan.write_text(
+        '{"waves": [{"at": 0, "group": "lab", "wave_size": 1, "interval": 60},'
+        ' {"at": 0, "name": "spare", "targets": ["112233445566"]}]}'
+    )
+    result = runner.invoke(cli, ["schedule", str(plan), "--v"])
+    assert result.exit_code == 0
+    assert result.output == (
+        "Scheduled 3 wave(s).\n"
+        "Sent magic packet for 'lab-1' to 255.255.255.255:9.\n"
+        "Wave 1/2 of 'lab': sent 1 magic packet(s), 0 failed.\n"
+        "Sent magic packet for '112233445566' to 255.255.255.255:9.\n"
+        "Wave 1/1 of 'spare': sent 1 magic packet(s), 0 failed.\n"
+        "Sent magic packet for 'lab-2' to 255.255.255.255:9.\n"
+        "Wave 2/2 of 'lab': sent 1 magic packet(s), 0 failed.\n"
+    )
+    assert sendto.call_count == 3
+
+
+def test_cli_schedule_invalid(tmp_path):
+    """Invalid plans should be reported without sending anything."""
+
+    plan = tmp_path / "plan.json"
+    plan.write_text('{"waves": [{"at": "6am", "targets": ["1A2B3C4D5E6F"]}]}')
+    result = CliRunner().invoke(cli, ["schedule", str(plan)])
+    assert result.exit_code == 1
+    assert result.output == "[Error] Invalid time of day: 6am\n"
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""Tests for the pywol.daemon module.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import asyncio
+import json
+import socket
+import threading
+
+import mock
+import pytest
+
+from pywol import daemon
+from pywol.daemon import WakeClient, WakeServer
+from pywol.wol import WakeResult, _generate_magic_packet
+
+
+@pytest.fixture()
+def loop():
+    """Test fixture to supply a fresh event loop."""
+
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture()
+def receiver():
+    """Test fixture to supply a bound loopback UDP socket."""
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        sock.settimeout(5)
+        yield sock
+
+
+@pytest.fixture()
+def socket_path(tmp_path):
+    """Test fixture to supply a daemon socket path."""
+
+    return str(tmp_path / "pywol.sock")
+
+
+def test_submit_coalesces_requests(loop, receiver, socket_path):
+    """Concurrent requests within the window should share one send."""
+
+    port = receiver.getsockname()[1]
+
+    async def run():
+        async with WakeServer(socket_path, window=0.01) as server:
+            with mock.patch(
+                "pywol.daemon._send_packets", wraps=daemon._send_packets
+            ) as send:
+                results = await asyncio.gather(
+                    server.submit(["1A2B3C4D5E6F"], ip_address="127.0.0.1", port=port),
+                    server.submit(
+                        [("AABBCCDDEEFF", "127.0.0.1", port), "1A2B3C4D5E6FF"]
+                    ),
+                )
+            assert send.call_count == 1
+            return results
+
+    results = loop.run_until_complete(run())
+    assert results == [
+        [WakeResult("1A2B3C4D5E6F", ("127.0.0.1", str(port)), None)],
+        [
+            WakeResult(
+                ("AABBCCDDEEFF", "127.0.0.1", port), ("127.0.0.1", str(port)), None
+            ),
+            WakeResult(
+                "1A2B3C4D5E6FF", None, "[Error] Invalid MAC address: 1A2B3C4D5E6FF"
+            ),
+        ],
+    ]
+    assert {receiver.recv(1024), receiver.recv(1024)} == {
+        _generate_magic_packet("1A2B3C4D5E6F"),
+        _generate_magic_packet("AABBCCDDEEFF"),
+    }
+
+
+def test_submit_full_batch_sends_immediately(loop, socket_path):
+    """Reaching the batch size should send without waiting for the window."""
+
+    async def run():
+        async with WakeServer(socket_path, window=60, batch_size=2) as server:
+            with mock.patch("pywol.daemon._send_packets", return_value={1: OSError()}):
+                return await asyncio.wait_for(
+                    server.submit(
+                        ["1A2B3C4D5E6F", "AABBCCDDEEFF"], ip_address="127.0.0.1"
+                    ),
+                    5,
+                )
+
+    assert loop.run_until_complete(run()) == [
+        WakeResult("1A2B3C4D5E6F", ("127.0.0.1", "9"), None),
+        WakeResult(
+            "AABBCCDDEEFF",
+            None,
+            "[Error] Cannot send broadcast to IP address: 127.0.0.1",
+        ),
+    ]
+
+
+def test_client_roundtrip(receiver, socket_path):
+    """The client should receive results from a daemon in another thread."""
+
+    port = receiver.getsockname()[1]
+    loop = asyncio.new_event_loop()
+    server = WakeServer(socket_path)
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+    try:
+        with WakeClient(socket_path) as client:
+            results = client.wake_many(
+                ["1A2B3C4D5E6F", ["AABBCCDDEEFF", "127.0.0.1", port]],
+                ip_address="127.0.0.1",
+                port=port,
+            )
+            assert results == [
+                WakeResult("1A2B3C4D5E6F", ("127.0.0.1", str(port)), None),
+                WakeResult(
+                    ("AABBCCDDEEFF", "127.0.0.1", port), ("127.0.0.1", str(port)), None
+                ),
+            ]
+            client._sock.sendall(b"not json\n")
+            assert (
+                client._reader.readline() == b'{"error": "[Error] Invalid request."}\n'
+            )
+            assert client.wake_many([]) == []
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        server.close()
+        loop.run_until_complete(server.wait_closed())
+        loop.close()
+    assert receiver.recv(1024) == _generate_magic_packet("1A2B3C4D5E6F")
+    assert receiver.recv(1024) == _generate_magic_packet("AABBCCDDEEFF")
+
+
+def test_rejected_request_queues_nothing(loop, socket_path):
+    """No target of a rejected request should be left queued."""
+
+    async def run():
+        async with WakeServer(socket_path, window=60) as server:
+            request = {"targets": ["1A2B3C4D5E6F", ["AABBCCDDEEFF", None]]}
+            response = await server._respond(json.dumps(request).encode())
+            return response, server._pending, server._timer
+
+    response, pending, timer = loop.run_until_complete(run())
+    assert response == b'{"error": "[Error] Invalid request."}'
+    assert pending == []
+    assert timer is None
+
+
+def test_client_chunks_large_requests(receiver, socket_path):
+    """Fleet-sized requests should be split into chunks under the line limit."""
+
+    port = receiver.getsockname()[1]
+    targets = [(f"{index:012X}", "127.0.0.1", port) for index in range(5000)]
+    loop = asyncio.new_event_loop()
+    server = WakeServer(socket_path)
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+    try:
+        with WakeClient(socket_path, chunk_size=2000) as client:
+            with mock.patch.object(
+                client, "_request", wraps=client._request
+            ) as request:
+                results = client.wake_many(targets)
+            assert request.call_count == 3
+            assert results == [
+                WakeResult(target, ("127.0.0.1", str(port)), None) for target in targets
+            ]
+            assert len(client.wake_many(targets[:4096] * 2)) == 8192
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        server.close()
+        loop.run_until_complete(server.wait_closed())
+        loop.close()
+
+
+def test_oversized_request(loop, socket_path):
+    """Lines over the stream limit should get an error and close the connection."""
+
+    async def run():
+        async with WakeServer(socket_path):
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+            writer.write(b"x" * (daemon.MAX_MESSAGE_SIZE + 1) + b"\n")
+            response = await reader.readline()
+            rest = await reader.read()
+            writer.close()
+            return response, rest
+
+    response, rest = loop.run_until_complete(run())
+    assert response == b'{"error": "[Error] Request too large."}\n'
+    assert rest == b""
+
+
+def test_client_error_response(socket_path):
+    """A rejected request should raise ValueError."""
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+        listener.bind(socket_path)
+        listener.listen(1)
+        with WakeClient(socket_path) as client:
+            conn, _ = listener.accept()
+            with conn:
+                conn.sendall(b'{"error": "[Error] Invalid request."}\n')
+                with pytest.raises(ValueError, match="Invalid request"):
+                    client.wake_many(["1A2B3C4D5E6F"])
+
+
+def test_client_no_daemon(socket_path):
+    """Connecting without a running daemon should raise OSError."""
+
+    with pytest.raises(OSError):
+        WakeClient(socket_path)
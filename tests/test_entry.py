@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Tests for the pywol.entry module.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import subprocess
+import sys
+
+import mock
+import pytest
+
+from pywol.entry import _parse_fast, main
+
+
+@pytest.mark.parametrize(
+    "args, expected",
+    [
+        (["1A2B3C4D5E6F"], ("1A2B3C4D5E6F", "255.255.255.255", 9, False)),
+        (
+            ["wake", "1A:2B:3C:4D:5E:6F", "--ip", "192.168.1.5/24", "--p", "7"],
+            ("1A:2B:3C:4D:5E:6F", "192.168.1.5/24", 7, False),
+        ),
+        (
+            ["--v", "--ip_address=10.0.0.255", "--port=0", "1A2B3C4D5E6F"],
+            ("1A2B3C4D5E6F", "10.0.0.255", 0, True),
+        ),
+        (["1A2B3C4D5E6F", "--verbose", "--ip", "x"], ("1A2B3C4D5E6F", "x", 9, True)),
+    ],
+)
+def test_parse_fast(args, expected):
+    """Plain single-MAC wakes should be parsed without click."""
+
+    assert _parse_fast(args) == expected
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        [],
+        ["wake"],
+        ["--help"],
+        ["hosts", "list"],
+        ["serve"],
+        ["1A2B3C4D5E6FF"],
+        ["1A2B3C4D5E6F", "--p", "a"],
+        ["1A2B3C4D5E6F", "--ip"],
+        ["1A2B3C4D5E6F", "AABBCCDDEEFF"],
+        ["1A2B3C4D5E6F", "--from-file", "-"],
+        ["1A2B3C4D5E6F", "--group", "rack-12"],
+    ],
+)
+def test_parse_fast_falls_back(args):
+    """Anything but a plain single-MAC wake should need the full CLI."""
+
+    assert _parse_fast(args) is None
+
+
+def test_main_fast_path(capsys):
+    """The fast path should wake and print like the full CLI."""
+
+    with mock.patch("pywol.entry.wake", return_value=("192.168.1.255", "7")) as wake:
+        main(["1A2B3C4D5E6F", "--ip", "192.168.1.5/24", "--p", "7", "--v"])
+    wake.assert_called_once_with(
+        "1A2B3C4D5E6F", ip_address="192.168.1.5/24", port=7, return_dest=True
+    )
+    assert capsys.readouterr().out == (
+        "Sent magic packet for '1A2B3C4D5E6F' to 192.168.1.255:7.\n"
+    )
+
+
+def test_main_falls_back_to_cli(capsys):
+    """Other invocations should run the full CLI."""
+
+    with pytest.raises(SystemExit) as exit_info:
+        main(["1A2B3C4D5E6FF"])
+    assert exit_info.value.code == 0
+    assert capsys.readouterr().out == "[Error] Invalid MAC address: 1A2B3C4D5E6FF\n"
+    with pytest.raises(SystemExit) as exit_info:
+        main([])
+    assert exit_info.value.code == 2
+
+
+def test_import_is_lightweight():
+    """Importing the entry point should not load the heavy modules."""
+
+    code = (
+        "import sys; before = set(sys.modules); import pywol.entry; "
+        "print(' '.join(sorted(set(sys.modules) - before)))"
+    )
+    loaded = subprocess.check_output([sys.executable, "-c", code]).decode().split()
+    assert "pywol.entry" in loaded
+    for module in ("click", "ctypes", "ipaddress", "re", "http.server", "pywol.cli"):
+        assert module not in loaded
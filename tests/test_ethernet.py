@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""Tests for the pywol.ethernet module.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import errno
+import socket
+
+import mock
+import pytest
+
+from pywol.ethernet import BROADCAST_MAC, ETHERTYPE_WOL, EthernetSender
+from pywol.metrics import MetricsCollector, add_observer, remove_observer
+from pywol.wol import WakeResult, _generate_magic_packet
+
+SOURCE = bytes.fromhex("02000000AB01")
+HEADER = b"\xff" * 6 + SOURCE + b"\x08\x42"
+
+
+@pytest.fixture()
+def raw_socket():
+    """Test fixture to mock out raw packet sockets and sendmmsg."""
+
+    with mock.patch("pywol.transmit._load_sendmmsg", return_value=None), mock.patch(
+        "pywol.ethernet.socket.socket"
+    ) as factory:
+        sock = factory.return_value
+        sock.family = getattr(socket, "AF_PACKET", -1)
+        sock.getsockname.return_value = ("eth0", ETHERTYPE_WOL, 0, 1, SOURCE)
+        with mock.patch("pywol.ethernet._AF_PACKET", sock.family):
+            yield sock
+
+
+def test_wake_many_frames(raw_socket):
+    """Each valid target should be sent as a WoL Ethernet frame."""
+
+    targets = ["1A2B3C4D5E6F", ("AABBCCDDEEFF", "10.0.0.1", 7), "xx"]
+    with EthernetSender("eth0") as sender:
+        results = sender.wake_many(targets)
+    raw_socket.bind.assert_called_once_with(("eth0", ETHERTYPE_WOL))
+    raw_socket.close.assert_called_once_with()
+    assert results == [
+        WakeResult(targets[0], ("eth0", BROADCAST_MAC), None),
+        WakeResult(targets[1], ("eth0", BROADCAST_MAC), None),
+        WakeResult("xx", None, "[Error] Invalid MAC address: xx"),
+    ]
+    frames = [bytes(args[0]) for args, _ in raw_socket.send.call_args_list]
+    assert frames == [
+        HEADER + _generate_magic_packet("1A2B3C4D5E6F"),
+        HEADER + _generate_magic_packet("AABBCCDDEEFF"),
+    ]
+
+
+def test_wake_many_send_error(raw_socket):
+    """Frames that cannot be sent should be reported per target."""
+
+    raw_socket.send.side_effect = [None, OSError(errno.ENETDOWN, "Network is down")]
+    with EthernetSender("eth0", batch_size=1) as sender:
+        results = sender.wake_many(["1A2B3C4D5E6F", "AABBCCDDEEFF"])
+    assert results == [
+        WakeResult("1A2B3C4D5E6F", ("eth0", BROADCAST_MAC), None),
+        WakeResult(
+            "AABBCCDDEEFF", None, "[Error] Cannot send frame on interface: eth0"
+        ),
+    ]
+
+
+def test_wake_many_observed(raw_socket):
+    """Frame sends should be reported to metrics observers."""
+
+    raw_socket.send.side_effect = [None, OSError(errno.ENETDOWN, "Network is down")]
+    collector = MetricsCollector()
+    add_observer(collector)
+    try:
+        with EthernetSender("eth0") as sender:
+            sender.wake_many(["1A2B3C4D5E6F", "AABBCCDDEEFF", "xx"])
+    finally:
+        remove_observer(collector)
+    assert collector.packets_sent == 1
+    assert collector.send_errors == {errno.ENETDOWN: 1}
+    assert collector.targets_invalid == 1
+    assert collector.stage_count["send"] == 2
+
+
+def test_bind_error_closes_socket(raw_socket):
+    """A socket that cannot be bound should be closed."""
+
+    raw_socket.bind.side_effect = OSError(errno.ENODEV, "No such device")
+    with pytest.raises(OSError):
+        EthernetSender("eth9")
+    raw_socket.close.assert_called_once_with()
+
+
+def test_no_packet_sockets():
+    """Platforms without AF_PACKET should raise OSError."""
+
+    with mock.patch("pywol.ethernet._AF_PACKET", None):
+        with pytest.raises(OSError, match="AF_PACKET"):
+            EthernetSender("eth0")
+
+
+def test_loopback_frames():
+    """Frames should arrive on the interface, if raw sockets are permitted."""
+
+    try:
+        receiver = socket.socket(
+            socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETHERTYPE_WOL)
+        )
+    except (AttributeError, PermissionError):
+        pytest.skip("raw packet sockets not permitted")
+    with receiver:
+        receiver.bind(("lo", ETHERTYPE_WOL))
+        receiver.settimeout(5)
+        with EthernetSender("lo") as sender:
+            assert sender.wake_many(["1A2B3C4D5E6F"])[0].error is None
+            frame = receiver.recv(2048)
+    assert frame[12:14] == b"\x08\x42"
+    assert frame[14:] == _generate_magic_packet("1A2B3C4D5E6F")
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""Tests for the pywol.interfaces module.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import socket
+
+import mock
+import pytest
+
+from pywol.interfaces import InterfaceSender
+from pywol.wol import _generate_magic_packet
+
+
+@pytest.fixture()
+def sender():
+    """Test fixture to supply a sender with two loopback interfaces."""
+
+    with InterfaceSender(["127.1.0.1/16", "127.2.0.1/16"]) as sender:
+        yield sender
+
+
+@pytest.fixture()
+def receivers():
+    """Test fixture to supply receivers on both loopback subnets."""
+
+    socks = []
+    for address in ("127.1.0.9", "127.2.0.9"):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((address, 0))
+        sock.settimeout(1)
+        socks.append(sock)
+    yield socks
+    for sock in socks:
+        sock.close()
+
+
+@pytest.mark.parametrize(
+    "ip_address, expected",
+    [
+        ("127.1.2.3", [0]),
+        ("127.2.255.255", [1]),
+        ("10.0.0.1", []),
+        ("ff02::1%lo", []),
+    ],
+)
+def test_route(sender, ip_address, expected):
+    """Destinations should map to the interface facing them."""
+
+    assert sender.route(ip_address) == expected
+
+
+def test_route_limited_broadcast(sender):
+    """Limited broadcasts should go out on every interface."""
+
+    assert sender.route("255.255.255.255") == [0, 1]
+
+
+def test_wake_many_sends_from_matching_interface(sender, receivers):
+    """Packets should be sent from the interface facing the target."""
+
+    targets = [
+        ("1A2B3C4D5E6F", receiver.getsockname()[0], receiver.getsockname()[1])
+        for receiver in receivers
+    ]
+    results = sender.wake_many(targets + ["invalid"])
+    assert [r.error for r in results[:2]] == [None, None]
+    assert results[2].error == "[Error] Invalid MAC address: invalid"
+    for receiver, source in zip(receivers, ("127.1.0.1", "127.2.0.1")):
+        payload, address = receiver.recvfrom(1024)
+        assert payload == _generate_magic_packet("1A2B3C4D5E6F")
+        assert address[0] == source
+
+
+def test_wake_many_ipv6_default_socket(sender):
+    """IPv6 targets should be sent from an unbound IPv6 socket."""
+
+    with socket.socket(socket.AF_INET6, socket.SOCK_DGRAM) as receiver:
+        receiver.bind(("::1", 0))
+        receiver.settimeout(1)
+        port = receiver.getsockname()[1]
+        (result,) = sender.wake_many([("1A2B3C4D5E6F", "::1", port)])
+        assert result.dest == ("::1", str(port))
+        assert receiver.recv(1024) == _generate_magic_packet("1A2B3C4D5E6F")
+
+
+def test_wake_many_partial_failure(sender):
+    """Targets sent on several interfaces need one successful send."""
+
+    sender.interfaces[0].sender.send = mock.Mock(return_value={0: OSError()})
+    sender.interfaces[1].sender.send = mock.Mock(return_value={})
+    (result,) = sender.wake_many(["1A2B3C4D5E6F"])
+    assert result.dest == ("255.255.255.255", "9")
+
+    sender.interfaces[1].sender.send = mock.Mock(return_value={0: OSError()})
+    (result,) = sender.wake_many(["1A2B3C4D5E6F"])
+    assert result.error == (
+        "[Error] Cannot send broadcast to IP address: 255.255.255.255"
+    )
+
+
+def test_wake_many_passwords(sender, receivers):
+    """Targets without a password should use the default, not the previous."""
+
+    address, port = receivers[0].getsockname()
+    targets = [
+        ("1A2B3C4D5E6F", address, port, "01:02:03:04"),
+        ("AABBCCDDEEFF", address, port),
+    ]
+    sender.wake_many(targets)
+    sender.wake_many(targets, password="0A0B0C0D")
+    assert [receivers[0].recv(1024) for _ in range(4)] == [
+        _generate_magic_packet("1A2B3C4D5E6F", "01020304"),
+        _generate_magic_packet("AABBCCDDEEFF"),
+        _generate_magic_packet("1A2B3C4D5E6F", "01020304"),
+        _generate_magic_packet("AABBCCDDEEFF", "0A0B0C0D"),
+    ]
+
+
+@pytest.mark.parametrize("invalid_interface", ["127.1.0.1/33", "interface"])
+def test_invalid_interface(invalid_interface):
+    """Invalid interface addresses should raise ValueError."""
+
+    with pytest.raises(ValueError):
+        InterfaceSender([invalid_interface])
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""Tests for the pywol.mac module.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import pytest
+
+from pywol.mac import MacAddress, parse_mac
+
+PACKED = b"\x1a\x2b\x3c\x4d\x5e\x6f"
+
+
+@pytest.mark.parametrize(
+    "valid_input",
+    [
+        "1A:2B:3C:4D:5E:6F",
+        "1a-2b-3c-4d-5e-6f",
+        "1a2b.3c4d.5e6f",
+        "1A2B3C4D5E6F",
+        "1A 2B 3C 4D 5E 6F",
+        "1A:2B-3C;4D 5E/6F",
+        " 1A2B3C4D5E6F",
+    ],
+)
+def test_parse_mac_valid(valid_input):
+    """Common and uncommon notations should be parsed."""
+
+    assert parse_mac(valid_input) == PACKED
+
+
+@pytest.mark.parametrize(
+    "invalid_input",
+    [
+        "1A:2B:3C:4D:5E:6G",
+        "1A:2B:3C:4D:5E:6FF",
+        "1A2B3C4D5E6 ",
+        "1A2B3C4D 5E6",
+        "1a2b.3c4d.5e6g",
+        "1A:2B:3C:4D:5E",
+        "",
+    ],
+)
+def test_parse_mac_invalid(invalid_input):
+    """Inputs without exactly 12 hex digits should raise ValueError."""
+
+    with pytest.raises(ValueError):
+        parse_mac(invalid_input)
+
+
+@pytest.mark.parametrize(
+    "valid_input", ["1a-2b-3c-4d-5e-6f", PACKED, bytearray(PACKED), 0x1A2B3C4D5E6F]
+)
+def test_mac_address_valid(valid_input):
+    """MAC addresses should be constructed from all supported types."""
+
+    mac = MacAddress(valid_input)
+    assert mac.packed == PACKED
+    assert mac.hex == "1A2B3C4D5E6F"
+    assert int(mac) == 0x1A2B3C4D5E6F
+    assert str(mac) == "1A:2B:3C:4D:5E:6F"
+    assert mac == MacAddress(mac)
+    assert hash(mac) == hash(MacAddress(PACKED))
+
+
+@pytest.mark.parametrize(
+    "invalid_input, exception",
+    [
+        ("1A2B3C4D5E6", ValueError),
+        (b"\x1a\x2b", ValueError),
+        (-1, ValueError),
+        (1 << 48, ValueError),
+        (None, TypeError),
+        (True, TypeError),
+    ],
+)
+def test_mac_address_invalid(invalid_input, exception):
+    """Invalid MAC addresses should raise."""
+
+    with pytest.raises(exception):
+        MacAddress(invalid_input)
+
+
+def test_mac_address_slots():
+    """MAC addresses should not carry a per-instance __dict__."""
+
+    with pytest.raises(AttributeError):
+        MacAddress(PACKED).__dict__
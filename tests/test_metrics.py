@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""Tests for the pywol.metrics module.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import asyncio
+import errno
+import urllib.request
+
+import mock
+import pytest
+
+from pywol import metrics
+from pywol.aio import WakeSender
+from pywol.daemon import WakeServer
+from pywol.interfaces import InterfaceSender
+from pywol.metrics import MetricsCollector, Observer, add_observer, remove_observer
+from pywol.registry import HostRegistry
+from pywol.schedule import WakeScheduler
+from pywol.wol import wake, wake_many
+
+
+@pytest.fixture()
+def collector():
+    """Test fixture to supply a registered metrics collector."""
+
+    collector = MetricsCollector()
+    add_observer(collector)
+    yield collector
+    remove_observer(collector)
+
+
+@pytest.fixture()
+def sendto():
+    """Test fixture to mock out per-packet sends."""
+
+    with mock.patch("pywol.transmit._load_sendmmsg", return_value=None), mock.patch(
+        "socket.socket.sendto", autospec=True
+    ) as sendto:
+        yield sendto
+
+
+def test_wake_observed(collector, sendto):
+    """A single wake should report every stage and its outcome."""
+
+    assert wake("1A2B3C4D5E6F", ip_address="192.168.1.5/24", return_dest=True) == (
+        "192.168.1.255",
+        "9",
+    )
+    wake("1A2B3C4D5E6FF")
+    assert collector.packets_sent == 1
+    assert collector.targets_invalid == 1
+    assert collector.stage_count == dict.fromkeys(metrics.STAGES, 1)
+    assert all(seconds > 0 for seconds in collector.stage_seconds.values())
+
+
+def test_wake_send_error_observed(collector, sendto):
+    """Send errors should be counted by errno."""
+
+    sendto.side_effect = OSError(errno.ENETUNREACH, "Network is unreachable")
+    wake("1A2B3C4D5E6F")
+    assert collector.packets_failed == 1
+    assert collector.send_errors == {errno.ENETUNREACH: 1}
+
+
+def test_wake_many_observed(collector, sendto):
+    """Bulk sends should report per-batch stage timings and outcomes."""
+
+    sendto.side_effect = [None, OSError(errno.EACCES, "Permission denied"), None, None]
+    targets = ["1A2B3C4D5E6F", "AABBCCDDEEFF", ("112233445566", "10.0.0.1/8"), "xx"]
+    wake_many(targets)
+    wake_many(targets[:1], cache=False)
+    assert collector.packets_sent == 3
+    assert collector.packets_failed == 1
+    assert collector.targets_invalid == 1
+    assert collector.send_errors == {errno.EACCES: 1}
+    assert collector.stage_count == dict.fromkeys(metrics.STAGES, 4)
+
+
+def test_aio_observed(collector, sendto):
+    """asyncio sends should report stage timings and outcomes."""
+
+    async def run():
+        async with WakeSender() as sender:
+            await sender.wake_many(["1A2B3C4D5E6F", "AABBCCDDEEFF", "xx"])
+            await sender.wake("1A2B3C4D5E6F")
+            await sender.wake("xx")
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+    assert collector.packets_sent == 3
+    assert collector.targets_invalid == 2
+    assert collector.stage_count == dict.fromkeys(metrics.STAGES, 3)
+
+
+def test_interfaces_observed(collector, sendto):
+    """Interface sends should count each route's packet."""
+
+    sendto.side_effect = [None, OSError(errno.ENETUNREACH, "Network is unreachable")]
+    targets = [("1A2B3C4D5E6F", "127.1.0.5"), "AABBCCDDEEFF", "xx"]
+    with InterfaceSender(["127.1.0.1/16"]) as sender:
+        sender.wake_many(targets)
+    assert collector.packets_sent == 1
+    assert collector.send_errors == {errno.ENETUNREACH: 1}
+    assert collector.targets_invalid == 1
+    assert collector.stage_count == dict.fromkeys(metrics.STAGES, 2)
+
+
+def test_registry_observed(collector, sendto):
+    """Registry wakes should report the send stage of stored packets."""
+
+    with HostRegistry(":memory:") as registry:
+        registry.add("lab-1", "1A2B3C4D5E6F")
+        registry.add("lab-2", "AABBCCDDEEFF")
+        registry.wake(names=["lab-1", "lab-2", "lab-3"])
+    assert collector.packets_sent == 2
+    assert collector.targets_invalid == 1
+    assert collector.stage_count == {"parse": 0, "resolve": 0, "build": 0, "send": 2}
+
+
+def test_scheduler_observed(collector, sendto):
+    """Scheduled waves should report the send stage and outcome."""
+
+    with WakeScheduler(clock=lambda: 1000.0, sleep=lambda seconds: None) as sched:
+        sched.add(1000, ["1A2B3C4D5E6F", "AABBCCDDEEFF"])
+        sched.run()
+    assert collector.packets_sent == 2
+    assert collector.stage_count["send"] == 2
+
+
+def test_daemon_observed(collector, sendto, tmp_path):
+    """Daemon requests should report their stages once sent in a batch."""
+
+    async def run():
+        async with WakeServer(str(tmp_path / "pywol.sock"), window=0.01) as server:
+            await asyncio.gather(
+                server.submit(["1A2B3C4D5E6F", "xx"]), server.submit(["AABBCCDDEEFF"])
+            )
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+    assert collector.packets_sent == 2
+    assert collector.targets_invalid == 1
+    assert collector.stage_count == dict.fromkeys(metrics.STAGES, 2)
+
+
+def test_observer_hooks(sendto):
+    """Observer subclasses should only need to override some hooks."""
+
+    class Counter(Observer):
+        def __init__(self):
+            self.sent_count = 0
+
+        def sent(self, count):
+            self.sent_count += count
+
+    observer = Counter()
+    add_observer(observer)
+    try:
+        wake_many(["1A2B3C4D5E6F", "AABBCCDDEEFF", "xx"])
+        wake("xx")
+    finally:
+        remove_observer(observer)
+    wake("1A2B3C4D5E6F")
+    assert observer.sent_count == 2
+
+
+def test_disabled_skips_timing(sendto):
+    """No timing should be done without observers."""
+
+    with mock.patch("pywol.wol.perf_counter") as perf_counter:
+        wake("1A2B3C4D5E6F")
+        wake_many(["1A2B3C4D5E6F"])
+    perf_counter.assert_not_called()
+
+
+def test_render_prometheus():
+    """Metrics should be rendered in the Prometheus text format."""
+
+    collector = MetricsCollector()
+    collector.sent(3)
+    collector.failed(errno.ENETUNREACH)
+    collector.failed(None)
+    collector.invalid("[Error] Invalid MAC address: xx")
+    collector.stage("send", 0.5, 4)
+    text = collector.render_prometheus()
+    assert "pywol_packets_sent_total 3\n" in text
+    assert "pywol_packets_failed_total 2\n" in text
+    assert "pywol_targets_invalid_total 1\n" in text
+    assert 'pywol_send_errors_total{errno="ENETUNREACH"} 1\n' in text
+    assert 'pywol_send_errors_total{errno="None"} 1\n' in text
+    assert 'pywol_stage_seconds_sum{stage="send"} 0.5\n' in text
+    assert 'pywol_stage_seconds_count{stage="send"} 4\n' in text
+    assert 'pywol_stage_seconds_count{stage="parse"} 0\n' in text
+    collector.reset()
+    assert "pywol_packets_sent_total 0\n" in collector.render_prometheus()
+
+
+def test_start_exporter():
+    """The exporter should serve the rendered metrics over HTTP."""
+
+    collector = MetricsCollector()
+    collector.sent(2)
+    server = metrics.start_exporter(collector, port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.read().decode() == collector.render_prometheus()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""Tests for the pywol.pacing module.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import asyncio
+
+import mock
+import pytest
+
+from pywol.pacing import TokenBucket
+from pywol.wol import wake, wake_many
+
+
+class _Clock:
+    """Manually advanced time source."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture()
+def clock():
+    """Test fixture to supply a manual clock."""
+
+    return _Clock()
+
+
+def test_reserve_burst(clock):
+    """A full bucket should allow a burst without waiting."""
+
+    bucket = TokenBucket(100, 10, clock=clock)
+    assert [bucket.reserve() for _ in range(10)] == [0.0] * 10
+    assert bucket.reserve() == pytest.approx(0.01)
+    assert bucket.reserve() == pytest.approx(0.02)
+
+
+def test_reserve_refills(clock):
+    """Tokens should refill at the configured rate up to the burst size."""
+
+    bucket = TokenBucket(100, 10, clock=clock)
+    assert bucket.reserve(10) == 0.0
+    clock.now = 0.05
+    assert bucket.reserve(5) == 0.0
+    clock.now = 10.0
+    assert bucket.reserve(10) == 0.0
+    assert bucket.reserve(1) == pytest.approx(0.01)
+
+
+def test_default_burst():
+    """Default burst should be a tenth of a second's worth of packets."""
+
+    assert TokenBucket(1000).burst == 100
+    assert TokenBucket(5).burst == 1
+
+
+@pytest.mark.parametrize("rate, burst", [(0, 1), (-1, 1), (10, 0)])
+def test_invalid_bucket(rate, burst):
+    """Non-positive rates and bursts should raise ValueError."""
+
+    with pytest.raises(ValueError):
+        TokenBucket(rate, burst)
+
+
+def test_acquire_sleeps(clock):
+    """acquire should sleep for the reserved delay."""
+
+    bucket = TokenBucket(10, 1, clock=clock)
+    with mock.patch("time.sleep") as sleep:
+        bucket.acquire()
+        bucket.acquire()
+    sleep.assert_called_once_with(pytest.approx(0.1))
+
+
+def test_acquire_async_sleeps(clock):
+    """acquire_async should wait for the reserved delay."""
+
+    bucket = TokenBucket(10, 1, clock=clock)
+    waits = []
+
+    async def fake_sleep(delay):
+        waits.append(delay)
+
+    async def run():
+        await bucket.acquire_async()
+        await bucket.acquire_async()
+
+    loop = asyncio.new_event_loop()
+    with mock.patch("asyncio.sleep", fake_sleep):
+        loop.run_until_complete(run())
+    loop.close()
+    assert waits == [pytest.approx(0.1)]
+
+
+def test_wake_acquires():
+    """wake should take a token before sending."""
+
+    pacer = mock.Mock()
+    with mock.patch("pywol.wol._send_udp_broadcast", autospec=True):
+        wake("1A2B3C4D5E6F", pacer=pacer)
+    pacer.acquire.assert_called_once_with()
+
+
+def test_wake_many_sends_in_bursts():
+    """wake_many should send paced packets in bursts."""
+
+    pacer = mock.Mock(burst=2)
+    with mock.patch("pywol.transmit.BatchSender") as sender:
+        sender.return_value.send.return_value = {}
+        results = wake_many(["1A2B3C4D5E6F"] * 5, pacer=pacer)
+    assert [len(call[0][0]) for call in sender.return_value.send.call_args_list] == [
+        2,
+        2,
+        1,
+    ]
+    assert pacer.acquire.call_args_list == [mock.call(2), mock.call(2), mock.call(1)]
+    assert all(r.error is None for r in results)
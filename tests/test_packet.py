@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""Tests for the pywol.packet module.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import pytest
+
+from pywol.packet import PACKET_SIZE, PacketArena
+from pywol.wol import _generate_magic_packet
+
+
+@pytest.fixture()
+def arena():
+    """Test fixture to supply a small packet arena."""
+
+    return PacketArena(4)
+
+
+@pytest.mark.parametrize("index", [0, 3])
+def test_pack_contents(arena, index):
+    """Packed packets should equal generated payloads."""
+
+    packet = arena.pack(index, bytes.fromhex("1A2B3C4D5E6F"))
+    assert isinstance(packet, memoryview)
+    assert len(packet) == PACKET_SIZE
+    assert packet == _generate_magic_packet("1A2B3C4D5E6F")
+
+
+def test_pack_reuses_slot(arena):
+    """Repacking a slot should overwrite it in place."""
+
+    first = arena.pack(1, bytes.fromhex("1A2B3C4D5E6F"))
+    second = arena.pack(1, bytes.fromhex("AABBCCDDEEFF"))
+    assert first is second
+    assert second == _generate_magic_packet("AABBCCDDEEFF")
+    assert arena.packet(0) == b"\xff" * 6 + bytes(96)
+
+
+def test_is_packet(arena):
+    """Only the slot's own packet view should be recognized."""
+
+    packet = arena.pack(2, bytes.fromhex("1A2B3C4D5E6F"))
+    assert arena.is_packet(2, packet)
+    assert not arena.is_packet(1, packet)
+    assert not arena.is_packet(2, bytes(packet))
+
+
+def test_pack_with_header():
+    """Packets should follow the arena's header."""
+
+    arena = PacketArena(2, header=b"\x01\x02\x03")
+    packet = arena.pack(1, bytes.fromhex("1A2B3C4D5E6F"))
+    assert packet == b"\x01\x02\x03" + _generate_magic_packet("1A2B3C4D5E6F")
+    assert arena.packet(0) == b"\x01\x02\x03" + b"\xff" * 6 + bytes(96)
+
+
+def test_header_too_large():
+    """Headers that don't fit in a slot should raise ValueError."""
+
+    with pytest.raises(ValueError, match="header too large"):
+        PacketArena(1, header=bytes(27))
+
+
+def test_pack_password(arena):
+    """Passwords should follow the packet, and plain packets omit them."""
+
+    mac_address = bytes.fromhex("1A2B3C4D5E6F")
+    packet = arena.pack(1, mac_address, b"\x01\x02\x03\x04")
+    assert packet == _generate_magic_packet("1A2B3C4D5E6F", "01020304")
+    assert arena.is_packet(1, packet)
+    packet = arena.pack(1, mac_address)
+    assert packet == _generate_magic_packet("1A2B3C4D5E6F")
+    assert arena.is_packet(1, packet)
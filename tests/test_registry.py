@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""Tests for the pywol.registry module.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import mock
+import pytest
+
+from pywol.registry import Host, HostRegistry
+from pywol.wol import WakeResult, _generate_magic_packet
+
+
+@pytest.fixture()
+def registry():
+    """Test fixture to supply an in-memory registry with two groups."""
+
+    with HostRegistry(":memory:") as registry:
+        registry.add(
+            "web-1", "1A:2B:3C:4D:5E:6F", ip_address="10.1.2.5/24", group="web"
+        )
+        registry.add("web-2", "aabbccddeeff", ip_address="10.1.2.255", group="web")
+        registry.add("db-1", "112233445566", port=7, group="db", interface="eth1")
+        yield registry
+
+
+def test_add_and_get(registry):
+    """Hosts should be stored normalized with their resolved destination."""
+
+    assert registry.get("web-1") == Host(
+        "web-1", "1A2B3C4D5E6F", "10.1.2.255", 9, "web", "10.1.2.0/24", None
+    )
+    assert registry.get("db-1") == Host(
+        "db-1", "112233445566", "255.255.255.255", 7, "db", None, "eth1"
+    )
+    assert registry.get("missing") is None
+    assert len(registry) == 3
+
+
+def test_add_replaces(registry):
+    """Adding an existing name should replace the host."""
+
+    registry.add("web-2", "AABBCCDDEEFF", group="db")
+    assert len(registry) == 3
+    assert registry.get("web-2").group == "db"
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"mac_address": "1A2B3C4D5E6FF"},
+        {"mac_address": "1A2B3C4D5E6F", "ip_address": "10.1.2.256"},
+        {"mac_address": "1A2B3C4D5E6F", "port": 65536},
+        {"mac_address": "1A2B3C4D5E6F", "subnet": "10.1.2.0/33"},
+    ],
+)
+def test_add_invalid(registry, kwargs):
+    """Invalid hosts should raise ValueError and not be stored."""
+
+    with pytest.raises(ValueError):
+        registry.add("bad", **kwargs)
+    assert registry.get("bad") is None
+
+
+def test_remove(registry):
+    """Removing should report whether the host existed."""
+
+    assert registry.remove("web-1") is True
+    assert registry.remove("web-1") is False
+    assert len(registry) == 2
+
+
+def test_find(registry):
+    """Hosts should be selectable by name, group and subnet."""
+
+    assert [host.name for host in registry.find()] == ["db-1", "web-1", "web-2"]
+    assert [host.name for host in registry.find(group="web")] == ["web-1", "web-2"]
+    assert [host.name for host in registry.find(subnet="10.1.2.7/24")] == ["web-1"]
+    assert [host.name for host in registry.find(names=["web-2", "db-1"])] == [
+        "db-1",
+        "web-2",
+    ]
+    assert list(registry.find(group="web", names=["db-1"])) == []
+    with pytest.raises(ValueError, match=r"\[Error\] Invalid subnet: bogus"):
+        list(registry.find(subnet="bogus"))
+    with pytest.raises(ValueError, match=r"\[Error\] Invalid subnet: bogus"):
+        registry.wake(subnet="bogus")
+
+
+def test_group_query_uses_index(registry):
+    """Group and subnet lookups should be answered from an index."""
+
+    for column, value in (("grp", "web"), ("subnet", "10.1.2.0/24")):
+        plan = registry._conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT * FROM hosts WHERE {column} = ?", (value,)
+        ).fetchall()
+        assert "USING INDEX" in plan[0][-1]
+
+
+def test_persistence(tmp_path):
+    """Hosts should survive reopening the database."""
+
+    path = str(tmp_path / "nested" / "hosts.db")
+    with HostRegistry(path) as registry:
+        registry.add("web-1", "1A2B3C4D5E6F")
+    with HostRegistry(path) as registry:
+        assert registry.get("web-1").mac_address == "1A2B3C4D5E6F"
+
+
+def test_default_path(tmp_path, monkeypatch):
+    """The registry path should default to $PYWOL_REGISTRY."""
+
+    path = str(tmp_path / "hosts.db")
+    monkeypatch.setenv("PYWOL_REGISTRY", path)
+    with HostRegistry() as registry:
+        assert registry.path == path
+
+
+def test_wake(registry):
+    """Stored packets should be sent without being rebuilt."""
+
+    with mock.patch("pywol.transmit._load_sendmmsg", return_value=None), mock.patch(
+        "socket.socket.sendto", autospec=True
+    ) as sendto, mock.patch("pywol.registry._generate_magic_packet") as generate:
+        results = registry.wake(group="web", names=["web-1", "web-3"])
+    generate.assert_not_called()
+    assert results == [
+        WakeResult("web-1", ("10.1.2.255", "9"), None),
+        WakeResult("web-3", None, "[Error] Unknown host: web-3"),
+    ]
+    assert sendto.call_args[0] == (
+        _generate_magic_packet("1A2B3C4D5E6F"),
+        ("10.1.2.255", 9),
+    )
+
+
+def test_wake_send_error(registry):
+    """Failed sends should be reported per host."""
+
+    with mock.patch("pywol.transmit._load_sendmmsg", return_value=None), mock.patch(
+        "socket.socket.sendto", autospec=True, side_effect=OSError
+    ):
+        results = registry.wake(names=["db-1"])
+    assert results == [
+        WakeResult(
+            "db-1", None, "[Error] Cannot send broadcast to IP address: 255.255.255.255"
+        )
+    ]
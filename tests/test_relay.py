@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""Tests for the pywol.relay module.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import threading
+
+import pytest
+
+import pywol
+from pywol.relay import RelayClient, RelayServer, _sign, _verify
+from pywol.wol import WakeResult, _generate_magic_packet
+
+KEY = b"shared secret"
+
+
+@pytest.fixture()
+def receiver():
+    """Test fixture to supply a bound loopback UDP socket."""
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        sock.settimeout(5)
+        yield sock
+
+
+@pytest.fixture()
+def relay_process(tmp_path):
+    """Test fixture to run `pywol relay` on loopback in another process."""
+
+    key_file = tmp_path / "relay.key"
+    key_file.write_bytes(KEY + b"\n")
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.path.dirname(os.path.dirname(pywol.__file__))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "pywol.entry", "relay", "--host", "127.0.0.1"]
+        + ["--port", "0", "--key-file", str(key_file)],
+        stdout=subprocess.PIPE,
+        env=env,
+    )
+    try:
+        line = process.stdout.readline().decode()
+        assert line.startswith("Listening on 127.0.0.1:")
+        yield int(line.split(":")[1].split()[0])
+    finally:
+        process.terminate()
+        process.wait(10)
+        process.stdout.close()
+
+
+def test_authenticate():
+    """Forged, expired and replayed requests should be rejected."""
+
+    server = RelayServer(KEY, clock=lambda: 1000.0, max_age=30)
+    request = {"targets": [], "time": 990.0, "nonce": "a"}
+    assert server._authenticate(_sign(KEY, request)) == request
+    with pytest.raises(ValueError, match="Replayed request"):
+        server._authenticate(_sign(KEY, request))
+    with pytest.raises(ValueError, match="Invalid signature"):
+        server._authenticate(_sign(b"other key", dict(request, nonce="b")))
+    with pytest.raises(ValueError, match="Invalid signature"):
+        server._authenticate(_sign(KEY, request).replace(b"990", b"999"))
+    with pytest.raises(ValueError, match="Request expired"):
+        server._authenticate(_sign(KEY, dict(request, time=960.0, nonce="c")))
+    server._clock = lambda: 1021.0
+    server._authenticate(_sign(KEY, dict(request, time=1000.0, nonce="d")))
+    assert server._nonces == {"d"}
+
+
+def test_respond(receiver):
+    """Valid requests should be sent and answered with signed results."""
+
+    port = receiver.getsockname()[1]
+    loop = asyncio.new_event_loop()
+
+    async def run():
+        async with RelayServer(KEY, "127.0.0.1", 0) as server:
+            request = {
+                "targets": ["1A2B3C4D5E6F"],
+                "ip_address": "127.0.0.1",
+                "port": port,
+                "time": server._clock(),
+                "nonce": "a",
+            }
+            line = _sign(KEY, request)
+            return await server._respond(line), await server._respond(line)
+
+    try:
+        response, replayed = loop.run_until_complete(run())
+    finally:
+        loop.close()
+    assert _verify(KEY, response) == {
+        "results": [["1A2B3C4D5E6F", ["127.0.0.1", str(port)], None]],
+        "nonce": "a",
+    }
+    assert _verify(KEY, replayed) == {"error": "[Error] Invalid request.", "nonce": "a"}
+    assert receiver.recv(1024) == _generate_magic_packet("1A2B3C4D5E6F")
+
+
+@pytest.mark.parametrize("transport", ["tcp", "udp"])
+def test_two_process_loopback(relay_process, receiver, transport):
+    """A relay in another process should re-broadcast batched targets."""
+
+    port = receiver.getsockname()[1]
+    targets = ["1A2B3C4D5E6F", ["AABBCCDDEEFF", "127.0.0.1", port], "1A2B3C4D5E6FF"]
+    with RelayClient(
+        "127.0.0.1", relay_process, key=KEY, transport=transport, chunk_size=2
+    ) as client:
+        results = client.wake_many(targets, ip_address="127.0.0.1", port=port)
+    assert results == [
+        WakeResult("1A2B3C4D5E6F", ("127.0.0.1", str(port)), None),
+        WakeResult(("AABBCCDDEEFF", "127.0.0.1", port), ("127.0.0.1", str(port)), None),
+        WakeResult("1A2B3C4D5E6FF", None, "[Error] Invalid MAC address: 1A2B3C4D5E6FF"),
+    ]
+    assert {receiver.recv(1024), receiver.recv(1024)} == {
+        _generate_magic_packet("1A2B3C4D5E6F"),
+        _generate_magic_packet("AABBCCDDEEFF"),
+    }
+
+
+def test_two_process_wrong_key(relay_process):
+    """A relay should reject requests signed with another key."""
+
+    with RelayClient("127.0.0.1", relay_process, key=b"wrong key") as client:
+        with pytest.raises(ValueError, match="Invalid request"):
+            client.wake_many(["1A2B3C4D5E6F"])
+
+
+def test_respond_unsigned_error():
+    """Requests with an invalid signature should get an unsigned error."""
+
+    server = RelayServer(KEY)
+    line = _sign(b"other key", {"targets": [], "time": 0.0, "nonce": "a"})
+    loop = asyncio.new_event_loop()
+    try:
+        response = loop.run_until_complete(server._respond(line))
+    finally:
+        loop.close()
+    assert response == b'{"error": "[Error] Invalid request."}'
+
+
+@pytest.fixture()
+def udp_relay():
+    """Test fixture to supply a loopback UDP socket standing in for a relay."""
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        sock.settimeout(5)
+        yield sock
+
+
+def _answer(sock, *responses):
+    """Answer the next request datagram on `sock` with `responses`.
+
+    Callables are called with the decoded request for the datagram.
+
+    """
+
+    line, addr = sock.recvfrom(65535)
+    request = _verify(KEY, line)
+    for response in responses:
+        sock.sendto(response(request) if callable(response) else response, addr)
+
+
+def test_client_udp_skips_unsigned_error(udp_relay):
+    """Over UDP, unsigned errors shouldn't preempt the signed response."""
+
+    results = {"results": [["1A2B3C4D5E6F", ["255.255.255.255", "9"], None]]}
+    thread = threading.Thread(
+        target=_answer,
+        args=(
+            udp_relay,
+            b'{"error": "[Error] Invalid request."}',
+            lambda request: _sign(KEY, dict(results, nonce="stale")),
+            lambda request: _sign(KEY, dict(results, nonce=request["nonce"])),
+        ),
+    )
+    thread.start()
+    try:
+        with RelayClient(
+            "127.0.0.1", udp_relay.getsockname()[1], key=KEY, transport="udp"
+        ) as client:
+            assert client.wake_many(["1A2B3C4D5E6F"]) == [
+                WakeResult("1A2B3C4D5E6F", ("255.255.255.255", "9"), None)
+            ]
+    finally:
+        thread.join()
+
+
+def test_client_udp_errors(udp_relay):
+    """Over UDP, signed errors should raise at once, unsigned ones on timeout."""
+
+    port = udp_relay.getsockname()[1]
+    error = {"error": "[Error] Invalid request."}
+    with RelayClient(
+        "127.0.0.1", port, key=KEY, transport="udp", timeout=0.2
+    ) as client:
+        thread = threading.Thread(
+            target=_answer,
+            args=(
+                udp_relay,
+                lambda request: _sign(KEY, dict(error, nonce=request["nonce"])),
+            ),
+        )
+        thread.start()
+        try:
+            with pytest.raises(ValueError, match="Invalid request"):
+                client.wake_many(["1A2B3C4D5E6F"])
+        finally:
+            thread.join()
+        thread = threading.Thread(
+            target=_answer, args=(udp_relay, b'{"error": "[Error] Invalid request."}')
+        )
+        thread.start()
+        try:
+            with pytest.raises(ValueError, match="Invalid request"):
+                client.wake_many(["1A2B3C4D5E6F"])
+        finally:
+            thread.join()
+
+
+def test_client_forged_response():
+    """Responses not signed with the shared key should raise ValueError."""
+
+    with socket.socket() as listener:
+        listener.bind(("127.0.0.1", 0))
+        listener.listen(1)
+        with RelayClient("127.0.0.1", listener.getsockname()[1], key=KEY) as client:
+            conn, _ = listener.accept()
+            with conn:
+                conn.sendall(_sign(b"other key", {"results": []}) + b"\n")
+                with pytest.raises(ValueError, match="Invalid signature"):
+                    client.wake_many(["1A2B3C4D5E6F"])
+
+
+@pytest.mark.parametrize(
+    "key, transport, exception",
+    [(b"", "tcp", ValueError), (KEY, "sctp", ValueError), (None, "tcp", TypeError)],
+)
+def test_client_invalid_arguments(key, transport, exception):
+    """Empty keys and unknown transports should raise."""
+
+    with pytest.raises(exception, match=r"\[Error\]"):
+        RelayClient("127.0.0.1", key=key, transport=transport)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Tests for the pywol.resolver module.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import pickle
+
+import mock
+import pytest
+
+from pywol.resolver import BroadcastResolver
+from pywol.wol import wake_many
+
+
+@pytest.fixture()
+def resolver():
+    """Test fixture to supply a resolver with nested subnets."""
+
+    return BroadcastResolver(["10.0.0.0/8", "10.1.2.0/24", "192.168.1.7/255.255.255.0"])
+
+
+@pytest.mark.parametrize(
+    "ip_address, expected",
+    [
+        ("10.1.2.3", "10.1.2.255"),
+        ("10.1.3.3", "10.255.255.255"),
+        ("192.168.1.20", "192.168.1.255"),
+        ("192.168.2.20", "192.168.2.20"),
+        ("255.255.255.255", "255.255.255.255"),
+        ("172.16.0.1/12", "172.31.255.255"),
+        ("10.1.2.3/16", "10.1.255.255"),
+    ],
+)
+def test_resolve(resolver, ip_address, expected):
+    """Bare hosts should map to the longest matching subnet."""
+
+    assert resolver.resolve(ip_address) == expected
+
+
+@pytest.mark.parametrize("invalid_input", ["10.1.2.256", "10..1.2", "10.1.2.3/33"])
+def test_resolve_invalid(resolver, invalid_input):
+    """Invalid addresses should raise ValueError."""
+
+    with pytest.raises(ValueError):
+        resolver.resolve(invalid_input)
+
+
+@pytest.mark.parametrize("invalid_subnet", ["10.1.2.0/33", "subnet"])
+def test_add_subnet_invalid(resolver, invalid_subnet):
+    """Invalid subnets should raise ValueError."""
+
+    with pytest.raises(ValueError):
+        resolver.add_subnet(invalid_subnet)
+
+
+def test_resolve_memoized(resolver):
+    """Repeated resolutions should be served from the cache."""
+
+    resolver.resolve("10.1.2.3")
+    resolver.resolve("10.1.2.3")
+    assert resolver.resolve.cache_info().hits == 1
+
+
+def test_add_subnet_clears_cache(resolver):
+    """Indexing a subnet should invalidate memoized resolutions."""
+
+    assert resolver.resolve("172.16.0.1") == "172.16.0.1"
+    resolver.add_subnet("172.16.0.0/16")
+    assert resolver.resolve("172.16.0.1") == "172.16.255.255"
+    assert len(resolver) == 4
+
+
+def test_wake_many_resolver(resolver):
+    """wake_many should send to resolved broadcast addresses."""
+
+    with mock.patch("pywol.transmit._load_sendmmsg", return_value=None), mock.patch(
+        "socket.socket.sendto", autospec=True
+    ):
+        results = wake_many(
+            [("1A2B3C4D5E6F", "10.1.2.3"), ("1A2B3C4D5E6F", "10.9.9.9")],
+            resolver=resolver,
+        )
+    assert [r.dest for r in results] == [("10.1.2.255", "9"), ("10.255.255.255", "9")]
+
+
+def test_pickle(resolver):
+    """Pickled resolvers should resolve alike, with an empty memo."""
+
+    resolver.resolve("10.1.2.3")
+    copy = pickle.loads(pickle.dumps(resolver))
+    assert copy.resolve("10.1.2.3") == resolver.resolve("10.1.2.3")
+    assert copy.resolve.cache_info().currsize == 1
+    assert len(copy) == len(resolver)
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""Tests for the pywol.retransmit module.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import errno
+import socket
+
+import mock
+import pytest
+
+from pywol.metrics import MetricsCollector, add_observer, remove_observer
+from pywol.pacing import TokenBucket
+from pywol.retransmit import RetransmitPolicy
+from pywol.wol import FAILED, SENT, WakeResult, iter_wake, wake, wake_many
+
+UNREACHABLE = OSError(errno.ENETUNREACH, "Network is unreachable")
+
+
+class FakeClock:
+    """Clock that advances only when slept on."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture()
+def sendto():
+    """Test fixture to mock out per-packet sends."""
+
+    with mock.patch("pywol.transmit._load_sendmmsg", return_value=None), mock.patch(
+        "socket.socket.sendto", autospec=True
+    ) as sendto:
+        yield sendto
+
+
+def _sends(sendto):
+    """Return the (payload, address) of each mocked send."""
+
+    return [(bytes(call[0][0]), call[0][1]) for call in sendto.call_args_list]
+
+
+def test_copies_interleaved(sendto):
+    """Rounds should send the whole batch, one interval apart."""
+
+    clock = FakeClock()
+    policy = RetransmitPolicy(3, 0.5, clock=clock, sleep=clock.sleep)
+    results = wake_many(["1A2B3C4D5E6F", "AABBCCDDEEFF"], retransmit=policy)
+    assert [result.error for result in results] == [None, None]
+    addresses = [address for _, address in _sends(sendto)]
+    assert addresses == [("255.255.255.255", 9)] * 6
+    payloads = [payload for payload, _ in _sends(sendto)]
+    assert payloads[0::2] == [payloads[0]] * 3
+    assert payloads[1::2] == [payloads[1]] * 3
+    assert payloads[0] != payloads[1]
+    assert clock.sleeps == [0.5, 0.5]
+
+
+def test_additional_ports(sendto):
+    """Copies should also go to additional ports other than the target's."""
+
+    policy = RetransmitPolicy(2, 0, ports=[7, 9, 7])
+    assert policy.ports == (7, 9)
+    records = list(
+        iter_wake(
+            ["1A2B3C4D5E6F", ("AABBCCDDEEFF", "10.0.0.255", 7)], retransmit=policy
+        )
+    )
+    assert [record.copies for record in records] == [4, 4]
+    addresses = [address for _, address in _sends(sendto)]
+    assert (
+        addresses
+        == [
+            ("255.255.255.255", 9),
+            ("10.0.0.255", 7),
+            ("255.255.255.255", 7),
+            ("10.0.0.255", 9),
+        ]
+        * 2
+    )
+
+
+def test_partial_failures(sendto):
+    """A target should only fail if no copy of its packet was sent."""
+
+    sendto.side_effect = [UNREACHABLE, UNREACHABLE, None, UNREACHABLE]
+    policy = RetransmitPolicy(2, 0)
+    sent, failed = iter_wake(
+        ["1A2B3C4D5E6F", ("AABBCCDDEEFF", "10.0.0.255")], retransmit=policy
+    )
+    assert (sent.status, sent.copies) == (SENT, 1)
+    assert (failed.status, failed.copies, failed.errno) == (
+        FAILED,
+        0,
+        errno.ENETUNREACH,
+    )
+
+
+def test_wake_retransmit(sendto, capsys):
+    """wake should send the copies and keep its printing and return value."""
+
+    policy = RetransmitPolicy(2, 0)
+    assert wake(
+        "1A2B3C4D5E6F", ip_address="10.0.0.5/8", return_dest=True, retransmit=policy
+    ) == ("10.255.255.255", "9")
+    assert sendto.call_count == 2
+    sendto.side_effect = UNREACHABLE
+    assert wake("1A2B3C4D5E6F", retransmit=policy) is None
+    wake("1A2B3C4D5E6FF", retransmit=policy)
+    assert capsys.readouterr().out == (
+        "[Error] Cannot send broadcast to IP address: 255.255.255.255\n"
+        "[Error] Invalid MAC address: 1A2B3C4D5E6FF\n"
+    )
+
+
+def test_observed_copies(sendto):
+    """Observers should be told about every copy sent."""
+
+    collector = MetricsCollector()
+    add_observer(collector)
+    try:
+        wake_many(["1A2B3C4D5E6F", "xx"], retransmit=RetransmitPolicy(3, 0))
+    finally:
+        remove_observer(collector)
+    assert collector.packets_sent == 3
+    assert collector.targets_invalid == 1
+
+
+def test_delivered_copies():
+    """All copies should reach a loopback receiver through sendmmsg."""
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as receiver:
+        receiver.bind(("127.0.0.1", 0))
+        receiver.settimeout(5)
+        port = receiver.getsockname()[1]
+        results = wake_many(
+            ["1A2B3C4D5E6F"],
+            ip_address="127.0.0.1",
+            port=port,
+            retransmit=RetransmitPolicy(3, 0),
+        )
+        assert results == [WakeResult("1A2B3C4D5E6F", ("127.0.0.1", str(port)), None)]
+        assert len({receiver.recv(1024) for _ in range(3)}) == 1
+
+
+@pytest.mark.parametrize(
+    "ports, pacer",
+    [(True, None), (False, TokenBucket(10000, burst=1))],
+)
+def test_delivered_arena_copies(ports, pacer):
+    """Arena-built packets should survive all rounds, passes and slices."""
+
+    macs = ["000000000000", "000000000001", "000000000002"]
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as receiver, socket.socket(
+        socket.AF_INET, socket.SOCK_DGRAM
+    ) as other:
+        receivers = [receiver, other] if ports else [receiver]
+        for sock in receivers:
+            sock.bind(("127.0.0.1", 0))
+            sock.settimeout(5)
+        port = receiver.getsockname()[1]
+        policy = RetransmitPolicy(2, 0, [other.getsockname()[1]] if ports else ())
+        results = wake_many(
+            macs,
+            ip_address="127.0.0.1",
+            port=port,
+            cache=False,
+            pacer=pacer,
+            retransmit=policy,
+        )
+        assert [result.error for result in results] == [None] * 3
+        for sock in receivers:
+            received = [sock.recv(1024)[6:12].hex().upper() for _ in range(6)]
+            assert sorted(received) == sorted(macs * 2)
+
+
+@pytest.mark.parametrize(
+    "args, message",
+    [
+        ((0,), "Invalid number of copies: 0"),
+        ((2.5,), "Invalid number of copies: 2.5"),
+        ((3, -1), "Invalid interval: -1"),
+        ((3, 0.1, [70000]), "Invalid port number"),
+    ],
+)
+def test_invalid_policy(args, message):
+    """Invalid policies should raise ValueError."""
+
+    with pytest.raises(ValueError, match=message):
+        RetransmitPolicy(*args)
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""Tests for the pywol.schedule module.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import errno
+import random
+from datetime import datetime
+
+import mock
+import pytest
+
+from pywol.registry import HostRegistry
+from pywol.schedule import Wave, WakeScheduler, _due_time, load_plan
+from pywol.wol import WakeResult, _generate_magic_packet
+
+
+class FakeClock:
+    """Clock that advances only when slept on."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture()
+def clock():
+    """Test fixture to supply a fake clock."""
+
+    return FakeClock()
+
+
+@pytest.fixture()
+def sendto():
+    """Test fixture to mock out per-packet sends."""
+
+    with mock.patch("pywol.transmit._load_sendmmsg", return_value=None), mock.patch(
+        "socket.socket.sendto", autospec=True
+    ) as sendto:
+        yield sendto
+
+
+@pytest.fixture()
+def scheduler(clock):
+    """Test fixture to supply a scheduler driven by the fake clock."""
+
+    with WakeScheduler(clock=clock, sleep=clock.sleep, rng=random.Random(1)) as sched:
+        yield sched
+
+
+def test_waves_fire_in_order(scheduler, clock, sendto):
+    """Waves of several entries should fire in due time order."""
+
+    macs = ["1A2B3C4D5E6F", "AABBCCDDEEFF", "112233445566"]
+    waves = scheduler.add(1010, macs, name="lab", wave_size=2, interval=30)
+    assert waves == [
+        Wave(1010.0, "lab", 1, 2, macs[:2]),
+        Wave(1040.0, "lab", 2, 2, macs[2:]),
+    ]
+    scheduler.add(1020, [("665544332211", "10.0.0.1/8", 7)])
+    assert len(scheduler) == 3
+    assert scheduler.next_due == 1010.0
+
+    fired = []
+    results = scheduler.run(lambda wave, results: fired.append((clock(), wave)))
+    assert [(now, wave.name, wave.number) for now, wave in fired] == [
+        (1010.0, "lab", 1),
+        (1020.0, None, 1),
+        (1040.0, "lab", 2),
+    ]
+    assert clock.sleeps == [10.0, 10.0, 20.0]
+    assert results[2] == WakeResult(
+        ("665544332211", "10.0.0.1/8", 7), ("10.255.255.255", "7"), None
+    )
+    assert sendto.call_count == 4
+    assert len(scheduler) == 0
+
+
+def test_passwords(scheduler, sendto):
+    """Targets without a password should use the default, not the previous."""
+
+    targets = [("1A2B3C4D5E6F", "10.0.0.255", 9, "01:02:03:04"), "AABBCCDDEEFF"]
+    scheduler.add(1000, targets)
+    scheduler.add(1001, targets, password="0A0B0C0D")
+    scheduler.run()
+    assert [call[0][0] for call in sendto.call_args_list] == [
+        _generate_magic_packet("1A2B3C4D5E6F", "01020304"),
+        _generate_magic_packet("AABBCCDDEEFF"),
+        _generate_magic_packet("1A2B3C4D5E6F", "01020304"),
+        _generate_magic_packet("AABBCCDDEEFF", "0A0B0C0D"),
+    ]
+
+
+def test_jitter(scheduler):
+    """Jitter should delay each wave by up to the given seconds."""
+
+    waves = scheduler.add(1000, ["1A2B3C4D5E6F"] * 4, wave_size=1, jitter=5)
+    offsets = [wave.due - 1000 for wave in waves]
+    assert all(0 <= offset <= 5 for offset in offsets)
+    assert len(set(offsets)) == 4
+
+
+def test_send_error(scheduler, sendto):
+    """Failed sends should be reported per target."""
+
+    sendto.side_effect = [OSError(errno.ENETUNREACH, "Network is unreachable"), None]
+    scheduler.add(900, ["1A2B3C4D5E6F", "AABBCCDDEEFF"], ip_address="10.0.0.255")
+    assert scheduler.run() == [
+        WakeResult(
+            "1A2B3C4D5E6F",
+            None,
+            "[Error] Cannot send broadcast to IP address: 10.0.0.255",
+        ),
+        WakeResult("AABBCCDDEEFF", ("10.0.0.255", "9"), None),
+    ]
+
+
+@pytest.mark.parametrize(
+    "targets, options, message",
+    [
+        (["1A2B3C4D5E6FF"], {}, "Invalid MAC address"),
+        (["1A2B3C4D5E6F"], {"wave_size": 0}, "Invalid wave size"),
+        (["1A2B3C4D5E6F"], {"port": 70000}, "Invalid port number"),
+    ],
+)
+def test_add_invalid(scheduler, targets, options, message):
+    """Invalid entries should be rejected when added."""
+
+    with pytest.raises(ValueError, match=message):
+        scheduler.add(1000, targets, **options)
+    assert len(scheduler) == 0
+
+
+def test_due_time():
+    """Times of day should stand for their next occurrence."""
+
+    now = datetime(2019, 5, 1, 12, 0).timestamp()
+    assert _due_time("13:30", now) == datetime(2019, 5, 1, 13, 30).timestamp()
+    assert _due_time("06:00:30", now) == datetime(2019, 5, 2, 6, 0, 30).timestamp()
+    assert _due_time(datetime(2019, 5, 3), now) == datetime(2019, 5, 3).timestamp()
+    assert _due_time(1234, now) == 1234.0
+    with pytest.raises(ValueError, match="Invalid time of day"):
+        _due_time("25:00", now)
+    with pytest.raises(TypeError, match="Invalid schedule time"):
+        _due_time(None, now)
+
+
+def test_load_plan(scheduler, sendto, tmp_path):
+    """Plan entries should be scheduled from targets or registry groups."""
+
+    with HostRegistry(str(tmp_path / "hosts.db")) as registry:
+        registry.add("lab-1", "1A2B3C4D5E6F", group="lab")
+        registry.add(
+            "lab-2",
+            "AABBCCDDEEFF",
+            ip_address="10.0.0.5/8",
+            group="lab",
+            password="01:02:03:04",
+        )
+        plan = {
+            "waves": [
+                {"at": 1100, "group": "lab", "wave_size": 1, "interval": 60},
+                {"at": 1200, "name": "spare", "targets": [["112233445566", "", 7]]},
+            ]
+        }
+        with pytest.raises(ValueError, match="Invalid IP address"):
+            load_plan(scheduler, plan, registry)
+        assert len(scheduler) == 0
+        plan["waves"][1]["targets"] = [["112233445566", "10.0.0.1/8", 7]]
+        waves = load_plan(scheduler, plan, registry)
+    assert [(wave.due, wave.name, wave.targets) for wave in waves] == [
+        (1100.0, "lab", ["lab-1"]),
+        (1160.0, "lab", ["lab-2"]),
+        (1200.0, "spare", [["112233445566", "10.0.0.1/8", 7]]),
+    ]
+    results = scheduler.run()
+    assert results[1] == WakeResult("lab-2", ("10.255.255.255", "9"), None)
+    assert [call[0][0] for call in sendto.call_args_list[:2]] == [
+        _generate_magic_packet("1A2B3C4D5E6F"),
+        _generate_magic_packet("AABBCCDDEEFF", "01020304"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "plan, message",
+    [
+        ([], "Invalid plan"),
+        ({"waves": [{"targets": []}]}, "Invalid plan entry"),
+        ({"waves": [{"at": 1, "targets": [], "size": 2}]}, "Unknown plan keys: size"),
+        ({"waves": [{"at": 1}]}, "either targets or a group"),
+        ({"waves": [{"at": 1, "group": "lab"}]}, "No host registry for group: lab"),
+    ],
+)
+def test_load_plan_invalid(scheduler, plan, message):
+    """Invalid plans should raise ValueError."""
+
+    with pytest.raises(ValueError, match=message):
+        load_plan(scheduler, plan)
+
+
+def test_load_plan_group_settings(scheduler):
+    """Group entries should not override the hosts' stored settings."""
+
+    plan = {"waves": [{"at": 1, "group": "lab", "port": 7, "password": "01020304"}]}
+    with HostRegistry(":memory:") as registry:
+        with pytest.raises(ValueError, match="group cannot set: password, port"):
+            load_plan(scheduler, plan, registry)
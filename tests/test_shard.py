@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""Tests for the pywol.shard module.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import socket
+from multiprocessing import get_context
+
+import mock
+import pytest
+
+from pywol.metrics import STAGES, MetricsCollector, add_observer, remove_observer
+from pywol.resolver import BroadcastResolver
+from pywol.shard import wake_sharded
+from pywol.wol import WakeResult, _generate_magic_packet
+
+
+@pytest.fixture()
+def receiver():
+    """Test fixture to supply a bound loopback UDP socket."""
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        sock.settimeout(5)
+        yield sock
+
+
+@pytest.fixture()
+def collector():
+    """Test fixture to supply a registered metrics collector."""
+
+    collector = MetricsCollector()
+    add_observer(collector)
+    yield collector
+    remove_observer(collector)
+
+
+MACS = ["1A2B3C4D5E6F", "AABBCCDDEEFF", "112233445566", "xx", "665544332211"]
+
+
+def _expected(port):
+    dest = ("127.0.0.1", str(port))
+    return [
+        (
+            WakeResult(mac, None, "[Error] Invalid MAC address: xx")
+            if mac == "xx"
+            else WakeResult(mac, dest, None)
+        )
+        for mac in MACS
+    ]
+
+
+@pytest.mark.parametrize("shard_size", [None, 1, 2])
+def test_wake_sharded(receiver, shard_size):
+    """Results of all shards should be returned in input order."""
+
+    port = receiver.getsockname()[1]
+    results = wake_sharded(
+        iter(MACS),
+        processes=2,
+        shard_size=shard_size,
+        ip_address="127.0.0.1",
+        port=port,
+    )
+    assert results == _expected(port)
+    packets = {receiver.recv(1024) for _ in range(4)}
+    assert packets == {_generate_magic_packet(mac) for mac in MACS if mac != "xx"}
+
+
+def test_wake_sharded_observed(receiver, collector):
+    """Worker events should be reported to observers of the parent."""
+
+    port = receiver.getsockname()[1]
+    wake_sharded(MACS, processes=2, ip_address="127.0.0.1", port=port)
+    assert collector.packets_sent == 4
+    assert collector.targets_invalid == 1
+    assert collector.stage_count == dict.fromkeys(STAGES, 4)
+
+
+def test_wake_sharded_single_process(receiver):
+    """A single process should wake the targets without a pool."""
+
+    port = receiver.getsockname()[1]
+    with mock.patch("pywol.shard.get_context") as get_context:
+        results = wake_sharded(MACS, processes=1, ip_address="127.0.0.1", port=port)
+        assert wake_sharded([], processes=4) == []
+    get_context.assert_not_called()
+    assert results == _expected(port)
+
+
+def test_wake_sharded_spawn_resolver(receiver):
+    """Resolvers should reach workers started with the spawn method."""
+
+    port = receiver.getsockname()[1]
+    resolver = BroadcastResolver(["127.0.0.0/8"])
+    with mock.patch("pywol.shard.get_context", return_value=get_context("spawn")):
+        results = wake_sharded(
+            ["1A2B3C4D5E6F", ("AABBCCDDEEFF", "127.0.0.1")],
+            processes=2,
+            ip_address="127.0.0.1",
+            port=port,
+            resolver=resolver,
+        )
+    assert [result.dest for result in results] == [("127.255.255.255", str(port))] * 2
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""Tests for the pywol.transmit module.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import errno
+import socket
+
+import mock
+import pytest
+
+from pywol.packet import PacketArena
+from pywol.transmit import BatchSender, _load_sendmmsg
+from pywol.wol import _generate_magic_packet
+
+
+@pytest.fixture()
+def receiver():
+    """Test fixture to supply a bound loopback UDP socket."""
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(1)
+    yield sock
+    sock.close()
+
+
+@pytest.fixture()
+def sender_socket():
+    """Test fixture to supply an unbound UDP socket."""
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    yield sock
+    sock.close()
+
+
+def _packets(port, count):
+    payloads = [_generate_magic_packet(f"{i:012X}") for i in range(count)]
+    return [(payload, ("127.0.0.1", port)) for payload in payloads]
+
+
+def _receive(sock, count):
+    return [sock.recv(1024) for _ in range(count)]
+
+
+@pytest.mark.skipif(_load_sendmmsg() is None, reason="sendmmsg not available")
+@pytest.mark.parametrize("batch_size", [1, 3, 1024])
+def test_send_batched(receiver, sender_socket, batch_size):
+    """All packets should be delivered with sendmmsg in order."""
+
+    packets = _packets(receiver.getsockname()[1], 10)
+    sender = BatchSender(sender_socket, batch_size)
+    assert sender.batched
+    assert sender.send(packets) == {}
+    assert _receive(receiver, 10) == [payload for payload, _ in packets]
+
+
+@pytest.mark.skipif(_load_sendmmsg() is None, reason="sendmmsg not available")
+def test_send_batched_writable_buffers(receiver, sender_socket):
+    """Memoryview slices of a bytearray should be sent without copying."""
+
+    buffer = bytearray(b"abcdef")
+    view = memoryview(buffer)
+    port = receiver.getsockname()[1]
+    packets = [(view[0:3], ("127.0.0.1", port)), (view[3:6], ("127.0.0.1", port))]
+    assert BatchSender(sender_socket).send(packets) == {}
+    assert _receive(receiver, 2) == [b"abc", b"def"]
+
+
+@pytest.mark.skipif(_load_sendmmsg() is None, reason="sendmmsg not available")
+def test_send_batched_partial_failure(sender_socket):
+    """Errors should be reported for the failing packet only."""
+
+    sendmmsg = mock.Mock(side_effect=[1, -1, 1])
+    sender = BatchSender(sender_socket)
+    sender._sendmmsg = sendmmsg
+    with mock.patch("ctypes.get_errno", return_value=errno.ENETUNREACH):
+        failures = sender.send(_packets(9, 3))
+    assert list(failures) == [1]
+    assert failures[1].errno == errno.ENETUNREACH
+    assert sendmmsg.call_count == 3
+
+
+def test_send_fallback(receiver, sender_socket):
+    """Packets should be sent one at a time without sendmmsg."""
+
+    packets = _packets(receiver.getsockname()[1], 5)
+    sender = BatchSender(sender_socket, batched=False)
+    assert not sender.batched
+    assert sender.send(packets) == {}
+    assert _receive(receiver, 5) == [payload for payload, _ in packets]
+
+
+@pytest.mark.skipif(_load_sendmmsg() is None, reason="sendmmsg not available")
+def test_send_enosys_falls_back(receiver, sender_socket):
+    """An ENOSYS error should switch to per-packet sends."""
+
+    packets = _packets(receiver.getsockname()[1], 4)
+    sender = BatchSender(sender_socket)
+    sender._sendmmsg = mock.Mock(return_value=-1)
+    with mock.patch("ctypes.get_errno", return_value=errno.ENOSYS):
+        assert sender.send(packets) == {}
+    assert not sender.batched
+    assert _receive(receiver, 4) == [payload for payload, _ in packets]
+
+
+@pytest.mark.parametrize("batched", [True, False])
+def test_send_arena_packets(receiver, sender_socket, batched):
+    """Packets built in the sender's arena should be delivered."""
+
+    port = receiver.getsockname()[1]
+    arena = PacketArena(4)
+    macs = ["1A2B3C4D5E6F", "AABBCCDDEEFF"]
+    packets = [
+        (arena.pack(index, bytes.fromhex(mac)), ("127.0.0.1", port))
+        for index, mac in enumerate(macs)
+    ]
+    sender = BatchSender(sender_socket, 4, batched=batched, arena=arena)
+    assert sender.send(packets) == {}
+    assert _receive(receiver, 2) == [_generate_magic_packet(mac) for mac in macs]
+
+
+@pytest.mark.parametrize("batched", [True, False])
+def test_send_without_destination(receiver, sender_socket, batched):
+    """Packets without a destination should go to the connected peer."""
+
+    sender_socket.connect(receiver.getsockname())
+    payloads = [_generate_magic_packet(f"{i:012X}") for i in range(3)]
+    sender = BatchSender(sender_socket, 2, batched=batched)
+    assert sender.send([(payload, None) for payload in payloads]) == {}
+    assert _receive(receiver, 3) == payloads
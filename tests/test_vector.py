@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Tests for the pywol.vector module.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import pytest
+
+from pywol.wol import _clean_mac_address, _generate_magic_packet
+
+np = pytest.importorskip("numpy")
+vector = pytest.importorskip("pywol.vector")
+
+MACS = [
+    "1A:2B:3C:4D:5E:6F",
+    "AA:BB:CC:DD:EE:FFF",
+    "a1-b2;c3.d4 e5/f6",
+    "",
+    "123456abcdef",
+    "23456abcdef",
+]
+INVALID = [1, 3, 5]
+
+
+def test_validate_macs_strings():
+    """Invalid string entries should be reported by index."""
+
+    assert vector.validate_macs(MACS).tolist() == INVALID
+
+
+def test_magic_packets_match_scalar_path():
+    """Packets should equal those of the scalar code path."""
+
+    packets, invalid = vector.magic_packets(np.array(MACS, dtype=object))
+    assert packets.shape == (len(MACS), 102)
+    assert packets.dtype == np.uint8
+    assert invalid.tolist() == INVALID
+    for index, mac in enumerate(MACS):
+        if index in INVALID:
+            assert not packets[index].any()
+        else:
+            expected = _generate_magic_packet(_clean_mac_address(mac))
+            assert packets[index].tobytes() == expected
+
+
+def test_magic_packets_integers():
+    """Integer MAC addresses should be validated and converted."""
+
+    values = np.array([0x1A2B3C4D5E6F, 1 << 48, -1, 0], dtype=np.int64)
+    packets, invalid = vector.magic_packets(values)
+    assert invalid.tolist() == [1, 2]
+    assert packets[0].tobytes() == _generate_magic_packet("1A2B3C4D5E6F")
+    assert packets[3].tobytes() == _generate_magic_packet("000000000000")
+
+
+def test_mac_values_round_trip():
+    """String and integer inputs should yield the same values."""
+
+    values, invalid = vector.mac_values(MACS)
+    assert values.dtype == np.uint64
+    assert values[0] == 0x1A2B3C4D5E6F
+    assert values[1] == 0
+    again, _ = vector.mac_values(values[[0, 2, 4]])
+    assert again.tolist() == values[[0, 2, 4]].tolist()
+
+
+@pytest.mark.parametrize("invalid_input", [np.zeros((2, 2)), np.array([1.5])])
+def test_invalid_arrays(invalid_input):
+    """Arrays of the wrong shape or type should be rejected."""
+
+    with pytest.raises((ValueError, TypeError)):
+        vector.validate_macs(invalid_input)
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""Tests for the pywol.verify module.
+
+copyright: © 2019 by Erik R Berlin.
+license: MIT, see LICENSE for more details.
+
+"""
+
+import asyncio
+import socket
+
+import mock
+import pytest
+
+from pywol import verify
+
+
+@pytest.fixture()
+def loop():
+    """Test fixture to supply a fresh event loop."""
+
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture()
+def receiver():
+    """Test fixture to supply a loopback UDP socket for magic packets."""
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    yield sock
+    sock.close()
+
+
+def _host(receiver, mac="1A2B3C4D5E6F", host="127.0.0.1"):
+    return (mac, host, "127.0.0.1", receiver.getsockname()[1])
+
+
+def test_wake_and_wait_tcp_listener(loop, receiver):
+    """A host accepting connections should be reported up."""
+
+    async def run():
+        server = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0)
+        probe_port = server.sockets[0].getsockname()[1]
+        try:
+            return await verify.wake_and_wait(
+                [_host(receiver)], probe_port=probe_port, timeout=5
+            )
+        finally:
+            server.close()
+
+    (result,) = loop.run_until_complete(run())
+    assert result.error is None
+    assert result.sent == 1
+    assert 0 <= result.latency < 5
+    assert len(receiver.recv(1024)) == 102
+
+
+def test_wake_and_wait_udp_refused(loop, receiver):
+    """A host refusing a UDP probe should be reported up."""
+
+    closed = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    closed.bind(("127.0.0.1", 0))
+    probe_port = closed.getsockname()[1]
+    closed.close()
+    (result,) = loop.run_until_complete(
+        verify.wake_and_wait(
+            [_host(receiver)], probe="udp", probe_port=probe_port, timeout=5
+        )
+    )
+    assert result.error is None
+
+
+def test_wake_and_wait_password(loop, receiver):
+    """A fifth host entry element should be sent as SecureOn password."""
+
+    closed = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    closed.bind(("127.0.0.1", 0))
+    probe_port = closed.getsockname()[1]
+    closed.close()
+    entry = _host(receiver) + ("01:02:03:04:05:06",)
+    (result,) = loop.run_until_complete(
+        verify.wake_and_wait([entry], probe="udp", probe_port=probe_port, timeout=5)
+    )
+    assert result.error is None
+    assert receiver.recv(1024)[102:] == bytes.fromhex("010203040506")
+
+
+def test_wake_and_wait_retransmits_until_up(loop, receiver):
+    """Packets should be retransmitted on the backoff schedule."""
+
+    probe = mock.Mock(side_effect=[False, False, False, True])
+
+    async def fake_probe(host, port, timeout):
+        return probe()
+
+    with mock.patch.dict(verify._PROBES, {"tcp": fake_probe}):
+        (result,) = loop.run_until_complete(
+            verify.wake_and_wait(
+                [_host(receiver)], probe_interval=0.01, backoff=[0.015], timeout=5
+            )
+        )
+    assert result.error is None
+    assert result.sent >= 2
+    assert probe.call_count == 4
+
+
+def test_wake_and_wait_timeout(loop, receiver):
+    """Hosts that never answer should time out with an error."""
+
+    async def fake_probe(host, port, timeout):
+        return False
+
+    with mock.patch.dict(verify._PROBES, {"tcp": fake_probe}):
+        results = loop.run_until_complete(
+            verify.wake_and_wait(
+                [_host(receiver, host="192.0.2.1"), ("invalid", "192.0.2.2")],
+                probe_interval=0.01,
+                backoff=[],
+                timeout=0.05,
+            )
+        )
+    assert results[0].latency is None
+    assert results[0].sent == 1
+    assert results[0].error == "[Error] Host did not come up: 192.0.2.1"
+    assert results[1].error == "[Error] Invalid MAC address: invalid"
+
+
+def test_wake_and_wait_invalid_probe(loop):
+    """Unknown probe types should raise ValueError."""
+
+    with pytest.raises(ValueError):
+        loop.run_until_complete(verify.wake_and_wait([], probe="icmp"))
@@ -6,18 +6,29 @@ license: MIT, see LICENSE for more details.
 
 """
 
+import errno
 import socket
 
 import mock
 import pytest
 
+from pywol.mac import MacAddress
 from pywol.wol import (
+    FAILED,
+    INVALID,
+    SENT,
+    WakeRecord,
     _clean_mac_address,
+    _clean_password,
     _evaluate_ip_address,
     _generate_magic_packet,
+    _open_broadcast_socket,
     _send_udp_broadcast,
     _validate_port_number,
+    iter_wake,
+    packet_cache,
     wake,
+    wake_many,
 )
 
 
@@ -191,3 +202,348 @@ def test_wake_return_target_kwarg(sample_data):
             sample_data["mac"], ip_address="192.168.1.123", port=7, return_dest=True
         )
         assert dest == ("192.168.1.123", "7")
+
+
+def test_wake_many_reuses_socket(sample_data):
+    """All targets should be sent over a single socket."""
+
+    targets = [
+        sample_data["mac"],
+        (sample_data["mac"], "192.168.1.255"),
+        (sample_data["mac"], "192.168.1.123/24", 7),
+    ]
+    with mock.patch("pywol.wol.socket.socket", autospec=True) as mock_socket:
+        results = wake_many(targets)
+        assert mock_socket.call_count == 1
+        sock = mock_socket.return_value
+        sock.sendto.assert_has_calls(
+            [
+                mock.call(sample_data["payload"], ("255.255.255.255", 9)),
+                mock.call(sample_data["payload"], ("192.168.1.255", 9)),
+                mock.call(sample_data["payload"], ("192.168.1.255", 7)),
+            ]
+        )
+        sock.close.assert_called_once_with()
+    assert [r.dest for r in results] == [
+        ("255.255.255.255", "9"),
+        ("192.168.1.255", "9"),
+        ("192.168.1.255", "7"),
+    ]
+    assert all(r.error is None for r in results)
+
+
+@pytest.mark.parametrize(
+    "invalid_target, expected_error",
+    [
+        ("1A2B3C4D5E6FF", "[Error] Invalid MAC address: 1A2B3C4D5E6FF"),
+        (
+            ("1A2B3C4D5E6F", "192.168.1.257"),
+            "[Error] Invalid IP address: 192.168.1.257",
+        ),
+        (
+            ("1A2B3C4D5E6F", "192.168.1.255", 65536),
+            "[Error] Invalid port number: 65536",
+        ),
+        (None, "[Error] Invalid target: None"),
+    ],
+)
+def test_wake_many_invalid_target(invalid_target, expected_error):
+    """Invalid targets should be reported without affecting others."""
+
+    with mock.patch("pywol.transmit._load_sendmmsg", return_value=None), mock.patch(
+        "socket.socket.sendto", autospec=True
+    ):
+        results = wake_many([invalid_target, "1A2B3C4D5E6F"])
+    assert results[0].target == invalid_target
+    assert results[0].dest is None
+    assert results[0].error == expected_error
+    assert results[1].dest == ("255.255.255.255", "9")
+
+
+def test_wake_many_send_error():
+    """Send failures should be reported per target."""
+
+    with mock.patch("pywol.transmit._load_sendmmsg", return_value=None), mock.patch(
+        "socket.socket.sendto", autospec=True, side_effect=OSError
+    ):
+        (result,) = wake_many([("1A2B3C4D5E6F", "192.168.1.255")])
+    assert result.dest is None
+    assert result.error == "[Error] Cannot send broadcast to IP address: 192.168.1.255"
+
+
+@pytest.mark.parametrize("cache", [True, False])
+def test_wake_many_loopback(sample_data, cache):
+    """Packets should be delivered to a loopback receiver in batches."""
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as receiver:
+        receiver.bind(("127.0.0.1", 0))
+        receiver.settimeout(1)
+        port = receiver.getsockname()[1]
+        targets = [(sample_data["mac"], "127.0.0.1", port)] * 5
+        results = wake_many(targets, cache=cache)
+        assert [r.dest for r in results] == [("127.0.0.1", str(port))] * 5
+        assert [receiver.recv(1024) for _ in range(5)] == [sample_data["payload"]] * 5
+
+
+def test_wake_uses_packet_cache(sample_data):
+    """Repeated wakes should reuse the cached payload."""
+
+    packet_cache.clear()
+    with mock.patch("pywol.wol._send_udp_broadcast", autospec=True) as send_broadcast:
+        wake(sample_data["mac"])
+        wake(sample_data["mac"].lower())
+    first, second = (call[0][0] for call in send_broadcast.call_args_list)
+    assert first is second
+    assert packet_cache.info().hits == 1
+
+
+def test_wake_many_mac_address_target(sample_data):
+    """Parsed MacAddress targets should be accepted without re-parsing."""
+
+    with mock.patch("pywol.transmit._load_sendmmsg", return_value=None), mock.patch(
+        "socket.socket.sendto", autospec=True
+    ) as sendto:
+        (result,) = wake_many([(MacAddress(sample_data["mac"]), "192.168.1.255")])
+    assert result.error is None
+    assert sendto.call_args[0][0] == sample_data["payload"]
+
+
+def test_iter_wake_records(capsys):
+    """Records should carry status, errno & elapsed time and print nothing."""
+
+    with mock.patch("pywol.transmit._load_sendmmsg", return_value=None), mock.patch(
+        "socket.socket.sendto",
+        autospec=True,
+        side_effect=[None, OSError(errno.ENETUNREACH, "Network is unreachable")],
+    ):
+        sent, invalid, failed = iter_wake(
+            ["1A2B3C4D5E6F", "1A2B3C4D5E6FF", ("AABBCCDDEEFF", "10.0.0.255", 7)]
+        )
+    assert (sent.target, sent.dest, sent.status, sent.errno, sent.error) == (
+        "1A2B3C4D5E6F",
+        ("255.255.255.255", "9"),
+        SENT,
+        None,
+        None,
+    )
+    assert (invalid.dest, invalid.status, invalid.errno, invalid.error) == (
+        None,
+        INVALID,
+        None,
+        "[Error] Invalid MAC address: 1A2B3C4D5E6FF",
+    )
+    assert (failed.dest, failed.status, failed.errno, failed.error) == (
+        ("10.0.0.255", "7"),
+        FAILED,
+        errno.ENETUNREACH,
+        "[Error] Cannot send broadcast to IP address: 10.0.0.255",
+    )
+    assert all(record.elapsed >= 0 for record in (sent, invalid, failed))
+    assert capsys.readouterr().out == ""
+
+
+def test_iter_wake_streams():
+    """Records should be yielded per batch while targets are consumed lazily."""
+
+    def targets():
+        for i in range(1500):
+            yield f"{i:012X}"
+        raise AssertionError("Targets consumed past the first batch.")
+
+    with mock.patch("pywol.transmit._load_sendmmsg", return_value=None), mock.patch(
+        "socket.socket.sendto", autospec=True
+    ):
+        records = iter_wake(targets())
+        first = next(records)
+        records.close()
+    assert first.target == "000000000000"
+    assert first.status == SENT
+
+
+def test_wake_record_slots():
+    """Records should not carry a per-instance __dict__."""
+
+    record = WakeRecord("1A2B3C4D5E6F", None, INVALID, None, "error", 0.5)
+    assert not hasattr(record, "__dict__")
+    assert repr(record) == (
+        "WakeRecord(target='1A2B3C4D5E6F', dest=None, status='invalid', "
+        "errno=None, error='error', elapsed=0.5, copies=0)"
+    )
+
+
+@pytest.mark.parametrize(
+    "ip_address, expected",
+    [
+        ("FF02::1%eth0", "ff02::1%eth0"),
+        (" ff02:0::1%2 ", "ff02::1%2"),
+        ("fe80::1%eth1", "fe80::1%eth1"),
+        ("2001:db8::1", "2001:db8::1"),
+        ("ff05::1", "ff05::1"),
+    ],
+)
+def test_evaluate_ipv6_address(ip_address, expected):
+    """IPv6 addresses should be compressed and keep their scope."""
+
+    assert _evaluate_ip_address(ip_address) == expected
+
+
+@pytest.mark.parametrize(
+    "ip_address, expected_error",
+    [
+        ("ff02::1", "[Error] IPv6 link-local address requires an interface scope"),
+        ("fe80::1", "[Error] IPv6 link-local address requires an interface scope"),
+        ("ff02::1%", "[Error] Invalid IP address"),
+        ("ff02::g%eth0", "[Error] Invalid IP address"),
+        ("2001:db8::/64", "[Error] Invalid IP address"),
+    ],
+)
+def test_evaluate_invalid_ipv6_address(ip_address, expected_error):
+    """Invalid or unscoped link-local IPv6 addresses should be rejected."""
+
+    with pytest.raises(ValueError) as e:
+        _evaluate_ip_address(ip_address)
+    assert str(e.value) == f"{expected_error}: {ip_address}"
+
+
+def test_open_ipv6_socket():
+    """IPv6 sockets should send link-local multicast from the scope interface."""
+
+    with _open_broadcast_socket(socket.AF_INET6, "lo") as sock:
+        assert sock.family == socket.AF_INET6
+        hops = sock.getsockopt(socket.IPPROTO_IPV6, socket.IPV6_MULTICAST_HOPS)
+        interface = sock.getsockopt(socket.IPPROTO_IPV6, socket.IPV6_MULTICAST_IF)
+    assert hops == 1
+    assert interface == socket.if_nametoindex("lo")
+
+
+def test_wake_ipv6_multicast(sample_data):
+    """wake should send to scoped IPv6 multicast addresses."""
+
+    with mock.patch(
+        "pywol.wol._open_broadcast_socket", wraps=_open_broadcast_socket
+    ) as open_socket, mock.patch("socket.socket.sendto", autospec=True) as sendto:
+        dest = wake(sample_data["mac"], ip_address="ff02::1%lo", return_dest=True)
+    assert dest == ("ff02::1%lo", "9")
+    open_socket.assert_called_once_with(socket.AF_INET6, "lo")
+    assert sendto.call_args[0] == (sample_data["payload"], ("ff02::1%lo", 9))
+
+
+@pytest.mark.parametrize("cache", [True, False])
+def test_wake_many_mixed_families(cache):
+    """IPv4 and IPv6 targets should be sent in one pass."""
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as v4, socket.socket(
+        socket.AF_INET6, socket.SOCK_DGRAM
+    ) as v6:
+        v4.bind(("127.0.0.1", 0))
+        v6.bind(("::1", 0))
+        v4.settimeout(1)
+        v6.settimeout(1)
+        v4_port = v4.getsockname()[1]
+        v6_port = v6.getsockname()[1]
+        targets = [
+            ("1A2B3C4D5E6F", "::1", v6_port),
+            ("AABBCCDDEEFF", "127.0.0.1", v4_port),
+            ("112233445566", "ff02::1%no-such-if", 9),
+            ("665544332211", "::1", v6_port),
+        ]
+        results = wake_many(targets, cache=cache)
+        assert [result.dest for result in results] == [
+            ("::1", str(v6_port)),
+            ("127.0.0.1", str(v4_port)),
+            None,
+            ("::1", str(v6_port)),
+        ]
+        assert results[2].error == (
+            "[Error] Cannot send broadcast to IP address: ff02::1%no-such-if"
+        )
+        assert v4.recv(1024) == _generate_magic_packet("AABBCCDDEEFF")
+        assert v6.recv(1024) == _generate_magic_packet("1A2B3C4D5E6F")
+        assert v6.recv(1024) == _generate_magic_packet("665544332211")
+
+
+@pytest.mark.parametrize(
+    "password, expected",
+    [
+        (None, ""),
+        ("", ""),
+        ("01:02:03:04:05:0a", "01020304050A"),
+        ("01-02-03-04", "01020304"),
+        ("192.168.1.1", "C0A80101"),
+        (b"\x01\x02\x03\x04\x05\x06", "010203040506"),
+    ],
+)
+def test_clean_password(password, expected):
+    """Valid SecureOn passwords should be cleaned to hexadecimal digits."""
+
+    assert _clean_password(password) == expected
+
+
+@pytest.mark.parametrize(
+    "password, exception",
+    [
+        ("01:02:03:04:05", ValueError),
+        ("192.168.1.256", ValueError),
+        ("0102030405GG", ValueError),
+        (b"\x01\x02\x03", ValueError),
+        (1234, TypeError),
+    ],
+)
+def test_clean_invalid_password(password, exception):
+    """Invalid SecureOn passwords should raise."""
+
+    with pytest.raises(exception, match="Invalid SecureOn password"):
+        _clean_password(password)
+
+
+def test_generate_magic_packet_password(sample_data):
+    """The password should be appended to the magic packet."""
+
+    payload = _generate_magic_packet(sample_data["mac"], "010203040506")
+    assert payload == sample_data["payload"] + b"\x01\x02\x03\x04\x05\x06"
+
+
+def test_wake_password(sample_data):
+    """The password should be sent after the MAC address repetitions."""
+
+    with mock.patch("pywol.wol._send_udp_broadcast") as send:
+        wake(sample_data["mac"], password="192.168.1.1")
+    send.assert_called_once_with(
+        sample_data["payload"] + b"\xc0\xa8\x01\x01", "255.255.255.255", 9
+    )
+
+
+def test_wake_invalid_password(sample_data, capsys):
+    """Invalid passwords should be printed and nothing sent."""
+
+    with mock.patch("pywol.wol._send_udp_broadcast") as send:
+        wake(sample_data["mac"], password="0102")
+    send.assert_not_called()
+    assert capsys.readouterr().out == "[Error] Invalid SecureOn password: 0102\n"
+
+
+@pytest.mark.parametrize("cache", [True, False])
+def test_wake_many_passwords(sample_data, cache):
+    """Per-target passwords should override the default password."""
+
+    targets = [
+        sample_data["mac"],
+        (sample_data["mac"], "255.255.255.255", 9, "0A0B0C0D"),
+        (sample_data["mac"], "10.0.0.255", 7, "0102"),
+        sample_data["mac"],
+    ]
+    with mock.patch("pywol.transmit._load_sendmmsg", return_value=None), mock.patch(
+        "socket.socket.sendto", autospec=True
+    ) as sendto:
+        results = wake_many(targets, password="01:02:03:04:05:06", cache=cache)
+    assert [result.error for result in results] == [
+        None,
+        None,
+        "[Error] Invalid SecureOn password: 0102",
+        None,
+    ]
+    assert [bytes(call[0][0]) for call in sendto.call_args_list] == [
+        sample_data["payload"] + bytes.fromhex("010203040506"),
+        sample_data["payload"] + bytes.fromhex("0A0B0C0D"),
+        sample_data["payload"] + bytes.fromhex("010203040506"),
+    ]